@@ -0,0 +1,157 @@
+"""
+Deterministic generator for realistic pipe-delimited sales files
+
+Usage:
+    python -m benchmarks.generate_sales_data --rows 1000000 --output /tmp/sales_1m.txt
+"""
+
+import argparse
+import random
+from datetime import date, timedelta
+
+HEADER = "TransactionID|Date|ProductID|ProductName|Quantity|UnitPrice|CustomerID|Region"
+
+# (ProductID, ProductName, typical unit price) modelled on data/sales_data.txt
+PRODUCTS = [
+    ("P101", "Laptop", 45000),
+    ("P102", "Mouse", 450),
+    ("P103", "Keyboard", 1800),
+    ("P104", "Monitor", 12000),
+    ("P105", "Webcam", 2500),
+    ("P106", "Headphones", 2200),
+    ("P107", "USB Cable", 250),
+    ("P108", "External Hard Drive", 5500),
+    ("P109", "Wireless Mouse", 900),
+    ("P110", "Laptop Charger", 1800),
+]
+
+REGIONS = ["North", "South", "East", "West"]
+
+# Name variants with embedded commas, as seen in the sample file
+COMMA_NAMES = {
+    "Laptop": "Laptop,Premium",
+    "Mouse": "Mouse,Wireless",
+    "Monitor": "Monitor,LED",
+    "Webcam": "Webcam,HD",
+    "Keyboard": "Keyboard,Mechanical",
+    "External Hard Drive": "External Hard Drive,1TB",
+    "Wireless Mouse": "Wireless Mouse,Gaming",
+    "Laptop Charger": "Laptop Charger,65W",
+}
+
+DIRTY_KINDS = [
+    "bad_transaction_id",
+    "bad_product_id",
+    "missing_customer",
+    "missing_region",
+    "zero_quantity",
+    "non_numeric_price",
+    "wrong_field_count",
+    "empty_line",
+]
+
+
+def _format_number(value, rng):
+    # Thousands separators like "1,916" show up in real exports
+    if value >= 1000 and rng.random() < 0.3:
+        return f"{value:,}"
+    return str(value)
+
+
+def _make_row(i, rng, customers, start_date, days):
+    pid, name, base_price = rng.choice(PRODUCTS)
+
+    if name in COMMA_NAMES and rng.random() < 0.1:
+        name = COMMA_NAMES[name]
+
+    quantity = rng.randint(1, 10)
+    price = max(int(base_price * rng.uniform(0.7, 1.3)), 1)
+    day = start_date + timedelta(days=rng.randrange(days))
+
+    return [
+        f"T{i + 1:06d}",
+        day.isoformat(),
+        pid,
+        name,
+        _format_number(quantity, rng),
+        _format_number(price, rng),
+        f"C{rng.randrange(customers) + 1:05d}",
+        rng.choice(REGIONS),
+    ]
+
+
+def _make_dirty(fields, rng):
+    kind = rng.choice(DIRTY_KINDS)
+
+    if kind == "bad_transaction_id":
+        fields[0] = "X" + fields[0][1:]
+    elif kind == "bad_product_id":
+        fields[2] = "Q" + fields[2][1:]
+    elif kind == "missing_customer":
+        fields[6] = ""
+    elif kind == "missing_region":
+        fields[7] = ""
+    elif kind == "zero_quantity":
+        fields[4] = "0"
+    elif kind == "non_numeric_price":
+        fields[5] = "N/A"
+    elif kind == "wrong_field_count":
+        fields = fields[:-1]
+    elif kind == "empty_line":
+        return ""
+
+    return "|".join(fields)
+
+
+def iter_sales_lines(rows, seed=42, dirty_ratio=0.1, customers=None,
+                     start_date=date(2024, 1, 1), days=365):
+    """
+    Yields the header followed by `rows` data lines
+    The same arguments always produce the same lines
+    """
+    rng = random.Random(seed)
+    customers = customers or max(rows // 20, 10)
+
+    yield HEADER
+
+    for i in range(rows):
+        fields = _make_row(i, rng, customers, start_date, days)
+
+        if rng.random() < dirty_ratio:
+            yield _make_dirty(fields, rng)
+        else:
+            yield "|".join(fields)
+
+
+def generate_sales_file(path, rows, seed=42, dirty_ratio=0.1, **options):
+    """
+    Streams a generated sales file to disk without holding it in memory
+    Returns: path
+    """
+    with open(path, "w", encoding="utf-8", buffering=1024 * 1024) as f:
+        batch = []
+        for line in iter_sales_lines(rows, seed=seed, dirty_ratio=dirty_ratio, **options):
+            batch.append(line)
+            if len(batch) >= 10000:
+                f.write("\n".join(batch) + "\n")
+                batch = []
+        if batch:
+            f.write("\n".join(batch) + "\n")
+
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic sales_data.txt")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--output", default="data/sales_data_generated.txt")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--dirty-ratio", type=float, default=0.1)
+    args = parser.parse_args()
+
+    generate_sales_file(args.output, args.rows, seed=args.seed, dirty_ratio=args.dirty_ratio)
+    print(f"Generated {args.rows:,} rows at {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,370 @@
+"""
+Times and memory-profiles every stage of the main.py pipeline on generated data
+
+Usage:
+    python -m benchmarks.run_benchmarks --rows 10k 100k 1M
+    python -m benchmarks.run_benchmarks --rows 1M --workers 2 4
+    python -m benchmarks.run_benchmarks --rows 50M --memory --output results.json
+    python -m benchmarks.run_benchmarks --rows 100k --compare benchmarks/results/bench_abc1234.json
+    python -m benchmarks.run_benchmarks --rows 100k --pipeline --catalog-latency 0.5
+"""
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+from benchmarks.generate_sales_data import generate_sales_file
+from utils.file_handler import read_sales_data, iter_sales_data
+from utils.data_processor import (
+    parse_transactions,
+    iter_transactions,
+    validate_and_filter,
+    calculate_total_revenue,
+    region_wise_sales,
+    top_selling_products,
+    customer_analysis,
+    daily_sales_trend,
+    find_peak_sales_day,
+    low_performing_products
+)
+from utils.aggregator import aggregate_transactions
+from utils import columnar
+from utils.columnar import TransactionTable
+from utils.mmap_reader import read_mmap_transactions, iter_mmap_lines
+from utils.parallel_parser import parallel_validate
+from utils.validation import VALIDATION_RULES
+from utils.api_handler import create_product_mapping, enrich_sales_data, save_enriched_data
+from utils.report_generator import generate_sales_report
+from utils.api_handler import fetch_all_products
+from utils.async_pipeline import run_sequential, run_pipeline
+from utils.catalog_client import CatalogClient
+from utils.stub_catalog_server import make_products, start_stub_server
+
+RESULTS_DIR = "benchmarks/results"
+
+# Largest input whose rows the in-memory stages may hold (~224 bytes per parsed row)
+MAX_IN_MEMORY_ROWS = 5000000
+
+
+def parse_size(text):
+    """
+    Parses row counts like 10000, 10k, 1M or 50M
+    """
+    text = text.strip().lower()
+    multiplier = 1
+    if text.endswith("k"):
+        multiplier, text = 1000, text[:-1]
+    elif text.endswith("m"):
+        multiplier, text = 1000000, text[:-1]
+    return int(float(text) * multiplier)
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def measure(stage, func, rows, track_memory=False):
+    """
+    Runs func once, timing wall and CPU time and (optionally) the
+    tracemalloc peak it allocates
+    Returns: (func result, result record)
+    """
+    gc.collect()
+
+    if track_memory:
+        tracemalloc.start()
+        baseline, _ = tracemalloc.get_traced_memory()
+
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+
+    # The pipeline functions print progress; keep the benchmark output clean
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = func()
+
+    seconds = time.perf_counter() - wall_start
+    cpu_seconds = time.process_time() - cpu_start
+
+    peak_bytes = None
+    if track_memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        peak_bytes = peak - baseline
+
+    record = {
+        "stage": stage,
+        "rows": rows,
+        "seconds": round(seconds, 6),
+        "cpu_seconds": round(cpu_seconds, 6),
+        "rows_per_sec": round(rows / seconds, 1) if seconds else None,
+        "peak_bytes": peak_bytes
+    }
+    print(
+        f"  {stage:<26}{seconds:>10.3f}s"
+        + (f"{peak_bytes / 1e6:>12.1f} MB" if peak_bytes is not None else "")
+    )
+
+    return result, record
+
+
+def drop_page_cache(path):
+    """
+    Asks the kernel to evict the file from the page cache so the next read
+    is cold (best effort; a no-op where posix_fadvise is unavailable)
+    """
+    if not hasattr(os, "posix_fadvise"):
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+
+
+def bench_file(rows, data_dir, seed):
+    """
+    Returns: path of the generated input file, generating it on first use
+    """
+    path = os.path.join(data_dir, f"sales_bench_{rows}_{seed}.txt")
+    if not os.path.exists(path):
+        print(f"Generating {rows:,} rows -> {path}")
+        generate_sales_file(path, rows, seed=seed)
+    return path
+
+
+def benchmark_pipeline(rows, data_dir, seed, latency):
+    """
+    End-to-end wall time of the sequential and the overlapped (async)
+    pipeline against a local stub catalog that answers after `latency` seconds
+    Both drivers run with the options `main.py --async` uses (snapshots on),
+    each into its own empty snapshot directory: once cold (parse and save
+    the snapshot), then again loading it
+    Returns: list of result records
+    """
+    path = bench_file(rows, data_dir, seed)
+    print(f"\nPipeline: {rows:,} rows, catalog latency {latency:.2f}s")
+
+    server, base_url = start_stub_server(products=make_products(200), latency=latency)
+    records = []
+
+    try:
+        with CatalogClient(base_url) as client, tempfile.TemporaryDirectory() as out_dir:
+            options = {
+                "filename": path,
+                "fetch": lambda: (fetch_all_products(client), None),
+                "enriched_output": os.path.join(out_dir, "enriched.txt"),
+                "output_file": os.path.join(out_dir, "report.txt")
+            }
+
+            for driver, runner in (("pipeline_sequential", run_sequential), ("pipeline_async", run_pipeline)):
+                snapshot_dir = os.path.join(out_dir, f"snapshots_{driver}")
+                for stage in (driver, f"{driver}_snapshot"):
+                    gc.collect()
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        _, timeline = runner(snapshot_dir=snapshot_dir, **options)
+                    print(f"  {stage}\n" + "\n".join("    " + line for line in timeline.summary().splitlines()))
+                    records.append({
+                        "stage": stage,
+                        "rows": rows,
+                        "seconds": round(timeline.seconds, 6),
+                        "cpu_seconds": None,
+                        "rows_per_sec": round(rows / timeline.seconds, 1) if timeline.seconds else None,
+                        "peak_bytes": None,
+                        "catalog_latency": latency
+                    })
+    finally:
+        server.shutdown()
+
+    seconds = {r["stage"]: r["seconds"] for r in records}
+    for suffix, label in (("", "cold"), ("_snapshot", "snapshot")):
+        sequential = seconds["pipeline_sequential" + suffix]
+        overlapped = seconds["pipeline_async" + suffix]
+        print(f"  async speedup ({label}): {sequential / overlapped:.2f}x ({sequential - overlapped:.3f}s saved)")
+    return records
+
+
+def benchmark_size(rows, data_dir, seed, track_memory, cold=False, workers=(),
+                   max_in_memory=MAX_IN_MEMORY_ROWS):
+    """
+    Benchmarks every pipeline stage on a generated file of `rows` lines
+    The streaming stages read the file lazily and keep nothing per row, so
+    they run at any size (main.py --stream). The stages that hold every row
+    (read, parse, the list-based analytics, enrichment, the report and the
+    --workers path) only run up to max_in_memory rows
+    workers: worker counts to time parallel_validate() (main.py --workers) with
+    Returns: list of result records
+    """
+    path = bench_file(rows, data_dir, seed)
+
+    print(f"\nBenchmark: {rows:,} rows")
+    records = []
+
+    def run(stage, func, count=rows):
+        result, record = measure(stage, func, count, track_memory)
+        records.append(record)
+        return result
+
+    def read(stage, func):
+        if cold:
+            drop_page_cache(path)
+        return run(stage, func)
+
+    def valid_lines(lines):
+        return VALIDATION_RULES.iter_valid_lines(lines)
+
+    read("stream_parse", lambda: sum(1 for _ in iter_transactions(iter_sales_data(path))))
+    read("stream_validate", lambda: sum(1 for _ in valid_lines(iter_sales_data(path))))
+    read("mmap_validate", lambda: sum(1 for _ in valid_lines(iter_mmap_lines(path))))
+    read("stream_aggregate", lambda: aggregate_transactions(valid_lines(iter_sales_data(path))))
+    read("stream_aggregate_approx",
+         lambda: aggregate_transactions(valid_lines(iter_sales_data(path)), approximate=True))
+
+    if rows > max_in_memory:
+        print(f"  in-memory stages skipped above {max_in_memory:,} rows (--max-in-memory)")
+        return records
+
+    for count in workers:
+        read(f"parallel_validate_{count}w", lambda: len(parallel_validate(path, count)[0]))
+
+    raw_lines = read("read_sales_data", lambda: read_sales_data(path))
+    transactions = run("parse_transactions", lambda: parse_transactions(raw_lines))
+    del raw_lines
+
+    read("mmap_parse", lambda: len(read_mmap_transactions(path)))
+
+    valid, _, _ = run("validate_and_filter", lambda: validate_and_filter(transactions))
+    del transactions
+    n = len(valid)
+
+    run("calculate_total_revenue", lambda: calculate_total_revenue(valid), n)
+    run("region_wise_sales", lambda: region_wise_sales(valid), n)
+    run("top_selling_products", lambda: top_selling_products(valid), n)
+    run("customer_analysis", lambda: customer_analysis(valid), n)
+    run("daily_sales_trend", lambda: daily_sales_trend(valid), n)
+    run("find_peak_sales_day", lambda: find_peak_sales_day(valid), n)
+    run("low_performing_products", lambda: low_performing_products(valid), n)
+    aggregates = run("aggregate_transactions", lambda: aggregate_transactions(valid), n)
+    if columnar.np is not None:
+        # main.py --columnar: the same aggregates from NumPy group-bys
+        table = run("build_transaction_table", lambda: TransactionTable.from_transactions(valid), n)
+        run("table_to_aggregates", lambda: table.to_aggregates(), n)
+        del table
+
+    mapping = create_product_mapping(make_products(200))
+    enriched = run("enrich_sales_data", lambda: enrich_sales_data(valid, mapping), n)
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        run("save_enriched_data",
+            lambda: save_enriched_data(enriched, os.path.join(out_dir, "enriched.txt")), n)
+        run("generate_sales_report",
+            lambda: generate_sales_report(valid, enriched, os.path.join(out_dir, "report.txt"),
+                                          aggregates=aggregates), n)
+
+    return records
+
+
+def compare(baseline_file, results):
+    """
+    Prints per-stage speed ratios against an earlier results file
+    """
+    with open(baseline_file, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    previous = {(r["stage"], r["input_rows"]): r for r in baseline["results"]}
+
+    print(f"\nComparison with {baseline_file} (commit {baseline.get('commit')})")
+    print(f"{'Stage':<26}{'Rows':>12}{'Before':>10}{'After':>10}{'Speedup':>10}")
+
+    for r in results:
+        old = previous.get((r["stage"], r["input_rows"]))
+        if old is None or not r["seconds"]:
+            continue
+        print(
+            f"{r['stage']:<26}{r['input_rows']:>12,}"
+            f"{old['seconds']:>9.3f}s{r['seconds']:>9.3f}s"
+            f"{old['seconds'] / r['seconds']:>9.2f}x"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the sales analytics pipeline")
+    parser.add_argument("--rows", nargs="+", default=["10k", "100k"],
+                        help="input sizes, e.g. 10k 1M 50M")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--memory", action="store_true",
+                        help="record tracemalloc peaks (slows every stage down)")
+    parser.add_argument("--workers", type=int, nargs="+", default=[], metavar="N",
+                        help="also time the parallel parser (main.py --workers) with N worker processes")
+    parser.add_argument("--max-in-memory", type=parse_size, default=MAX_IN_MEMORY_ROWS, metavar="ROWS",
+                        help="skip the stages that hold every row above this input size "
+                             f"(default: {MAX_IN_MEMORY_ROWS:,}); the streaming stages always run")
+    parser.add_argument("--cold", action="store_true",
+                        help="evict the input file from the page cache before each read stage")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="also compare the sequential and async end-to-end pipelines against a stub catalog")
+    parser.add_argument("--catalog-latency", type=float, default=0.5,
+                        help="seconds the stub catalog waits before answering each request (--pipeline)")
+    parser.add_argument("--data-dir", default=tempfile.gettempdir(),
+                        help="where generated input files are cached")
+    parser.add_argument("--output", default=None,
+                        help="results JSON (default: benchmarks/results/bench_<commit>.json)")
+    parser.add_argument("--compare", default=None,
+                        help="earlier results JSON to compare against")
+    args = parser.parse_args()
+
+    commit = git_commit()
+    results = []
+
+    for size in args.rows:
+        rows = parse_size(size)
+        records = benchmark_size(rows, args.data_dir, args.seed, args.memory, args.cold,
+                                 args.workers, args.max_in_memory)
+        if args.pipeline:
+            records += benchmark_pipeline(rows, args.data_dir, args.seed, args.catalog_latency)
+        for record in records:
+            record["input_rows"] = rows
+            results.append(record)
+
+    report = {
+        "commit": commit,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "seed": args.seed,
+        "memory_tracked": args.memory,
+        "cold_cache": args.cold,
+        "results": results
+    }
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"bench_{commit or 'nogit'}.json")
+
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        compare(args.compare, results)
+
+
+if __name__ == "__main__":
+    main()
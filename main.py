@@ -1,52 +1,395 @@
 # main.py
 
-from utils.file_handler import read_sales_data
-from utils.data_processor import (
-    parse_transactions,
-    validate_and_filter,
-    calculate_total_revenue,
-    region_wise_sales,
-    top_selling_products,
-    customer_analysis,
-    daily_sales_trend,
-    find_peak_sales_day,
-    low_performing_products
+import argparse
+import signal
+from contextlib import nullcontext
+from datetime import date as Date
+from functools import partial
+
+from utils.file_handler import iter_sales_data
+from utils.query_index import TransactionIndex
+from utils.validation import VALIDATION_RULES, ValidationReport
+from utils.aggregator import SalesAggregates, ApproximateSalesAggregates, aggregate_transactions
+from utils import columnar
+from utils.columnar import TransactionTable
+from utils.sketches import DEFAULT_HLL_ERROR, DEFAULT_HEAVY_HITTER_ERROR, DEFAULT_CONFIDENCE
+from utils.incremental import update_incremental
+from utils.watch import (
+    SalesWatcher,
+    make_waiter,
+    DEBOUNCE_SECONDS,
+    MAX_REPORT_DELAY,
+    POLL_INTERVAL,
+    LOG_INTERVAL
 )
+from utils.rollup_cube import build_cube, save_cube, load_cube, cube_is_current, CUBE_FILE
+from utils.partials import aggregate_files, save_partial, PARTIAL_SUFFIX
+from utils.ingest import ingest_sales
+from utils.snapshot import snapshot_path
+from utils.async_pipeline import run_pipeline
 from utils.api_handler import (
-    fetch_all_products,
+    fetch_cached_products,
     create_product_mapping,
     enrich_sales_data,
+    iter_enriched_sales_data,
+    EnrichmentSummary,
     save_enriched_data
 )
-from utils.report_generator import generate_sales_report
+from utils.rolling import DEFAULT_WINDOWS, DailyGroups
+from utils.report_generator import generate_sales_report, uses_input, SECTIONS
+from utils.instrumentation import PipelineProfiler
+from utils.batch import run_batch, parse_filter_spec, load_filter_specs, BATCH_OUTPUT_DIR
+
+# Analytics results read from the aggregates in step [5/10], timed one by one
+ANALYTICS = [
+    "region_wise_sales",
+    "top_selling_products",
+    "customer_analysis",
+    "daily_sales_trend",
+    "rolling_sales_trend",
+    "find_peak_sales_day",
+    "low_performing_products"
+]
 
 
-def main():
+def run_incremental(filename="data/sales_data.txt", sketch_options=None, quarantine_file=None,
+                    report_sections=None, windows=DEFAULT_WINDOWS):
+    """
+    Processes only lines appended since the last run and regenerates the
+    report from the persisted aggregates
+    """
     print("=" * 50)
-    print("SALES ANALYTICS SYSTEM")
+    print("SALES ANALYTICS SYSTEM (INCREMENTAL)")
     print("=" * 50)
 
     try:
-        # [1/10] Read sales data
-        print("\n[1/10] Reading sales data...")
-        raw_lines = read_sales_data("data/sales_data.txt")
-        print(f"✓ Successfully read {len(raw_lines)} transactions")
+        print("\n[1/3] Reading new sales data...")
+        aggregates, state = update_incremental(filename, sketch_options=sketch_options,
+                                               quarantine_file=quarantine_file)
+        validation = state["report"]
+        print(f"✓ Read {state['new_rows']} new lines (offset {state['offset'] or 0})")
+        print(f"✓ Total valid: {aggregates.transaction_count} | Invalid: {validation.rejected}")
+        print(validation.summary())
+        if quarantine_file:
+            print(f"✓ Rejected rows of this run appended to: {quarantine_file}")
+
+        print("\n[2/3] Generating report...")
+        generate_sales_report(None, None, aggregates=aggregates, windows=windows, sections=report_sections)
+        print("✓ Report saved to: output/sales_report.txt")
+
+        print("\n[3/3] Process Complete!")
+        print("=" * 50)
+
+    except Exception as e:
+        print("\n❌ An error occurred:")
+        print(str(e))
+
+
+def run_stream(filename="data/sales_data.txt", sketch_options=None, quarantine_file=None,
+               report_sections=None, windows=DEFAULT_WINDOWS, profiler=None, offline=False,
+               catalog_ttl=None, enriched_output="data/enriched_sales_data.txt"):
+    """
+    Single lazy pass: lines are read, parsed, validated, folded into the
+    aggregates, enriched and written to the enriched file one at a time, so
+    no row is ever held in memory. The report is built from the aggregates
+    and an EnrichmentSummary; the filter prompt and the per-group rolling
+    sections need the rows and are skipped.
+    """
+    profiler = profiler or PipelineProfiler()
+
+    print("=" * 50)
+    print("SALES ANALYTICS SYSTEM (STREAM)")
+    print("=" * 50)
+
+    try:
+        print("\n[1/4] Fetching product catalog...")
+        cache_options = {"ttl": catalog_ttl} if catalog_ttl is not None else {}
+        with profiler.stage("fetch_cached_products") as stage:
+            api_products, catalog_cache = fetch_cached_products(offline=offline, **cache_options)
+            stage["rows"] = len(api_products)
+        product_mapping = create_product_mapping(api_products)
+        print(f"✓ {len(api_products)} catalog products")
+
+        print("\n[2/4] Streaming, validating, aggregating and enriching sales data...")
+        validation = ValidationReport()
+        enrichment = EnrichmentSummary()
+        if sketch_options is not None:
+            aggregates = ApproximateSalesAggregates(**sketch_options)
+        else:
+            aggregates = SalesAggregates()
+        add = aggregates.add
+
+        def aggregated(transactions):
+            for t in transactions:
+                add(t)
+                yield t
+
+        with profiler.stage("stream_aggregate_enrich") as stage:
+            with (open(quarantine_file, "w", encoding="utf-8") if quarantine_file else nullcontext()) as quarantine:
+                valid = VALIDATION_RULES.iter_valid_lines(iter_sales_data(filename), validation, quarantine)
+                enriched = iter_enriched_sales_data(aggregated(valid), product_mapping, enrichment)
+                write_stats = save_enriched_data(enriched, enriched_output)
+            stage["rows"] = validation.total
+        print(f"✓ Valid: {validation.valid} | Invalid: {validation.rejected}")
+        print(validation.summary())
+        if quarantine_file:
+            print(f"✓ Rejected rows written to: {quarantine_file}")
+        print(f"✓ Enriched {enrichment.matched}/{enrichment.rows} transactions")
+        print(f"✓ Saved to: {enriched_output} ({write_stats['rows_per_sec']:,.0f} rows/s)")
+
+        print("\n[3/4] Generating report...")
+        with profiler.stage("generate_sales_report", rows=aggregates.transaction_count):
+            generate_sales_report(None, enrichment, aggregates=aggregates, catalog_cache=catalog_cache,
+                                  windows=windows, sections=report_sections)
+        print("✓ Report saved to: output/sales_report.txt")
+
+        print("\n[4/4] Process Complete!")
+        print("=" * 50)
+
+    except Exception as e:
+        print("\n❌ An error occurred:")
+        print(str(e))
+
+
+def run_watch(filename="data/sales_data.txt", debounce=DEBOUNCE_SECONDS, max_delay=MAX_REPORT_DELAY,
+              use_inotify=True, poll_interval=POLL_INTERVAL, log_interval=LOG_INTERVAL,
+              sketch_options=None, windows=DEFAULT_WINDOWS, quarantine_file=None, report_sections=None):
+    """
+    Long-running mode: follows appends to the sales file and keeps the
+    aggregates and report current until interrupted (Ctrl+C / SIGTERM)
+    """
+    print("=" * 50)
+    print("SALES ANALYTICS SYSTEM (WATCH)")
+    print("=" * 50)
+
+    watcher = SalesWatcher(filename, debounce=debounce, max_delay=max_delay, log_interval=log_interval,
+                           sketch_options=sketch_options, windows=windows, quarantine_file=quarantine_file,
+                           report_sections=report_sections)
+    stop = []
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop.append(signum))
+
+    try:
+        resumed = watcher.resume()
+        waiter = make_waiter(filename, use_inotify, poll_interval)
+        print(f"✓ Watching {filename} ({waiter.name})"
+              f"{', resumed from saved state' if resumed else ''}")
+        watcher.run(waiter, should_stop=lambda: bool(stop))
+    except KeyboardInterrupt:
+        pass
+    except Exception as e:
+        print("\n❌ An error occurred:")
+        print(str(e))
+        return
+
+    if watcher.aggregates is None:
+        return
+    print(f"\n✓ Stopped at offset {watcher.offset or 0:,} | Valid: {watcher.aggregates.transaction_count:,}"
+          f" | Invalid: {watcher.invalid:,}")
+    print(watcher.validation.summary())
+    print("=" * 50)
+
+
+def run_cube_report(start_date=None, end_date=None, filename="data/sales_data.txt", windows=DEFAULT_WINDOWS,
+                    quarantine_file=None, report_sections=None):
+    """
+    Date-range report read from the persisted rollup cube; the raw file is
+    only scanned when the cube is missing or out of date
+    quarantine_file: write every rejected line here (always rescans the file)
+    """
+    print("=" * 50)
+    print("SALES ANALYTICS SYSTEM (ROLLUP CUBE)")
+    print("=" * 50)
+
+    try:
+        print("\n[1/3] Loading rollup cube...")
+        cube = load_cube(CUBE_FILE, filename) if quarantine_file is None else None
+        if cube is None:
+            print("Cube missing or out of date, rebuilding...")
+            validation = ValidationReport()
+            with (open(quarantine_file, "w", encoding="utf-8") if quarantine_file else nullcontext()) as quarantine:
+                valid = VALIDATION_RULES.iter_valid_lines(iter_sales_data(filename), validation, quarantine)
+                cube = build_cube(valid, filename, validation)
+            save_cube(cube)
+            if quarantine_file:
+                print(f"✓ Rejected rows written to: {quarantine_file}")
+        print(f"✓ {cube.rows} transactions across {len(cube.dates())} days")
+        if cube.validation is not None:
+            print(f"✓ Valid: {cube.validation.valid} | Invalid: {cube.validation.rejected}")
+            print(cube.validation.summary())
+
+        print("\n[2/3] Generating report...")
+        generate_sales_report(None, None, cube=cube, start_date=start_date, end_date=end_date,
+                              windows=windows, sections=report_sections)
+        print("✓ Report saved to: output/sales_report.txt")
+
+        print("\n[3/3] Process Complete!")
+        print("=" * 50)
+
+    except Exception as e:
+        print("\n❌ An error occurred:")
+        print(str(e))
+
+
+def run_partials(filenames, workers=None, partial_output=None, sketch_options=None, quarantine_file=None,
+                 report_sections=None, windows=DEFAULT_WINDOWS):
+    """
+    Multi-file mode: every sales file (or saved partial, *.json) is
+    aggregated independently, the partials are merged in the order given
+    and one report is generated from the result
+    partial_output: also save the merged partial for a later merge
+    sketch_options: merge approximate (sketch) aggregates instead
+    """
+    print("=" * 50)
+    print(f"SALES ANALYTICS SYSTEM ({len(filenames)} inputs)")
+    print("=" * 50)
+
+    try:
+        print("\n[1/3] Aggregating inputs...")
+        partial = aggregate_files(filenames, workers=workers, sketch_options=sketch_options,
+                                  quarantine_file=quarantine_file)
+        aggregates = partial.aggregates
+        print(f"✓ Total valid: {aggregates.transaction_count} | Invalid: {partial.invalid}")
+        print(partial.validation.summary())
+        if quarantine_file:
+            print(f"✓ Rejected rows written to: {quarantine_file}")
+
+        if partial_output:
+            save_partial(partial, partial_output)
+            print(f"✓ Partial saved to: {partial_output}")
+
+        print("\n[2/3] Generating report...")
+        generate_sales_report(None, None, aggregates=aggregates, windows=windows, sections=report_sections)
+        print("✓ Report saved to: output/sales_report.txt")
 
-        # [2/10] Parse & clean
+        print("\n[3/3] Process Complete!")
+        print("=" * 50)
+
+    except Exception as e:
+        print("\n❌ An error occurred:")
+        print(str(e))
+
+
+def run_async_pipeline(filename="data/sales_data.txt", offline=False, catalog_ttl=None,
+                       enriched_output="data/enriched_sales_data.txt", use_snapshot=True,
+                       sketch_options=None, quarantine_file=None, report_sections=None,
+                       windows=DEFAULT_WINDOWS):
+    """
+    Non-interactive mode: the catalog fetch overlaps with ingestion and
+    analytics instead of waiting for them (see utils/async_pipeline.py)
+    """
+    print("=" * 50)
+    print("SALES ANALYTICS SYSTEM (ASYNC)")
+    print("=" * 50)
+
+    try:
+        cache_options = {"ttl": catalog_ttl} if catalog_ttl is not None else {}
+        result, timeline = run_pipeline(
+            filename=filename,
+            fetch=partial(fetch_cached_products, offline=offline, **cache_options),
+            enriched_output=enriched_output,
+            use_snapshot=use_snapshot,
+            sketch_options=sketch_options,
+            quarantine_file=quarantine_file,
+            report_sections=report_sections,
+            windows=windows
+        )
+        print(f"✓ Valid: {result['valid']} | Invalid: {result['invalid']}")
+        if result["validation"] is not None:
+            print(result["validation"].summary())
+        if quarantine_file:
+            print(f"✓ Rejected rows written to: {quarantine_file}")
+        print(f"✓ Enriched {result['enriched']}/{result['valid']} transactions "
+              f"({result['products']} catalog products)")
+        print(f"✓ Saved to: {enriched_output}")
+        print("✓ Report saved to: output/sales_report.txt")
+        print("\n" + timeline.summary())
+        print("=" * 50)
+
+    except Exception as e:
+        print("\n❌ An error occurred:")
+        print(str(e))
+
+
+def run_batch_reports(specs, output_dir=BATCH_OUTPUT_DIR, filename="data/sales_data.txt", **options):
+    """
+    Non-interactive mode: one load, one report per filter spec
+    options: passed to run_batch() (offline, catalog_ttl, use_snapshot,
+    quarantine_file, workers, use_mmap, report_sections, windows, profiler)
+    """
+    print("=" * 50)
+    print(f"SALES ANALYTICS SYSTEM (BATCH: {len(specs)} filters)")
+    print("=" * 50)
+
+    try:
+        results = run_batch(specs, filename=filename, output_dir=output_dir, **options)
+        for spec, output_file, count in results:
+            print(f"✓ {output_file} ({count} transactions)")
+        print("=" * 50)
+
+    except Exception as e:
+        print("\n❌ An error occurred:")
+        print(str(e))
+
+
+def main(workers=None, offline=False, catalog_ttl=None,
+         enriched_output="data/enriched_sales_data.txt", profiler=None, prompt=True,
+         sketch_options=None, use_mmap=False, report_sections=None, filename="data/sales_data.txt",
+         use_snapshot=True, quarantine_file=None, windows=DEFAULT_WINDOWS, use_columnar=False):
+    """
+    sketch_options: HyperLogLog / Space-Saving / Count-Min settings; when
+    given, per-customer analytics run in bounded memory and are approximate
+    use_columnar: build the aggregates from a columnar TransactionTable
+    (NumPy group-bys) instead of the row-by-row pass; the results are the same
+    use_snapshot: load the parsed rows saved by the last run while the sales
+    file is unchanged, and save a new snapshot after parsing when it has changed
+    quarantine_file: write every rejected line verbatim, with the rules it failed, to this file
+    windows: rolling window sizes (days) of the rolling report sections
+    """
+    profiler = profiler or PipelineProfiler()
+
+    print("=" * 50)
+    print("SALES ANALYTICS SYSTEM")
+    print("=" * 50)
+
+    try:
+        # [1/10] + [2/10] Read, parse and validate (or reuse the rows of an unchanged file)
+        if workers:
+            print(f"\n[1/10] Reading sales data with {workers} workers...")
+        elif use_mmap:
+            print("\n[1/10] Reading sales data (memory-mapped)...")
+        else:
+            print("\n[1/10] Reading sales data...")
         print("\n[2/10] Parsing and cleaning data...")
-        transactions = parse_transactions(raw_lines)
-        print(f"✓ Parsed {len(transactions)} records")
+        ingested = ingest_sales(filename, use_snapshot=use_snapshot, quarantine_file=quarantine_file,
+                                workers=workers, use_mmap=use_mmap, profiler=profiler)
+        if ingested.source == "snapshot":
+            print(f"✓ Loaded {ingested.parsed} parsed records from {snapshot_path(filename)}")
+        else:
+            if ingested.lines is not None:
+                print(f"✓ Successfully read {ingested.lines} transactions")
+            print(f"✓ Parsed {ingested.parsed} records")
+
+        # The rollup cube is rebuilt from the rows just parsed, so --cube-report
+        # reads it instead of scanning the file again
+        if ingested.source != "snapshot" or not cube_is_current(filename):
+            with profiler.stage("build_cube", rows=len(ingested.valid)):
+                save_cube(build_cube(ingested.valid, filename, ingested.validation))
+            print(f"✓ Rollup cube saved to: {CUBE_FILE}")
 
         # [3/10] Show filter options
+        # The index answers the preview and the real filter below without rescanning
         print("\n[3/10] Filter Options Available:")
-        valid_txns_preview, _, _ = validate_and_filter(transactions)
-        regions = {t["Region"] for t in valid_txns_preview}
-        amounts = [t["Quantity"] * t["UnitPrice"] for t in valid_txns_preview]
+        with profiler.stage("build_query_index", rows=len(ingested.valid)):
+            index = TransactionIndex(ingested.valid)
+            invalid_count = ingested.invalid
+            validation = ingested.validation
+            del ingested
+            min_valid, max_valid = index.amount_range()
 
-        print("Regions:", ", ".join(sorted(regions)))
-        print(f"Amount Range: ₹{int(min(amounts))} - ₹{int(max(amounts))}")
+        print("Regions:", ", ".join(sorted(index.regions())))
+        print(f"Amount Range: ₹{int(min_valid)} - ₹{int(max_valid)}")
 
-        choice = input("\nDo you want to filter data? (y/n): ").strip().lower()
+        choice = input("\nDo you want to filter data? (y/n): ").strip().lower() if prompt else "n"
 
         region = None
         min_amount = None
@@ -62,34 +405,57 @@ def main():
 
         # [4/10] Validate & filter
         print("\n[4/10] Validating transactions...")
-        valid_transactions, invalid_count, summary = validate_and_filter(
-            transactions,
-            region=region,
-            min_amount=min_amount,
-            max_amount=max_amount
-        )
+        with profiler.stage("filter_transactions", rows=len(index)):
+            valid_transactions = index.filter(
+                region=region,
+                min_amount=min_amount,
+                max_amount=max_amount
+            )
         print(f"✓ Valid: {len(valid_transactions)} | Invalid: {invalid_count}")
+        if validation is not None:
+            print(validation.summary())
+        if quarantine_file:
+            print(f"✓ Rejected rows written to: {quarantine_file}")
 
         # [5/10] Analytics
         print("\n[5/10] Analyzing sales data...")
-        calculate_total_revenue(valid_transactions)
-        region_wise_sales(valid_transactions)
-        top_selling_products(valid_transactions)
-        customer_analysis(valid_transactions)
-        daily_sales_trend(valid_transactions)
-        find_peak_sales_day(valid_transactions)
-        low_performing_products(valid_transactions)
+        # One pass computes every metric; the report reuses the same result
+        if use_columnar:
+            with profiler.stage("build_transaction_table", rows=len(valid_transactions)):
+                table = TransactionTable.from_transactions(valid_transactions)
+            with profiler.stage("table_to_aggregates", rows=len(valid_transactions)):
+                aggregates = table.to_aggregates()
+            del table
+        else:
+            with profiler.stage("aggregate_transactions", rows=len(valid_transactions)):
+                aggregates = aggregate_transactions(
+                    valid_transactions,
+                    approximate=sketch_options is not None,
+                    **(sketch_options or {})
+                )
+        for name in ANALYTICS:
+            with profiler.stage(name, rows=len(valid_transactions)):
+                getattr(aggregates, name)()
+        # Per-region and per-product daily series for the rolling report sections
+        daily_groups = None
+        if uses_input("daily_groups", report_sections):
+            with profiler.stage("daily_groups", rows=len(valid_transactions)):
+                daily_groups = DailyGroups().update(valid_transactions)
         print("✓ Analysis complete")
 
         # [6/10] Fetch API data
         print("\n[6/10] Fetching product data from API...")
-        api_products = fetch_all_products()
+        cache_options = {"ttl": catalog_ttl} if catalog_ttl is not None else {}
+        with profiler.stage("fetch_products") as stage:
+            api_products, catalog_cache = fetch_cached_products(offline=offline, **cache_options)
+            stage["rows"] = len(api_products)
         print(f"✓ Fetched {len(api_products)} products")
 
         # [7/10] Enrich sales data
         print("\n[7/10] Enriching sales data...")
-        product_mapping = create_product_mapping(api_products)
-        enriched_transactions = enrich_sales_data(valid_transactions, product_mapping)
+        with profiler.stage("enrich_sales_data", rows=len(valid_transactions)):
+            product_mapping = create_product_mapping(api_products)
+            enriched_transactions = enrich_sales_data(valid_transactions, product_mapping)
 
         enriched_count = sum(1 for t in enriched_transactions if t["API_Match"])
         success_rate = (enriched_count / len(enriched_transactions)) * 100 if enriched_transactions else 0
@@ -97,12 +463,19 @@ def main():
 
         # [8/10] Save enriched data
         print("\n[8/10] Saving enriched data...")
-        save_enriched_data(enriched_transactions)
-        print("✓ Saved to: data/enriched_sales_data.txt")
+        with profiler.stage("save_enriched_data", rows=len(enriched_transactions)):
+            write_stats = save_enriched_data(enriched_transactions, enriched_output)
+        print(f"✓ Saved to: {enriched_output} "
+              f"({write_stats['rows_per_sec']:,.0f} rows/s, {write_stats['mb_per_sec']:.1f} MB/s)")
 
         # [9/10] Generate report
         print("\n[9/10] Generating report...")
-        generate_sales_report(valid_transactions, enriched_transactions)
+        with profiler.stage("generate_sales_report", rows=len(valid_transactions)):
+            generate_sales_report(
+                valid_transactions, enriched_transactions,
+                aggregates=aggregates, catalog_cache=catalog_cache,
+                daily_groups=daily_groups, windows=windows, sections=report_sections
+            )
         print("✓ Report saved to: output/sales_report.txt")
 
         # [10/10] Done
@@ -111,8 +484,233 @@ def main():
 
     except Exception as e:
         print("\n❌ An error occurred:")
+        failed = [r["stage"] for r in profiler.records if r["status"] == "error"]
+        if failed:
+            print(f"Stage: {failed[-1]}")
         print(str(e))
 
+    return profiler
+
+
+def positive_int(text):
+    try:
+        value = int(text)
+    except ValueError:
+        value = 0
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"expected a positive integer, got '{text}'")
+    return value
+
+
+def parse_windows(text):
+    """
+    "7,30" -> (7, 30)
+    """
+    try:
+        windows = tuple(sorted({int(part) for part in text.split(",") if part.strip()}))
+    except ValueError:
+        windows = ()
+    if not windows or windows[0] < 1:
+        raise argparse.ArgumentTypeError(f"expected comma-separated positive day counts, got '{text}'")
+    return windows
+
+
+def parse_date(text):
+    """
+    "2024-12-01" -> "2024-12-01", rejecting anything that is not a calendar date
+    """
+    try:
+        return Date.fromisoformat(text).isoformat()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a YYYY-MM-DD date, got '{text}'")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Sales Analytics System")
+    parser.add_argument("--input", nargs="+", default=["data/sales_data.txt"], metavar="FILE",
+                        help="sales file(s) to process; several files (or saved partials, *.json) "
+                             "are aggregated independently and merged into one report")
+    parser.add_argument("--save-partial", default=None, metavar="FILE",
+                        help="save the mergeable partial aggregate of the inputs (.json) for a later merge")
+    parser.add_argument("--stream", action="store_true",
+                        help="single lazy pass into the aggregates (no rows kept; no filters or enrichment)")
+    parser.add_argument("--no-snapshot", action="store_true",
+                        help="always parse the sales file; do not load or save the parsed-data snapshot")
+    parser.add_argument("--async", dest="run_async", action="store_true",
+                        help="overlap the catalog fetch with ingestion and analytics (no filter prompt)")
+    parser.add_argument("--quarantine", default=None, metavar="FILE",
+                        help="write rejected rows, prefixed with the validation rules they failed, to FILE")
+    parser.add_argument("--mmap", action="store_true",
+                        help="memory-map the sales file and parse it block by block")
+    parser.add_argument("--workers", type=positive_int, default=None,
+                        help="parse the sales file in parallel with this many worker processes")
+    parser.add_argument("--columnar", action="store_true",
+                        help="compute the analytics from a NumPy columnar table with vectorized group-bys")
+    parser.add_argument("--cube-report", action="store_true",
+                        help="report from the persisted rollup cube (use with --start-date/--end-date)")
+    parser.add_argument("--start-date", type=parse_date, default=None,
+                        help="first date (YYYY-MM-DD, inclusive) of a --cube-report")
+    parser.add_argument("--end-date", type=parse_date, default=None,
+                        help="last date (YYYY-MM-DD, inclusive) of a --cube-report")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only process lines appended since the last run")
+    parser.add_argument("--watch", action="store_true",
+                        help="keep running: follow appends to the input and keep the report current")
+    parser.add_argument("--debounce", type=float, default=DEBOUNCE_SECONDS, metavar="SECONDS",
+                        help="watch mode: rewrite the report after this many quiet seconds")
+    parser.add_argument("--max-report-delay", type=float, default=MAX_REPORT_DELAY, metavar="SECONDS",
+                        help="watch mode: rewrite the report at least this often while rows keep arriving")
+    parser.add_argument("--poll", action="store_true",
+                        help="watch mode: poll the file instead of using inotify")
+    parser.add_argument("--poll-interval", type=float, default=POLL_INTERVAL, metavar="SECONDS",
+                        help="watch mode: seconds between polls")
+    parser.add_argument("--log-interval", type=float, default=LOG_INTERVAL, metavar="SECONDS",
+                        help="watch mode: seconds between throughput log lines")
+    parser.add_argument("--offline", action="store_true",
+                        help="use the cached product catalog only, never the network")
+    parser.add_argument("--catalog-ttl", type=float, default=None,
+                        help="seconds before the cached product catalog is revalidated")
+    parser.add_argument("--enriched-output", default="data/enriched_sales_data.txt",
+                        help="enriched data file; .gz, .zst or .col selects a compressed/binary format")
+    parser.add_argument("--no-prompt", action="store_true",
+                        help="run without asking for filters")
+    parser.add_argument("--filter", action="append", default=[], metavar="SPEC",
+                        help="batch filter, e.g. region=North,min=1000,max=50000,from=2024-12-01,to=2024-12-15,name=north "
+                             "(repeatable; one report per filter)")
+    parser.add_argument("--filters-file", default=None,
+                        help="batch filters from a JSON list or a text file with one spec per line")
+    parser.add_argument("--batch-output-dir", default=BATCH_OUTPUT_DIR,
+                        help="directory for batch reports")
+    parser.add_argument("--report-sections", default=None,
+                        help="comma-separated report sections to include (default: all), e.g. summary,regions")
+    parser.add_argument("--rolling-windows", type=parse_windows, default=DEFAULT_WINDOWS, metavar="DAYS",
+                        help="comma-separated rolling window sizes in days (default: 7,30)")
+    parser.add_argument("--approximate", action="store_true",
+                        help="bounded-memory customer analytics using sketches (figures marked ~)")
+    parser.add_argument("--hll-error", type=float, default=DEFAULT_HLL_ERROR,
+                        help="relative standard error of approximate unique counts")
+    parser.add_argument("--heavy-hitter-error", type=float, default=DEFAULT_HEAVY_HITTER_ERROR,
+                        help="max overestimate of top-customer figures, as a share of the total")
+    parser.add_argument("--confidence", type=float, default=DEFAULT_CONFIDENCE,
+                        help="probability the Count-Min order counts stay within their bound")
+    parser.add_argument("--metrics", default=None,
+                        help="write per-stage metrics to this file (.prom for Prometheus text, else JSON)")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="record tracemalloc deltas and peaks per stage")
+    parser.add_argument("--profile", default="",
+                        help="comma-separated stages to profile, or 'all'")
+    parser.add_argument("--profile-mode", choices=["cprofile", "sample"], default="cprofile",
+                        help="deterministic cProfile or low-overhead stack sampling")
+    args = parser.parse_args()
+
+    if args.columnar and args.approximate:
+        parser.error("--columnar computes exact analytics and cannot be combined with --approximate")
+    if args.columnar and args.stream:
+        parser.error("--columnar builds a table of the rows, which --stream never keeps")
+    if args.columnar and columnar.np is None:
+        parser.error("--columnar requires numpy")
+    if args.filter or args.filters_file:
+        for flag, used in (("--async", args.run_async), ("--stream", args.stream),
+                           ("--approximate", args.approximate), ("--columnar", args.columnar)):
+            if used:
+                parser.error(f"--filter/--filters-file write exact per-filter reports and cannot be combined with {flag}")
+
+    if (args.start_date or args.end_date) and not args.cube_report:
+        parser.error("--start-date/--end-date select the range of a --cube-report")
+    if args.start_date and args.end_date and args.start_date > args.end_date:
+        parser.error(f"--start-date {args.start_date} is after --end-date {args.end_date}")
+
+    # Modes other than the default run, --stream and batch reports, in dispatch order
+    mode = next((name for name, used in (
+        ("multi-file input", len(args.input) > 1 or args.save_partial or args.input[0].endswith(PARTIAL_SUFFIX)),
+        ("--incremental", args.incremental),
+        ("--watch", args.watch),
+        ("--cube-report", args.cube_report),
+        ("--async", args.run_async)
+    ) if used), None)
+    if mode is not None:
+        if args.columnar:
+            parser.error(f"--columnar only applies to the default run, not {mode}")
+        if args.metrics or args.profile or args.trace_memory:
+            parser.error(f"--metrics, --profile and --trace-memory record the stages of the default, "
+                         f"--stream and batch runs, not {mode}")
+        if args.filter or args.filters_file:
+            parser.error(f"--filter/--filters-file cannot be combined with {mode}")
+
+    if args.report_sections:
+        unknown = [name for name in args.report_sections.split(",") if name and name not in SECTIONS]
+        if unknown:
+            parser.error(f"unknown report sections: {', '.join(unknown)} (available: {', '.join(SECTIONS)})")
+    return args
+
 
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+
+    specs = [parse_filter_spec(spec) for spec in args.filter]
+    if args.filters_file:
+        specs.extend(load_filter_specs(args.filters_file))
+
+    filename = args.input[0]
+
+    sketch_options = {
+        "hll_error": args.hll_error,
+        "heavy_hitter_error": args.heavy_hitter_error,
+        "confidence": args.confidence
+    } if args.approximate else None
+
+    report_sections = args.report_sections.split(",") if args.report_sections else None
+
+    if len(args.input) > 1 or args.save_partial or filename.endswith(PARTIAL_SUFFIX):
+        run_partials(args.input, workers=args.workers, partial_output=args.save_partial,
+                     sketch_options=sketch_options, quarantine_file=args.quarantine,
+                     report_sections=report_sections, windows=args.rolling_windows)
+    elif args.incremental:
+        run_incremental(filename, sketch_options=sketch_options, quarantine_file=args.quarantine,
+                        report_sections=report_sections, windows=args.rolling_windows)
+    elif args.watch:
+        run_watch(filename, debounce=args.debounce, max_delay=args.max_report_delay,
+                  use_inotify=not args.poll, poll_interval=args.poll_interval,
+                  log_interval=args.log_interval, sketch_options=sketch_options,
+                  windows=args.rolling_windows, quarantine_file=args.quarantine,
+                  report_sections=report_sections)
+    elif args.cube_report:
+        run_cube_report(args.start_date, args.end_date, filename, windows=args.rolling_windows,
+                        quarantine_file=args.quarantine, report_sections=report_sections)
+    elif args.run_async:
+        run_async_pipeline(filename, offline=args.offline, catalog_ttl=args.catalog_ttl,
+                           enriched_output=args.enriched_output, use_snapshot=not args.no_snapshot,
+                           sketch_options=sketch_options, quarantine_file=args.quarantine,
+                           report_sections=report_sections, windows=args.rolling_windows)
+    else:
+        profiler = PipelineProfiler(
+            trace_memory=args.trace_memory,
+            profile_stages=[s for s in args.profile.split(",") if s],
+            profile_mode=args.profile_mode
+        )
+
+        if specs:
+            run_batch_reports(specs, output_dir=args.batch_output_dir, filename=filename,
+                              offline=args.offline, catalog_ttl=args.catalog_ttl,
+                              use_snapshot=not args.no_snapshot, quarantine_file=args.quarantine,
+                              workers=args.workers, use_mmap=args.mmap,
+                              report_sections=report_sections, windows=args.rolling_windows,
+                              profiler=profiler)
+        elif args.stream:
+            run_stream(filename, sketch_options=sketch_options, quarantine_file=args.quarantine,
+                       report_sections=report_sections, windows=args.rolling_windows, profiler=profiler,
+                       offline=args.offline, catalog_ttl=args.catalog_ttl,
+                       enriched_output=args.enriched_output)
+        else:
+            main(workers=args.workers, use_mmap=args.mmap, use_columnar=args.columnar,
+                 report_sections=report_sections,
+                 offline=args.offline, catalog_ttl=args.catalog_ttl,
+                 enriched_output=args.enriched_output, profiler=profiler, filename=filename,
+                 use_snapshot=not args.no_snapshot, quarantine_file=args.quarantine,
+                 prompt=not args.no_prompt, windows=args.rolling_windows,
+                 sketch_options=sketch_options)
+
+        if args.metrics:
+            profiler.write(args.metrics)
+            print(profiler.summary())
+            print(f"Metrics written to {args.metrics}")
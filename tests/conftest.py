@@ -0,0 +1,37 @@
+import os
+import random
+import sys
+
+import pytest
+
+# The utils/ modules are imported from the repository root, as main.py does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.records import Transaction  # noqa: E402
+
+REGIONS = ["North", "South", "East", "West"]
+PRODUCTS = ["Laptop", "Mouse", "Keyboard", "Monitor", "USB Cable", "Webcam"]
+
+
+def make_transactions(count, seed=7, days=40):
+    """
+    Valid transactions on random dates in December 2024 and January 2025,
+    with repeated customers so every group has several members
+    """
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        day = rng.randrange(days)
+        date = f"2024-12-{day + 1:02d}" if day < 31 else f"2025-01-{day - 30:02d}"
+        product = rng.randrange(len(PRODUCTS))
+        rows.append(Transaction(
+            f"T{i:05d}", date, f"P{product + 101}", PRODUCTS[product],
+            rng.randint(1, 9), round(rng.uniform(10, 5000), 2),
+            f"C{rng.randrange(60):03d}", rng.choice(REGIONS)
+        ))
+    return rows
+
+
+@pytest.fixture
+def transactions():
+    return make_transactions(600)
@@ -0,0 +1,77 @@
+import json
+
+import pytest
+
+from utils.aggregator import SalesAggregates, aggregate_transactions, aggregates_from_dict
+from utils.records import Transaction
+from utils.rolling import DailyGroups
+
+
+def state(aggregates):
+    """
+    Comparable form of the aggregates, key order included
+    """
+    return json.dumps(aggregates.to_dict())
+
+
+@pytest.mark.parametrize("cuts", [(0, 600), (200, 400), (0, 1), (599, 600)])
+def test_merge_of_consecutive_parts_equals_one_pass(transactions, cuts):
+    a, b = cuts
+    parts = [transactions[:a], transactions[a:b], transactions[b:]]
+
+    merged = SalesAggregates()
+    for part in parts:
+        merged.merge(aggregate_transactions(part))
+
+    assert state(merged) == state(aggregate_transactions(transactions))
+
+
+def test_merge_leaves_other_unchanged(transactions):
+    other = aggregate_transactions(transactions[300:])
+    before = state(other)
+
+    aggregate_transactions(transactions[:300]).merge(other)
+
+    assert state(other) == before
+
+
+def test_approximate_merge_matches_one_pass_sketches(transactions):
+    one_pass = aggregate_transactions(transactions, approximate=True)
+    merged = aggregate_transactions(transactions[:250], approximate=True)
+    merged.merge(aggregate_transactions(transactions[250:], approximate=True))
+
+    # Exact parts are exact; HyperLogLog and Count-Min merges are lossless
+    assert merged.regions == one_pass.regions
+    assert merged.products == one_pass.products
+    assert merged.daily_sales_trend() == one_pass.daily_sales_trend()
+    assert merged.customer_orders.table == one_pass.customer_orders.table
+
+
+def test_merge_rejects_mixed_modes(transactions):
+    with pytest.raises(ValueError):
+        aggregate_transactions(transactions).merge(aggregate_transactions(transactions, approximate=True))
+
+
+@pytest.mark.parametrize("approximate", [False, True])
+def test_to_dict_round_trip(transactions, approximate):
+    aggregates = aggregate_transactions(transactions, approximate=approximate)
+    restored = aggregates_from_dict(json.loads(state(aggregates)))
+
+    assert type(restored) is type(aggregates)
+    assert state(restored) == state(aggregates)
+
+
+def test_fingerprint_tracks_set_members():
+    def rows(*specs):
+        return [Transaction(f"T{i}", date, "P1", product, 1, 10.0, cid, "North")
+                for i, (date, product, cid) in enumerate(specs)]
+
+    # Same totals, counts, set sizes and insertion orders; only who bought
+    # what (and on which day) differs
+    a = rows(("2024-12-01", "Laptop", "C3"), ("2024-12-02", "Mouse", "C4"),
+             ("2024-12-01", "Laptop", "C1"), ("2024-12-02", "Mouse", "C2"))
+    b = rows(("2024-12-01", "Laptop", "C3"), ("2024-12-02", "Mouse", "C4"),
+             ("2024-12-01", "Laptop", "C2"), ("2024-12-02", "Mouse", "C1"))
+
+    assert aggregate_transactions(a).fingerprint() != aggregate_transactions(b).fingerprint()
+    assert DailyGroups().update(a).fingerprint() != DailyGroups().update(b).fingerprint()
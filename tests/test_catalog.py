@@ -0,0 +1,115 @@
+import json
+
+import pytest
+
+from utils import catalog_cache
+from utils.catalog_cache import load_cached_catalog, wait_for_revalidation
+from utils.catalog_client import CatalogClient
+from utils.stub_catalog_server import start_stub_server, make_products
+
+
+@pytest.fixture
+def stub():
+    server, base_url = start_stub_server(make_products(250))
+    yield server, base_url
+    server.shutdown()
+    server.server_close()
+
+
+def requests_made(server):
+    return server.state["requests"]
+
+
+def test_client_pages_through_the_catalog(stub):
+    server, base_url = stub
+
+    with CatalogClient(base_url, page_size=40, max_workers=3) as client:
+        products = client.fetch_all_products()
+
+    assert products == make_products(250)
+    assert requests_made(server) == 7  # ceil(250 / 40) pages
+
+
+def test_client_follows_a_capped_page_size(stub):
+    server, base_url = stub
+
+    # The stub caps pages at 100 products; the remaining pages use that size
+    with CatalogClient(base_url, page_size=500) as client:
+        assert client.fetch_all_products() == make_products(250)
+
+    assert requests_made(server) == 3
+
+
+def test_client_retries_transient_failures(stub):
+    server, base_url = stub
+    server.state["fail_next"] = 2
+
+    with CatalogClient(base_url, retries=2, backoff=0) as client:
+        assert client.fetch_product(3)["id"] == 3
+
+    assert requests_made(server) == 3
+
+
+def test_cache_hit_revalidation_and_change(stub, tmp_path):
+    server, base_url = stub
+    cache_file = str(tmp_path / "catalog.json")
+    client = CatalogClient(base_url, backoff=0)
+
+    def load(**options):
+        return load_cached_catalog(client, cache_file, **options)
+
+    products, info = load()
+    assert (info["status"], len(products)) == ("miss", 250)
+    fetched = requests_made(server)
+
+    # Fresh: no request at all
+    products, info = load()
+    assert (info["status"], len(products), requests_made(server)) == ("hit", 250, fetched)
+
+    # Expired, catalog unchanged: one conditional request answered 304
+    products, info = load(ttl=0, stale_ttl=0)
+    assert (info["status"], len(products), requests_made(server)) == ("revalidated", 250, fetched + 1)
+
+    # Expired, catalog changed: the ETag no longer matches and it is downloaded again
+    server.state["products"] = make_products(120)
+    products, info = load(ttl=0, stale_ttl=0)
+    assert (info["status"], products) == ("miss", make_products(120))
+
+    # Server down: the cached copy is served
+    server.state["fail_next"] = 10
+    products, info = load(ttl=0, stale_ttl=0)
+    assert (info["status"], len(products)) == ("stale-error", 120)
+    assert (info["hits"], info["misses"]) == (3, 2)
+
+    client.close()
+
+
+def test_stale_copy_is_revalidated_in_a_daemon_thread(stub, tmp_path):
+    server, base_url = stub
+    cache_file = str(tmp_path / "catalog.json")
+
+    with CatalogClient(base_url, backoff=0) as client:
+        load_cached_catalog(client, cache_file)
+        with open(cache_file, encoding="utf-8") as f:
+            fetched_at = json.load(f)["fetched_at"]
+
+        # A slow catalog API: the stale copy is served at once, and the
+        # revalidation still running would not keep the process alive
+        server.state["latency"] = 0.5
+        products, info = load_cached_catalog(client, cache_file, ttl=0)
+        assert (info["status"], len(products)) == ("stale", 250)
+        assert catalog_cache._revalidation_thread.daemon
+        assert not wait_for_revalidation(timeout=0.01)
+
+        assert wait_for_revalidation(timeout=10)
+        with open(cache_file, encoding="utf-8") as f:
+            assert json.load(f)["fetched_at"] > fetched_at
+
+
+def test_offline_never_touches_the_network(stub, tmp_path):
+    server, base_url = stub
+
+    with CatalogClient(base_url) as client:
+        products, info = load_cached_catalog(client, str(tmp_path / "catalog.json"), offline=True)
+
+    assert (products, info["status"], requests_made(server)) == ([], "offline-miss", 0)
@@ -0,0 +1,18 @@
+from utils.file_handler import iter_sales_data
+from utils.mmap_reader import iter_mmap_lines
+
+HEADER = "TransactionID|Date|ProductID|ProductName|Quantity|UnitPrice|CustomerID|Region\n"
+
+
+def test_bytes_past_the_sniffed_prefix_fall_back_to_latin1(tmp_path, capsys):
+    # 64 KB of plain UTF-8 lines, so detect_encoding() settles on utf-8
+    body = "".join(f"T{i:05d}|2024-12-01|P101|Laptop|1|100|C001|North\n" for i in range(1500))
+    path = tmp_path / "sales.txt"
+    path.write_bytes((HEADER + body).encode("utf-8") + "T99999|2024-12-02|P102|Café|1|100|C002|South\n".encode("latin-1"))
+
+    for read in (iter_sales_data, iter_mmap_lines):
+        lines = list(read(str(path)))
+
+        assert len(lines) == 1501
+        assert lines[-1] == "T99999|2024-12-02|P102|Café|1|100|C002|South"
+        assert "1 byte(s)" in capsys.readouterr().out
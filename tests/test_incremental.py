@@ -0,0 +1,103 @@
+import io
+
+from utils.aggregator import SalesAggregates, aggregate_transactions
+from utils.data_processor import iter_transactions
+from utils.incremental import read_appended
+from utils.validation import ValidationReport, FIELD_COUNT, NUMBER_FORMAT
+
+HEADER = "TransactionID|Date|ProductID|ProductName|Quantity|UnitPrice|CustomerID|Region\n"
+LINES = [
+    "T001|2024-12-01|P101|Laptop|2|45,000|C001|North\n",
+    "T002|2024-12-01|P102|Mouse|5|500|C002|South\n",
+    "X003|2024-12-02|P103|Keyboard|1|1500|C001|East\n",   # invalid: TransactionID
+    "T004|2024-12-03|P101|Laptop|1|45000|C003|West\n",
+    "\n",
+    "T005|2024-12-03|P104|Monitor|3|12000|C002|North\n",
+]
+
+
+def append(path, text):
+    with open(path, "ab") as f:
+        f.write(text.encode("utf-8"))
+
+
+def test_read_appended_over_growing_file(tmp_path):
+    path = tmp_path / "sales.txt"
+    body = "".join(LINES)
+    # Grow the file in steps that cut lines (and the header) mid-way
+    steps = [HEADER[:20], HEADER[20:] + LINES[0] + LINES[1][:9], LINES[1][9:] + LINES[2],
+             LINES[3][:-1], "\n" + LINES[4] + LINES[5][:30], LINES[5][30:]]
+
+    aggregates = SalesAggregates()
+    offset = None
+    parsed = invalid = 0
+    offsets = []
+
+    for step in steps:
+        append(path, step)
+        offset, new_parsed, new_invalid = read_appended(str(path), "utf-8", offset, aggregates)
+        parsed += new_parsed
+        invalid += new_invalid
+        offsets.append(offset)
+
+        # Never past the last complete line: a trailing partial line waits,
+        # and nothing is read before the header line is complete
+        content = path.read_bytes()
+        if offset is None:
+            assert b"\n" not in content
+        else:
+            assert content[:offset].endswith(b"\n")
+            assert b"\n" not in content[offset:]
+
+    assert offsets[-1] == len(HEADER) + len(body)
+    assert (parsed, invalid) == (5, 1)
+
+    expected = aggregate_transactions(
+        t for t in iter_transactions(line.strip() for line in LINES) if t.transaction_id.startswith("T")
+    )
+    assert aggregates.to_dict() == expected.to_dict()
+
+
+def test_read_appended_trailing_partial_line(tmp_path):
+    path = tmp_path / "sales.txt"
+    path.write_text(HEADER + LINES[0] + LINES[1][:12], encoding="utf-8")
+
+    aggregates = SalesAggregates()
+    offset, parsed, invalid = read_appended(str(path), "utf-8", None, aggregates)
+
+    assert (offset, parsed, invalid) == (len(HEADER) + len(LINES[0]), 1, 0)
+    assert aggregates.transaction_count == 1
+
+    append(path, LINES[1][12:])
+    offset, parsed, invalid = read_appended(str(path), "utf-8", offset, aggregates)
+
+    assert (parsed, aggregates.transaction_count) == (1, 2)
+    assert offset == path.stat().st_size
+
+
+def test_read_appended_counts_malformed_lines(tmp_path):
+    path = tmp_path / "sales.txt"
+    path.write_text(HEADER + LINES[0] + "T009|2024-12-01|P101\n" + "T010|2024-12-01|P101|Laptop|x|1|C1|North\n"
+                    + LINES[2], encoding="utf-8")
+    report = ValidationReport()
+    quarantine = io.StringIO()
+
+    _, parsed, invalid = read_appended(str(path), "utf-8", None, SalesAggregates(),
+                                       report=report, quarantine=quarantine)
+
+    assert (parsed, invalid) == (4, 3)
+    assert report.by_rule == {FIELD_COUNT: 1, NUMBER_FORMAT: 1, "transaction_id_prefix": 1}
+    assert quarantine.getvalue().splitlines()[0] == f"{FIELD_COUNT}\tT009|2024-12-01|P101"
+
+
+def test_read_appended_limit(tmp_path):
+    path = tmp_path / "sales.txt"
+    path.write_text(HEADER + "".join(LINES), encoding="utf-8")
+
+    aggregates = SalesAggregates()
+    offset, parsed, _ = read_appended(str(path), "utf-8", None, aggregates, limit=2)
+    assert parsed == 2
+
+    offset, parsed, _ = read_appended(str(path), "utf-8", offset, aggregates)
+    assert parsed == 3
+    assert offset == path.stat().st_size
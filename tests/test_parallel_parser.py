@@ -0,0 +1,48 @@
+import io
+
+import pytest
+
+from utils.data_processor import parse_transactions
+from utils.file_handler import read_sales_data
+from utils.parallel_parser import parallel_parse_transactions, parallel_validate
+from utils.validation import VALIDATION_RULES
+
+HEADER = "TransactionID|Date|ProductID|ProductName|Quantity|UnitPrice|CustomerID|Region"
+MALFORMED = [
+    "X0001|2024-12-01|P101|Laptop|1|100|C001|North",   # transaction_id_prefix
+    "T0002|2024-12-01|P101",                            # field_count
+    "T0003|2024-12-01|P101|Laptop|two|100|C001|North",  # number_format
+    "T0004|2024-12-01|P101|Laptop,Pro|1|1,500|C001|",   # region_present; commas stripped
+]
+
+
+@pytest.fixture(params=["\n", "\r\n", "\r"], ids=["lf", "crlf", "cr"])
+def sales_file(request, tmp_path, transactions):
+    lines = ["|".join(str(v) for v in t.to_tuple()) for t in transactions]
+    # Spread the malformed lines so they land in different chunks
+    for i, line in enumerate(MALFORMED):
+        lines.insert(i * 150 + 7, line)
+    path = tmp_path / "sales.txt"
+    path.write_bytes(request.param.join([HEADER] + lines + [""]).encode("utf-8"))
+    return str(path)
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_parallel_parse_equals_serial(sales_file, workers):
+    parallel = parallel_parse_transactions(sales_file, workers=workers)
+    serial = parse_transactions(read_sales_data(sales_file))
+
+    assert [t.to_tuple() for t in parallel] == [t.to_tuple() for t in serial]
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_parallel_validate_equals_serial(sales_file, workers):
+    parallel_quarantine, serial_quarantine = io.StringIO(), io.StringIO()
+
+    valid, report = parallel_validate(sales_file, workers=workers, quarantine=parallel_quarantine)
+    expected, expected_report = VALIDATION_RULES.validate_lines(read_sales_data(sales_file), serial_quarantine)
+
+    assert [t.to_tuple() for t in valid] == [t.to_tuple() for t in expected]
+    assert report.to_dict() == expected_report.to_dict()
+    assert report.rejected == len(MALFORMED)
+    assert parallel_quarantine.getvalue() == serial_quarantine.getvalue()
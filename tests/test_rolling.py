@@ -0,0 +1,114 @@
+from datetime import date as Date, timedelta
+
+import pytest
+
+from utils.aggregator import aggregate_transactions
+from utils.money import to_rupees
+from utils.rolling import RollingWindows, DailyGroups, rolling_metrics
+
+
+def brute_force(daily, windows):
+    """
+    Every window recomputed from scratch over the calendar days it spans
+    """
+    first, last = Date.fromisoformat(min(daily)), Date.fromisoformat(max(daily))
+    dates = [(first + timedelta(days=i)).isoformat() for i in range((last - first).days + 1)]
+
+    result = {}
+    for i, date in enumerate(dates):
+        revenue, count, customers = daily.get(date, (0, 0, set()))
+        previous = daily.get(dates[i - 1], (0,))[0] if i else None
+
+        metrics = {
+            "revenue": to_rupees(revenue),
+            "transaction_count": count,
+            "unique_customers": len(customers),
+            "growth": (revenue - previous) / previous if previous else None,
+            "windows": {}
+        }
+        for w in windows:
+            span = [d for d in dates[max(i - w + 1, 0):i + 1]]
+            entries = [daily[d] for d in span if d in daily]
+            peak_date, peak_revenue = None, 0
+            for d in span:
+                if d in daily and daily[d][0] > peak_revenue:
+                    peak_date, peak_revenue = d, daily[d][0]
+            metrics["windows"][w] = {
+                "revenue": to_rupees(sum(e[0] for e in entries)),
+                "transaction_count": sum(e[1] for e in entries),
+                "unique_customers": len(set().union(*(e[2] for e in entries))),
+                "peak_day": (peak_date, to_rupees(peak_revenue)) if peak_revenue > 0 else (None, 0)
+            }
+        result[date] = metrics
+    return result
+
+
+def test_rolling_metrics_matches_brute_force(transactions):
+    daily = aggregate_transactions(transactions).daily
+    windows = (1, 3, 7, 30)
+
+    assert rolling_metrics(daily, windows) == brute_force(daily, windows)
+
+
+def test_rolling_metrics_fills_calendar_gaps():
+    daily = {
+        "2024-12-01": [10000, 2, {"C1", "C2"}],
+        "2024-12-04": [30000, 1, {"C2"}],
+        "2024-12-05": [5000, 1, {"C3"}],
+    }
+    result = rolling_metrics(daily, (2, 7))
+
+    assert list(result) == ["2024-12-01", "2024-12-02", "2024-12-03", "2024-12-04", "2024-12-05"]
+    assert result == brute_force(daily, (2, 7))
+    assert result["2024-12-03"]["windows"][2]["peak_day"] == (None, 0)
+    assert result["2024-12-05"]["windows"][7]["unique_customers"] == 3
+
+
+def test_rolling_metrics_skips_days_no_window_reaches():
+    daily = {
+        "2020-01-01": [10000, 1, {"C1"}],
+        "2020-01-03": [20000, 2, {"C1", "C2"}],
+        "2024-12-01": [30000, 1, {"C2"}],
+        "2024-12-02": [5000, 1, {"C3"}],
+    }
+    result = rolling_metrics(daily, (2, 7))
+    expected = brute_force(daily, (2, 7))
+
+    # Up to 7 days after each day with sales; every day left out is empty
+    assert list(result)[:10] == [f"2020-01-{d:02d}" for d in range(1, 11)]
+    assert list(result)[10:] == ["2024-12-01", "2024-12-02"]
+    assert result == {d: expected[d] for d in result}
+    empty = expected["2020-01-11"]
+    assert all(expected[d] == empty for d in expected if d not in result)
+
+
+def test_rolling_metrics_outlier_date_stays_small():
+    daily = {"0001-01-01": [10000, 1, {"C1"}], "2024-12-01": [30000, 1, {"C2"}]}
+    result = rolling_metrics(daily, (7, 30))
+
+    assert len(result) == 32
+    assert result["2024-12-01"]["windows"][30]["unique_customers"] == 1
+    assert result["2024-12-01"]["growth"] is None
+
+
+def test_group_series_match_brute_force(transactions):
+    groups = DailyGroups().update(transactions)
+    rolling = groups.rolling("region", (7,))
+
+    for region, series in groups.regions.items():
+        expected = brute_force(series, (7,))
+        # Groups share the calendar of all regions; compare the days both cover
+        assert {d: rolling[region][d] for d in expected} == expected
+
+
+def test_latest_matches_the_full_series(transactions):
+    groups = DailyGroups().update(transactions)
+    full = groups.rolling("product", (3, 7))
+    as_of, latest = groups.latest("product", (3, 7))
+
+    assert latest == {product: metrics[as_of] for product, metrics in full.items()}
+
+
+def test_rejects_invalid_windows():
+    with pytest.raises(ValueError):
+        RollingWindows((0, 7))
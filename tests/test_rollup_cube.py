@@ -0,0 +1,65 @@
+import json
+
+from utils.aggregator import aggregate_transactions
+from utils.rolling import DailyGroups
+from utils.rollup_cube import SalesCube, build_cube
+from utils.sketches import HyperLogLog
+
+
+def test_cube_range_matches_raw_rows(transactions):
+    cube = build_cube(transactions)
+    start, end = "2024-12-05", "2024-12-20"
+    expected = aggregate_transactions(t for t in transactions if start <= t.date <= end)
+    aggregates = cube.to_aggregates(start, end)
+
+    # Exact figures, in the same key order
+    assert aggregates.total_paise == expected.total_paise
+    assert list(aggregates.region_wise_sales().items()) == list(expected.region_wise_sales().items())
+    assert aggregates.top_selling_products() == expected.top_selling_products()
+    assert aggregates.find_peak_sales_day() == expected.find_peak_sales_day()
+
+    # Distinct customers come from the per-cell sketches
+    for date, day in aggregates.daily_sales_trend().items():
+        assert abs(day["unique_customers"] - len(expected.daily[date][2])) <= 1
+    assert aggregates.top_customers() == []
+
+
+def test_cube_keeps_no_customer_key(transactions):
+    cube = build_cube(transactions)
+
+    cells = sum(len(day) for day in cube.cells.values())
+    assert cells == len({(t.date, t.region, t.product_name) for t in transactions})
+    assert all(len(key) == 2 for day in cube.cells.values() for key in day)
+
+
+def test_cube_round_trip(transactions):
+    cube = build_cube(transactions)
+    restored = SalesCube.from_dict(json.loads(json.dumps(cube.to_dict())))
+
+    assert restored.fingerprint() == cube.fingerprint()
+    assert restored.rollups == cube.rollups
+    assert restored.to_aggregates().daily_sales_trend() == cube.to_aggregates().daily_sales_trend()
+
+
+def test_groups_from_cube_match_raw_rows(transactions):
+    groups = DailyGroups.from_cube(build_cube(transactions))
+    expected = DailyGroups().update(transactions)
+
+    as_of, latest = groups.latest("region", (7,))
+    expected_as_of, expected_latest = expected.latest("region", (7,))
+    assert as_of == expected_as_of
+    for region, metrics in expected_latest.items():
+        window, expected_window = latest[region]["windows"][7], metrics["windows"][7]
+        assert window["revenue"] == expected_window["revenue"]
+        assert abs(window["unique_customers"] - expected_window["unique_customers"]) <= 1
+
+
+def test_dense_merge_is_register_max():
+    a, b = HyperLogLog(0.05), HyperLogLog(0.05)
+    for i in range(300):
+        a.add(f"C{i}")
+        b.add(f"C{i + 150}")
+    assert a.dense is not None and b.dense is not None
+
+    expected = bytearray(map(max, a.dense, b.dense))
+    assert a.merge(b).dense == expected
@@ -0,0 +1,60 @@
+import hashlib
+import os
+
+from utils import snapshot
+from utils.ingest import ingest_sales
+from utils.snapshot import snapshot_source
+
+HEADER = "TransactionID|Date|ProductID|ProductName|Quantity|UnitPrice|CustomerID|Region\n"
+
+
+def rows(ingested):
+    return [t.to_tuple() for t in ingested.valid]
+
+
+def test_snapshot_is_reused_until_the_input_changes(tmp_path, transactions):
+    path = tmp_path / "sales.txt"
+    snapshots = str(tmp_path / "snapshots")
+    body = "".join("|".join(str(v) for v in t.to_tuple()) + "\n" for t in transactions)
+    path.write_text(HEADER + body + "X001|2024-12-01|P101|Laptop|1|100|C001|North\n", encoding="utf-8")
+
+    def ingest(**options):
+        return ingest_sales(str(path), snapshot_dir=snapshots, **options)
+
+    first = ingest()
+    again = ingest()
+    assert (first.source, again.source) == ("text", "snapshot")
+    assert rows(again) == rows(first)
+    assert again.invalid == first.invalid == 1
+
+    # Appended rows: re-parsed, and the new snapshot is used next time
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("T9999|2024-12-31|P101|Laptop|1|100|C001|North\n")
+    grown = ingest()
+    assert grown.source == "text"
+    assert len(grown.valid) == len(first.valid) + 1
+    assert ingest().source == "snapshot"
+
+    # Same size and mtime, one byte different: caught by the content hash
+    stat = os.stat(path)
+    content = path.read_bytes()
+    path.write_bytes(content.replace(b"T9999", b"X9999"))
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    rewritten = ingest()
+    assert rewritten.source == "text"
+    assert rewritten.invalid == 2
+
+    # --no-snapshot and --quarantine always parse
+    assert ingest(use_snapshot=False).source == "text"
+    assert ingest(quarantine_file=str(tmp_path / "rejected.txt")).source == "text"
+
+
+def test_source_hash_spans_chunks(tmp_path, monkeypatch):
+    path = tmp_path / "sales.txt"
+    content = bytes(range(256)) * 41
+    path.write_bytes(content)
+    monkeypatch.setattr(snapshot, "HASH_CHUNK_SIZE", 1000)
+
+    source = snapshot_source(str(path))
+    assert (source["size"], source["sha256"]) == (len(content), hashlib.sha256(content).hexdigest())
+    assert snapshot_source(str(tmp_path / "missing.txt")) is None
@@ -0,0 +1,35 @@
+import pytest
+
+from utils.validation import VALIDATION_RULES, Rule, FIELD_COUNT, NUMBER_FORMAT
+
+VALID = "T001|2024-12-01|P101|Laptop|2|45,000|C001|North"
+
+
+@pytest.mark.parametrize("line, failed", [
+    (VALID, []),
+    ("X001|2024-12-01|P101|Laptop|2|45000|C001|North", ["transaction_id_prefix"]),
+    ("T001|2024-12-01|Q101|Laptop|0|45000|D001|", ["product_id_prefix", "customer_id_prefix",
+                                                    "quantity_positive", "region_present"]),
+    ("T001|2024-12-01|P101|Laptop|2|-5|C001|North", ["unit_price_positive"]),
+    ("T001|2024-12-01|P101|Laptop|2|inf|C001|North", ["unit_price_finite"]),
+    ("T001|2024-12-01|P101|Laptop|2", [FIELD_COUNT]),
+    ("T001|2024-12-01|P101|Laptop|two|45000|C001|North", [NUMBER_FORMAT]),
+])
+def test_validate_lines_attributes_every_failed_rule(line, failed):
+    valid, report = VALIDATION_RULES.validate_lines([line])
+
+    assert len(valid) == (not failed)
+    assert report.by_rule == {rule: 1 for rule in failed}
+
+
+def test_accepts_agrees_with_failed_rules(transactions):
+    rows = [t.to_dict() for t in transactions[:50]]
+    rows += [dict(row, quantity=0) for row in rows[:10]] + [dict(row, customer_id="X") for row in rows[10:20]]
+
+    for row in rows:
+        assert VALIDATION_RULES.accepts(row) == (not VALIDATION_RULES.failed_rules(row))
+
+
+def test_rejects_unknown_op():
+    with pytest.raises(ValueError):
+        Rule("bad", "quantity", "lt", 0)
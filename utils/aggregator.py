@@ -0,0 +1,570 @@
+import copy
+import hashlib
+import heapq
+
+from utils.money import to_rupees
+from utils.records import as_transaction
+from utils.rolling import DEFAULT_WINDOWS, rolling_metrics
+from utils.sketches import (
+    DEFAULT_HLL_ERROR,
+    DEFAULT_HEAVY_HITTER_ERROR,
+    DEFAULT_CONFIDENCE,
+    hash64,
+    HyperLogLog,
+    CountMinSketch,
+    SpaceSaving
+)
+
+
+class SalesAggregates:
+    """
+    Computes every analytics metric in a single pass over the transactions
+
+    The accessor methods return exactly what the matching functions in
+    utils/data_processor.py return, so callers can switch over without
+    changing how they read the results.
+
+    Money is accumulated in integer paise, so totals are exact and do not
+    depend on the order rows were added in; accessors convert to rupees.
+    """
+
+    approximate = False
+
+    def __init__(self):
+        self.total_paise = 0
+        self.transaction_count = 0
+        self.first_date = None
+        self.last_date = None
+
+        # region -> [total_sales paise, transaction_count]
+        self.regions = {}
+        # product name -> [quantity, revenue paise]
+        self.products = {}
+        # customer id -> [total_spent paise, purchase_count, set of product names]
+        self.customers = {}
+        # date -> [revenue paise, transaction_count, set of customer ids]
+        self.daily = {}
+
+        # (transaction_count, digest) memo for fingerprint()
+        self._fingerprint = None
+
+    def add(self, t):
+        """
+        Folds one validated transaction into the running aggregates
+        """
+        t = as_transaction(t)
+        qty = t.quantity
+        amount = t.amount_paise
+        date = t.date
+
+        self.total_paise += amount
+        self.transaction_count += 1
+
+        if self.first_date is None or date < self.first_date:
+            self.first_date = date
+        if self.last_date is None or date > self.last_date:
+            self.last_date = date
+
+        region = self.regions.get(t.region)
+        if region is None:
+            region = self.regions[t.region] = [0, 0]
+        region[0] += amount
+        region[1] += 1
+
+        product = self.products.get(t.product_name)
+        if product is None:
+            product = self.products[t.product_name] = [0, 0]
+        product[0] += qty
+        product[1] += amount
+
+        self._add_customer(t, amount)
+
+    def _add_customer(self, t, amount):
+        """
+        Per-customer and per-day part of add() (sketched by ApproximateSalesAggregates)
+        """
+        customer = self.customers.get(t.customer_id)
+        if customer is None:
+            customer = self.customers[t.customer_id] = [0, 0, set()]
+        customer[0] += amount
+        customer[1] += 1
+        customer[2].add(t.product_name)
+
+        day = self.daily.get(t.date)
+        if day is None:
+            day = self.daily[t.date] = [0, 0, set()]
+        day[0] += amount
+        day[1] += 1
+        day[2].add(t.customer_id)
+
+    def update(self, transactions):
+        """
+        Folds an iterable of transactions into the aggregates
+        """
+        for t in transactions:
+            self.add(t)
+        return self
+
+    def merge(self, other):
+        """
+        Folds another partial result into this one (other is left unchanged)
+        Merging the partials of consecutive inputs in order gives the same
+        aggregates, including key order, as one pass over the concatenated input
+        Raises: ValueError when merging exact and approximate aggregates
+        """
+        if other.approximate != self.approximate:
+            raise ValueError("Cannot merge exact and approximate aggregates")
+
+        self.total_paise += other.total_paise
+        self.transaction_count += other.transaction_count
+
+        for date in (other.first_date, other.last_date):
+            if date is None:
+                continue
+            if self.first_date is None or date < self.first_date:
+                self.first_date = date
+            if self.last_date is None or date > self.last_date:
+                self.last_date = date
+
+        for key, (total_sales, count) in other.regions.items():
+            region = self.regions.get(key)
+            if region is None:
+                region = self.regions[key] = [0, 0]
+            region[0] += total_sales
+            region[1] += count
+
+        for key, (quantity, revenue) in other.products.items():
+            product = self.products.get(key)
+            if product is None:
+                product = self.products[key] = [0, 0]
+            product[0] += quantity
+            product[1] += revenue
+
+        self._merge_customers(other)
+        return self
+
+    def _merge_customers(self, other):
+        """
+        Per-customer and per-day part of merge() (sketched by ApproximateSalesAggregates)
+        """
+        for key, (total_spent, count, products) in other.customers.items():
+            customer = self.customers.get(key)
+            if customer is None:
+                customer = self.customers[key] = [0, 0, set()]
+            customer[0] += total_spent
+            customer[1] += count
+            customer[2] |= products
+
+        for key, (revenue, count, customers) in other.daily.items():
+            day = self.daily.get(key)
+            if day is None:
+                day = self.daily[key] = [0, 0, set()]
+            day[0] += revenue
+            day[1] += count
+            day[2] |= customers
+
+    @property
+    def total_revenue(self):
+        return to_rupees(self.total_paise)
+
+    def _exact_dict(self):
+        return {
+            "total_paise": self.total_paise,
+            "transaction_count": self.transaction_count,
+            "first_date": self.first_date,
+            "last_date": self.last_date,
+            "regions": self.regions,
+            "products": self.products
+        }
+
+    def _load_exact(self, data):
+        self.total_paise = data["total_paise"]
+        self.transaction_count = data["transaction_count"]
+        self.first_date = data["first_date"]
+        self.last_date = data["last_date"]
+        self.regions = {k: list(v) for k, v in data["regions"].items()}
+        self.products = {k: list(v) for k, v in data["products"].items()}
+
+    def to_dict(self):
+        """
+        JSON-serializable snapshot of the running aggregates (money in paise)
+        """
+        return {
+            **self._exact_dict(),
+            "customers": {
+                cid: [spent, count, sorted(products)]
+                for cid, (spent, count, products) in self.customers.items()
+            },
+            "daily": {
+                date: [revenue, count, sorted(customers)]
+                for date, (revenue, count, customers) in self.daily.items()
+            }
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Rebuilds aggregates saved with to_dict()
+        """
+        aggregates = cls()
+        aggregates._load_exact(data)
+        aggregates.customers = {
+            cid: [spent, count, set(products)]
+            for cid, (spent, count, products) in data["customers"].items()
+        }
+        aggregates.daily = {
+            date: [revenue, count, set(customers)]
+            for date, (revenue, count, customers) in data["daily"].items()
+        }
+        return aggregates
+
+    def fingerprint(self):
+        """
+        Digest of the aggregated data, memoized until more rows are added
+        Dicts are hashed in insertion order because ranking ties depend on it;
+        the product and customer sets are hashed by their sorted members, as
+        report sections list and count them
+        """
+        if self._fingerprint is not None and self._fingerprint[0] == self.transaction_count:
+            return self._fingerprint[1]
+
+        digest = hashlib.sha256()
+        for part in (
+            (self.transaction_count, self.total_paise, self.first_date, self.last_date),
+            list(self.regions.items()),
+            list(self.products.items()),
+            [(cid, spent, count, sorted(products)) for cid, (spent, count, products) in self.customers.items()],
+            [(date, revenue, count, sorted(customers)) for date, (revenue, count, customers) in self.daily.items()],
+        ):
+            digest.update(repr(part).encode("utf-8"))
+
+        self._fingerprint = (self.transaction_count, digest.hexdigest())
+        return self._fingerprint[1]
+
+    #region wise sales
+    def region_wise_sales(self):
+        region_data = {}
+
+        for region, (total_sales, count) in self.regions.items():
+            total_sales = to_rupees(total_sales)
+            region_data[region] = {
+                "total_sales": total_sales,
+                "transaction_count": count,
+                "percentage": round((total_sales / self.total_revenue) * 100, 2)
+            }
+
+        return dict(
+            sorted(region_data.items(), key=lambda x: x[1]["total_sales"], reverse=True)
+        )
+
+    #top selling products
+    def top_selling_products(self, n=5):
+        # Heap selection instead of sorting every product; same order as sorted()[:n]
+        result = (
+            (name, quantity, revenue)
+            for name, (quantity, revenue) in self.products.items()
+        )
+        return [
+            (name, quantity, to_rupees(revenue))
+            for name, quantity, revenue in heapq.nlargest(n, result, key=lambda x: x[1])
+        ]
+
+    #customer purchase analysis
+    def customer_analysis(self):
+        result = {}
+
+        for cid, (total_spent, count, products) in self.customers.items():
+            total_spent = to_rupees(total_spent)
+            result[cid] = {
+                "total_spent": total_spent,
+                "purchase_count": count,
+                "avg_order_value": round(total_spent / count, 2),
+                "products_bought": list(products)
+            }
+
+        return dict(
+            sorted(result.items(), key=lambda x: x[1]["total_spent"], reverse=True)
+        )
+
+    def top_customers(self, n=5):
+        """
+        Returns: the first n entries of customer_analysis() without sorting them all
+        """
+        top = heapq.nlargest(n, self.customers.items(), key=lambda x: x[1][0])
+        return [
+            (cid, {
+                "total_spent": to_rupees(total_spent),
+                "purchase_count": count,
+                "avg_order_value": round(to_rupees(total_spent) / count, 2),
+                "products_bought": list(products)
+            })
+            for cid, (total_spent, count, products) in top
+        ]
+
+    def approximations(self):
+        """
+        Returns: descriptions of the figures that are estimates (none here)
+        """
+        return []
+
+    #daily sales trend
+    def daily_sales_trend(self):
+        result = {}
+
+        for date in sorted(self.daily.keys()):
+            revenue, count, customers = self.daily[date]
+            result[date] = {
+                "revenue": to_rupees(revenue),
+                "transaction_count": count,
+                "unique_customers": len(customers)
+            }
+
+        return result
+
+    #rolling sales trend
+    def rolling_sales_trend(self, windows=DEFAULT_WINDOWS):
+        """
+        7/30-day (or any windows) rolling revenue, transactions, unique
+        customers and peak day, plus day-over-day growth, per calendar day
+        """
+        return rolling_metrics(self.daily, windows)
+
+    #find peak sales day
+    def find_peak_sales_day(self):
+        peak_date = None
+        max_revenue = 0
+        transaction_count = 0
+
+        for date in sorted(self.daily.keys()):
+            revenue, count, _ = self.daily[date]
+            if revenue > max_revenue:
+                max_revenue = revenue
+                peak_date = date
+                transaction_count = count
+
+        if peak_date is not None:
+            max_revenue = to_rupees(max_revenue)
+
+        return peak_date, max_revenue, transaction_count
+
+    #low performing products
+    def low_performing_products(self, threshold=10):
+        result = [
+            (name, quantity, to_rupees(revenue))
+            for name, (quantity, revenue) in self.products.items()
+            if quantity < threshold
+        ]
+        result.sort(key=lambda x: x[1])
+        return result
+
+
+class ApproximateSalesAggregates(SalesAggregates):
+    """
+    Bounded-memory variant of SalesAggregates for very large inputs
+
+    Totals, regions, products and daily revenue stay exact (their key
+    spaces are small). Per-customer state is replaced by sketches:
+    - top customers by spend: Space-Saving, at most 1 / heavy_hitter_error counters
+    - orders per customer: Count-Min, within heavy_hitter_error * transactions
+      with probability confidence
+    - unique customers per day: HyperLogLog with relative standard error hll_error
+    - products per tracked customer: HyperLogLog, counted only since the
+      customer was last admitted to the Space-Saving table (the sketch is
+      dropped on eviction), so unique_products is a lower bound
+    Every top-customer entry carries max_error, the Space-Saving bound on
+    how far its total_spent may be overestimated.
+    """
+
+    approximate = True
+
+    def __init__(self, hll_error=DEFAULT_HLL_ERROR, heavy_hitter_error=DEFAULT_HEAVY_HITTER_ERROR,
+                 confidence=DEFAULT_CONFIDENCE):
+        super().__init__()
+        self.hll_error = hll_error
+        self.heavy_hitter_error = heavy_hitter_error
+        self.confidence = confidence
+
+        self.customer_spend = SpaceSaving(heavy_hitter_error)
+        self.customer_orders = CountMinSketch(heavy_hitter_error, confidence)
+        # tracked customer id -> HyperLogLog of product names
+        self.customer_products = {}
+        # product name -> hash64(name); products are few, customers are not
+        self.product_hashes = {}
+
+    def _add_customer(self, t, amount):
+        cid = t.customer_id
+        customer_hash = hash64(cid)
+        self.customer_orders.add_hash(customer_hash)
+
+        evicted = self.customer_spend.add(cid, amount)
+        if evicted is not None:
+            # Products bought before a re-admission are not seen again:
+            # unique_products undercounts rather than keeping every customer
+            self.customer_products.pop(evicted, None)
+        products = self.customer_products.get(cid)
+        if products is None:
+            products = self.customer_products[cid] = HyperLogLog(self.hll_error)
+        product_hash = self.product_hashes.get(t.product_name)
+        if product_hash is None:
+            product_hash = self.product_hashes[t.product_name] = hash64(t.product_name)
+        products.add_hash(product_hash)
+
+        day = self.daily.get(t.date)
+        if day is None:
+            day = self.daily[t.date] = [0, 0, HyperLogLog(self.hll_error)]
+        day[0] += amount
+        day[1] += 1
+        day[2].add_hash(customer_hash)
+
+    def merge(self, other):
+        """
+        Folds another partial result into this one (other is left unchanged)
+        The exact figures merge exactly; the sketches merge with the same
+        bounds over the combined input
+        Raises: ValueError unless other was built with the same sketch options
+        """
+        if other.approximate and other.sketch_options != self.sketch_options:
+            raise ValueError("Cannot merge approximate aggregates built with different sketch options")
+        return super().merge(other)
+
+    def _merge_customers(self, other):
+        self.customer_orders.merge(other.customer_orders)
+
+        for cid in self.customer_spend.merge(other.customer_spend):
+            self.customer_products.pop(cid, None)
+        for cid in self.customer_spend.counters:
+            theirs = other.customer_products.get(cid)
+            if theirs is None:
+                continue
+            ours = self.customer_products.get(cid)
+            if ours is None:
+                self.customer_products[cid] = copy.deepcopy(theirs)
+            else:
+                ours.merge(theirs)
+        self.product_hashes.update(other.product_hashes)
+
+        for date, (revenue, count, customers) in other.daily.items():
+            day = self.daily.get(date)
+            if day is None:
+                self.daily[date] = [revenue, count, copy.deepcopy(customers)]
+            else:
+                day[0] += revenue
+                day[1] += count
+                day[2].merge(customers)
+
+    @property
+    def sketch_options(self):
+        return {
+            "hll_error": self.hll_error,
+            "heavy_hitter_error": self.heavy_hitter_error,
+            "confidence": self.confidence
+        }
+
+    def to_dict(self):
+        """
+        JSON-serializable snapshot, sketches included; sketch_options marks
+        it as approximate (see aggregates_from_dict())
+        """
+        return {
+            **self._exact_dict(),
+            "sketch_options": self.sketch_options,
+            "customer_spend": self.customer_spend.to_dict(),
+            "customer_orders": self.customer_orders.to_dict(),
+            "customer_products": {cid: sketch.to_dict() for cid, sketch in self.customer_products.items()},
+            "daily": {
+                date: [revenue, count, customers.to_dict()]
+                for date, (revenue, count, customers) in self.daily.items()
+            }
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Rebuilds aggregates saved with to_dict()
+        """
+        aggregates = cls(**data["sketch_options"])
+        aggregates._load_exact(data)
+        aggregates.customer_spend = SpaceSaving.from_dict(data["customer_spend"])
+        aggregates.customer_orders = CountMinSketch.from_dict(data["customer_orders"])
+        aggregates.customer_products = {
+            cid: HyperLogLog.from_dict(sketch) for cid, sketch in data["customer_products"].items()
+        }
+        aggregates.daily = {
+            date: [revenue, count, HyperLogLog.from_dict(customers)]
+            for date, (revenue, count, customers) in data["daily"].items()
+        }
+        # product_hashes is only a cache and refills as rows arrive
+        return aggregates
+
+    def fingerprint(self):
+        # Sketch state is not cheaply comparable; reports always re-render
+        return None
+
+    def _customer_entry(self, cid, spent, error):
+        orders = self.customer_orders.estimate(cid)
+        spent = to_rupees(spent)
+        return {
+            "total_spent": spent,
+            "purchase_count": orders,
+            "avg_order_value": round(spent / orders, 2),
+            "unique_products": self.customer_products[cid].count(),
+            "max_error": to_rupees(error)
+        }
+
+    #customer purchase analysis (tracked heavy hitters only)
+    def customer_analysis(self):
+        return {
+            cid: self._customer_entry(cid, spent, error)
+            for cid, spent, error in self.customer_spend.top()
+        }
+
+    def top_customers(self, n=5):
+        return [
+            (cid, self._customer_entry(cid, spent, error))
+            for cid, spent, error in self.customer_spend.top(n)
+        ]
+
+    #daily sales trend
+    def daily_sales_trend(self):
+        result = {}
+
+        for date in sorted(self.daily.keys()):
+            revenue, count, customers = self.daily[date]
+            result[date] = {
+                "revenue": to_rupees(revenue),
+                "transaction_count": count,
+                "unique_customers": customers.count()
+            }
+
+        return result
+
+    def approximations(self):
+        hll_error = HyperLogLog(self.hll_error).error
+        return [
+            f"Top customers: Space-Saving ({self.customer_spend.capacity} counters, "
+            f"spend over by at most ₹{to_rupees(self.customer_spend.error_bound):,.2f})",
+            f"Customer orders: Count-Min (over by at most "
+            f"{self.customer_orders.error_bound:,.0f} at {self.confidence:.0%} confidence)",
+            f"Unique customers per day: HyperLogLog (±{hll_error:.2%} std error)",
+            "Products per top customer: lower bound (counted since the customer was last tracked)",
+        ]
+
+
+def aggregates_from_dict(data):
+    """
+    Rebuilds exact or approximate aggregates, whichever to_dict() saved
+    """
+    if "sketch_options" in data:
+        return ApproximateSalesAggregates.from_dict(data)
+    return SalesAggregates.from_dict(data)
+
+
+def aggregate_transactions(transactions, approximate=False, **sketch_options):
+    """
+    Scans the transactions once and returns a SalesAggregates result
+    approximate=True uses bounded-memory sketches for the per-customer metrics
+    (sketch_options: hll_error, heavy_hitter_error, confidence)
+    """
+    if approximate:
+        return ApproximateSalesAggregates(**sketch_options).update(transactions)
+    return SalesAggregates().update(transactions)
@@ -1,9 +1,24 @@
-import requests
+from collections.abc import Mapping
+
+from utils.catalog_client import CatalogClient, BASE_URL
+from utils.catalog_cache import load_cached_catalog, format_age
+from utils.output_writer import write_enriched_data
+from utils.records import FIELDS, as_transaction
+
+# Shared client so single-product lookups reuse pooled keep-alive connections
+_default_client = None
+
+
+def get_catalog_client():
+    global _default_client
+    if _default_client is None:
+        _default_client = CatalogClient()
+    return _default_client
+
 
 def fetch_product_category(product_id):
     try:
-        response = requests.get(f"https://dummyjson.com/products/{product_id[-1]}")
-        data = response.json()
+        data = get_catalog_client().fetch_product(product_id[-1])
         return data.get("category", "Unknown")
     except:
         return "Unknown"
@@ -14,24 +29,33 @@ def fetch_product_category(product_id):
 
 # utils/api_handler.py
 
-BASE_URL = "https://dummyjson.com/products"
-
 
-def fetch_all_products():
+def fetch_all_products(client=None):
     """
-    Fetches all products from DummyJSON API
+    Fetches all products from DummyJSON API, paging through the full catalog
     Returns: list of product dictionaries
     """
     try:
-        response = requests.get(f"{BASE_URL}?limit=100", timeout=10)
-        response.raise_for_status()
-        data = response.json()
+        products = (client or get_catalog_client()).fetch_all_products()
         print("API fetch successful")
-        return data.get("products", [])
+        return products
     except Exception as e:
         print("API fetch failed:", e)
         return []
-    
+
+
+
+def fetch_cached_products(client=None, offline=False, **cache_options):
+    """
+    Fetches products through the on-disk catalog cache
+    Returns: (list of product dictionaries, cache_info)
+    """
+    products, cache_info = load_cached_catalog(
+        client or get_catalog_client(), offline=offline, **cache_options
+    )
+    print(f"Catalog cache {cache_info['status']} (age: {format_age(cache_info['age'])})")
+    return products, cache_info
+
 
 #create product mapping
 def create_product_mapping(api_products):
@@ -53,63 +77,147 @@ def create_product_mapping(api_products):
 
 
 #Enrich Transactions with API Data
-def enrich_sales_data(transactions, product_mapping):
+API_FIELDS = ("API_Category", "API_Brand", "API_Rating", "API_Match")
+
+# Shared by every transaction whose product is not in the catalog
+NO_MATCH = {"API_Category": None, "API_Brand": None, "API_Rating": None, "API_Match": False}
+
+
+class EnrichedTransaction(Mapping):
     """
-    Enriches transaction data with API product info
+    Read-only view of a transaction with API fields overlaid
+
+    Holds references to the original transaction and to the API field dict
+    shared by every row of the same product, so nothing is copied per row.
+    Reads like the old enriched dict: t["API_Match"], t.get("Region"), etc.
     """
-    enriched = []
 
-    for t in transactions:
-        enriched_txn = t.copy()
+    __slots__ = ("transaction", "api_fields")
 
-        try:
-            # Extract numeric ID: P101 -> 101
-            product_id_num = int("".join(filter(str.isdigit, t["ProductID"])))
+    COLUMNS = tuple(FIELDS) + API_FIELDS
 
-            if product_id_num in product_mapping:
-                api_data = product_mapping[product_id_num]
-                enriched_txn["API_Category"] = api_data["category"]
-                enriched_txn["API_Brand"] = api_data["brand"]
-                enriched_txn["API_Rating"] = api_data["rating"]
-                enriched_txn["API_Match"] = True
-            else:
-                enriched_txn["API_Category"] = None
-                enriched_txn["API_Brand"] = None
-                enriched_txn["API_Rating"] = None
-                enriched_txn["API_Match"] = False
+    def __init__(self, transaction, api_fields):
+        self.transaction = transaction
+        self.api_fields = api_fields
 
-        except Exception:
-            enriched_txn["API_Category"] = None
-            enriched_txn["API_Brand"] = None
-            enriched_txn["API_Rating"] = None
-            enriched_txn["API_Match"] = False
+    def __getitem__(self, key):
+        if key in self.api_fields:
+            return self.api_fields[key]
+        return self.transaction[key]
 
-        enriched.append(enriched_txn)
+    def __iter__(self):
+        yield from self.transaction
+        yield from self.api_fields
 
-    return enriched
+    def __len__(self):
+        return len(self.transaction) + len(self.api_fields)
 
+    def __repr__(self):
+        return f"EnrichedTransaction({dict(self)!r})"
 
+    def to_dict(self):
+        """
+        Materializes a plain dict copy
+        """
+        return dict(self)
 
+    def to_tuple(self):
+        """
+        Values in COLUMNS order
+        """
+        api = self.api_fields
+        return as_transaction(self.transaction).to_tuple() + (
+            api["API_Category"], api["API_Brand"], api["API_Rating"], api["API_Match"]
+        )
 
-#Save Enriched Data to File
-def save_enriched_data(enriched_transactions, filename="data/enriched_sales_data.txt"):
+
+def resolve_api_fields(product_id, product_mapping):
     """
-    Saves enriched transactions back to file
+    Looks up the API fields for one ProductID
+    Returns: shared field dict (NO_MATCH if the product is unknown)
+    """
+    try:
+        # Extract numeric ID: P101 -> 101
+        product_id_num = int("".join(filter(str.isdigit, product_id)))
+    except ValueError:
+        return NO_MATCH
+
+    api_data = product_mapping.get(product_id_num)
+    if api_data is None:
+        return NO_MATCH
+
+    return {
+        "API_Category": api_data["category"],
+        "API_Brand": api_data["brand"],
+        "API_Rating": api_data["rating"],
+        "API_Match": True
+    }
+
+
+def iter_enriched_sales_data(transactions, product_mapping, summary=None):
     """
-    headers = [
-        "TransactionID", "Date", "ProductID", "ProductName",
-        "Quantity", "UnitPrice", "CustomerID", "Region",
-        "API_Category", "API_Brand", "API_Rating", "API_Match"
-    ]
+    Streaming form of enrich_sales_data(): rows are wrapped as they arrive
+    summary: EnrichmentSummary counting the rows as they pass
+    Yields: EnrichedTransaction views
+    """
+    lookup = {}
+
+    for t in transactions:
+        product_id = as_transaction(t).product_id
+        api_fields = lookup.get(product_id)
 
-    with open(filename, "w", encoding="utf-8") as f:
-        f.write("|".join(headers) + "\n")
+        if api_fields is None:
+            api_fields = lookup[product_id] = resolve_api_fields(product_id, product_mapping)
 
+        enriched = EnrichedTransaction(t, api_fields)
+        if summary is not None:
+            summary.add(enriched)
+        yield enriched
+
+
+def enrich_sales_data(transactions, product_mapping):
+    """
+    Enriches transaction data with API product info
+    Each distinct ProductID is resolved once; rows are wrapped, not copied
+    """
+    return list(iter_enriched_sales_data(transactions, product_mapping))
+
+
+class EnrichmentSummary:
+    """
+    Match counts of enriched rows (what the report's API summary shows),
+    gathered as they stream past when the rows themselves are not kept
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self.matched = 0
+        self.failed_products = set()
+
+    def add(self, t):
+        self.rows += 1
+        if t.get("API_Match"):
+            self.matched += 1
+        else:
+            self.failed_products.add(t["ProductName"])
+
+    @classmethod
+    def of(cls, enriched_transactions):
+        summary = cls()
         for t in enriched_transactions:
-            row = [
-                str(t.get(h, "")) if t.get(h) is not None else ""
-                for h in headers
-            ]
-            f.write("|".join(row) + "\n")
+            summary.add(t)
+        return summary
+
 
-    print(f"Enriched data saved to {filename}")
\ No newline at end of file
+
+
+#Save Enriched Data to File
+def save_enriched_data(enriched_transactions, filename="data/enriched_sales_data.txt", fmt=None):
+    """
+    Saves enriched transactions back to file
+    fmt: "txt", "gz", "zst" or "col" (default: from the file extension)
+    Returns: write stats (rows, bytes, seconds, throughput)
+    """
+    stats = write_enriched_data(enriched_transactions, filename, fmt=fmt)
+    print(f"Enriched data saved to {filename}")
+    return stats
@@ -0,0 +1,152 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.aggregator import aggregate_transactions
+from utils.ingest import ingest_sales
+from utils.snapshot import SNAPSHOT_DIR
+from utils.api_handler import (
+    fetch_cached_products,
+    create_product_mapping,
+    enrich_sales_data,
+    save_enriched_data
+)
+from utils.report_generator import generate_sales_report
+from utils.rolling import DEFAULT_WINDOWS
+
+# Fetch, ingestion and the two output writers can all be in flight at once
+PIPELINE_WORKERS = 4
+
+
+class Timeline:
+    """
+    Start/end offsets of every stage, relative to the start of the run
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.stages = []
+
+    def run(self, name, func, *args, **kwargs):
+        started = time.perf_counter() - self.start
+        result = func(*args, **kwargs)
+        self.stages.append({"stage": name, "start": started, "end": time.perf_counter() - self.start})
+        return result
+
+    @property
+    def seconds(self):
+        return max((s["end"] for s in self.stages), default=0.0)
+
+    def summary(self):
+        lines = [f"{'Stage':<22}{'Start':>9}{'End':>9}{'Seconds':>9}"]
+        for s in sorted(self.stages, key=lambda s: s["start"]):
+            lines.append(f"{s['stage']:<22}{s['start']:>8.3f}s{s['end']:>8.3f}s{s['end'] - s['start']:>8.3f}s")
+        lines.append(f"{'total':<22}{'':>9}{self.seconds:>8.3f}s")
+        return "\n".join(lines)
+
+
+def ingest(filename, use_snapshot=True, sketch_options=None, quarantine_file=None,
+           snapshot_dir=SNAPSHOT_DIR):
+    """
+    CPU-bound half of the pipeline: ingest_sales() (the same read, parse,
+    validate and snapshot steps as main.py) and analytics, without filters
+    Returns: (Ingested, aggregates)
+    """
+    ingested = ingest_sales(filename, use_snapshot=use_snapshot, quarantine_file=quarantine_file,
+                            snapshot_dir=snapshot_dir)
+    aggregates = aggregate_transactions(
+        ingested.valid,
+        approximate=sketch_options is not None,
+        **(sketch_options or {})
+    )
+    return ingested, aggregates
+
+
+def enrich(valid_transactions, api_products):
+    return enrich_sales_data(valid_transactions, create_product_mapping(api_products))
+
+
+def run_sequential(filename="data/sales_data.txt", fetch=fetch_cached_products,
+                   enriched_output="data/enriched_sales_data.txt",
+                   output_file="output/sales_report.txt", use_snapshot=True, sketch_options=None,
+                   quarantine_file=None, snapshot_dir=SNAPSHOT_DIR, report_sections=None,
+                   windows=DEFAULT_WINDOWS):
+    """
+    The same stages as run_async(), one after another (the main.py order)
+    Returns: (result dict, Timeline)
+    """
+    timeline = Timeline()
+
+    ingested, aggregates = timeline.run(
+        "ingest", ingest, filename, use_snapshot, sketch_options, quarantine_file, snapshot_dir
+    )
+    valid = ingested.valid
+    api_products, catalog_cache = timeline.run("fetch_products", fetch)
+    enriched = timeline.run("enrich_sales_data", enrich, valid, api_products)
+    write_stats = timeline.run("save_enriched_data", save_enriched_data, enriched, enriched_output)
+    timeline.run("generate_sales_report", generate_sales_report, valid, enriched, output_file,
+                 aggregates=aggregates, catalog_cache=catalog_cache, windows=windows,
+                 sections=report_sections)
+
+    return _result(ingested, api_products, enriched, write_stats), timeline
+
+
+async def run_async(filename="data/sales_data.txt", fetch=fetch_cached_products,
+                    enriched_output="data/enriched_sales_data.txt",
+                    output_file="output/sales_report.txt", use_snapshot=True, sketch_options=None,
+                    quarantine_file=None, snapshot_dir=SNAPSHOT_DIR, report_sections=None,
+                    windows=DEFAULT_WINDOWS):
+    """
+    Overlapped pipeline:
+    - the catalog fetch starts immediately and runs while the file is ingested
+    - ingestion and analytics run in an executor, off the event loop
+    - enrichment starts as soon as both the transactions and the catalog are ready
+    - the enriched file and the report are written concurrently
+    fetch: callable returning (products, cache_info), e.g. fetch_cached_products
+    report_sections / windows: passed to generate_sales_report()
+    Returns: (result dict, Timeline)
+    """
+    loop = asyncio.get_running_loop()
+    timeline = Timeline()
+
+    with ThreadPoolExecutor(max_workers=PIPELINE_WORKERS) as pool:
+        def submit(name, func, *args, **kwargs):
+            return loop.run_in_executor(pool, lambda: timeline.run(name, func, *args, **kwargs))
+
+        fetch_task = submit("fetch_products", fetch)
+        ingest_task = submit("ingest", ingest, filename, use_snapshot, sketch_options,
+                             quarantine_file, snapshot_dir)
+
+        (ingested, aggregates), (api_products, catalog_cache) = await asyncio.gather(
+            ingest_task, fetch_task
+        )
+        valid = ingested.valid
+
+        enriched = await submit("enrich_sales_data", enrich, valid, api_products)
+
+        write_stats, _ = await asyncio.gather(
+            submit("save_enriched_data", save_enriched_data, enriched, enriched_output),
+            submit("generate_sales_report", generate_sales_report, valid, enriched, output_file,
+                   aggregates=aggregates, catalog_cache=catalog_cache, windows=windows,
+                   sections=report_sections)
+        )
+
+    return _result(ingested, api_products, enriched, write_stats), timeline
+
+
+def _result(ingested, api_products, enriched, write_stats):
+    return {
+        "valid": len(ingested.valid),
+        "invalid": ingested.invalid,
+        "validation": ingested.validation,
+        "products": len(api_products),
+        "enriched": sum(1 for t in enriched if t["API_Match"]),
+        "write_stats": write_stats
+    }
+
+
+def run_pipeline(**options):
+    """
+    Synchronous entry point for run_async()
+    """
+    return asyncio.run(run_async(**options))
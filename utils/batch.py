@@ -0,0 +1,158 @@
+import json
+import os
+import re
+
+from utils.ingest import ingest_sales
+from utils.query_index import TransactionIndex
+from utils.aggregator import aggregate_transactions
+from utils.api_handler import fetch_cached_products, create_product_mapping, enrich_sales_data
+from utils.report_generator import generate_sales_report
+from utils.instrumentation import PipelineProfiler
+from utils.rolling import DEFAULT_WINDOWS
+
+BATCH_OUTPUT_DIR = "output/batch_reports"
+
+# Spec keys accepted on the command line / in filter files
+SPEC_KEYS = {
+    "name": "name",
+    "region": "region",
+    "min": "min_amount",
+    "min_amount": "min_amount",
+    "max": "max_amount",
+    "max_amount": "max_amount",
+    "from": "start_date",
+    "start_date": "start_date",
+    "to": "end_date",
+    "end_date": "end_date",
+}
+
+
+def parse_filter_spec(text):
+    """
+    Parses "region=North,min=1000,max=50000,from=2024-12-01,to=2024-12-15,name=north"
+    Returns: filter spec dictionary
+    """
+    spec = {}
+
+    for part in text.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "=" not in part:
+            raise ValueError(f"Invalid filter '{part}' (expected key=value)")
+
+        key, value = (p.strip() for p in part.split("=", 1))
+        if key not in SPEC_KEYS:
+            raise ValueError(f"Unknown filter key '{key}'")
+        spec[SPEC_KEYS[key]] = value
+
+    return normalize_filter_spec(spec)
+
+
+def normalize_filter_spec(spec):
+    """
+    Maps spec aliases to filter_transactions() keywords and converts amounts
+    """
+    spec = {SPEC_KEYS.get(k, k): v for k, v in spec.items() if v not in (None, "")}
+
+    for key in ("min_amount", "max_amount"):
+        if key in spec:
+            spec[key] = float(spec[key])
+
+    unknown = set(spec) - set(SPEC_KEYS.values())
+    if unknown:
+        raise ValueError(f"Unknown filter keys: {', '.join(sorted(unknown))}")
+
+    return spec
+
+
+def load_filter_specs(path):
+    """
+    Loads filter specs from a JSON list of objects or a text file with one
+    spec per line (blank lines and # comments ignored)
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith(".json"):
+            return [normalize_filter_spec(spec) for spec in json.load(f)]
+
+        return [
+            parse_filter_spec(line)
+            for line in f
+            if line.strip() and not line.lstrip().startswith("#")
+        ]
+
+
+def describe_filter(spec):
+    parts = []
+    if spec.get("region"):
+        parts.append(f"region={spec['region']}")
+    if spec.get("min_amount") is not None:
+        parts.append(f"min={spec['min_amount']:g}")
+    if spec.get("max_amount") is not None:
+        parts.append(f"max={spec['max_amount']:g}")
+    if spec.get("start_date"):
+        parts.append(f"from={spec['start_date']}")
+    if spec.get("end_date"):
+        parts.append(f"to={spec['end_date']}")
+    return ", ".join(parts) or "none"
+
+
+def report_filename(spec, index, output_dir=BATCH_OUTPUT_DIR):
+    name = spec.get("name") or f"{index:02d}_{describe_filter(spec)}"
+    slug = re.sub(r"[^A-Za-z0-9._-]+", "_", name).strip("_")
+    return os.path.join(output_dir, f"sales_report_{slug}.txt")
+
+
+def run_batch(specs, filename="data/sales_data.txt", output_dir=BATCH_OUTPUT_DIR, offline=False,
+              catalog_ttl=None, use_snapshot=True, quarantine_file=None, workers=None, use_mmap=False,
+              report_sections=None, windows=DEFAULT_WINDOWS, profiler=None):
+    """
+    Loads and validates the sales file once, then writes one report per
+    filter spec without re-reading or re-validating the data
+    use_snapshot / quarantine_file / workers / use_mmap: as for ingest_sales()
+    catalog_ttl: catalog cache TTL in seconds (default: the cache's own)
+    report_sections / windows: passed to every generate_sales_report()
+    profiler: records loading, the catalog fetch and each report as stages
+    Returns: list of (spec, report path, transaction count)
+    """
+    profiler = profiler or PipelineProfiler()
+
+    # The same read, validation and snapshot as every other full run, so
+    # the invalid count saved with the snapshot is the same whichever mode saved it
+    ingested = ingest_sales(filename, use_snapshot=use_snapshot, quarantine_file=quarantine_file,
+                            workers=workers, use_mmap=use_mmap, profiler=profiler)
+    query_index = TransactionIndex(ingested.valid)
+    print(f"✓ Loaded {len(query_index)} valid transactions | Invalid: {ingested.invalid}")
+    if ingested.validation is not None:
+        print(ingested.validation.summary())
+    if quarantine_file:
+        print(f"✓ Rejected rows written to: {quarantine_file}")
+
+    cache_options = {"ttl": catalog_ttl} if catalog_ttl is not None else {}
+    with profiler.stage("fetch_cached_products") as stage:
+        api_products, catalog_cache = fetch_cached_products(offline=offline, **cache_options)
+        stage["rows"] = len(api_products)
+    product_mapping = create_product_mapping(api_products)
+
+    os.makedirs(output_dir, exist_ok=True)
+    results = []
+
+    for index, spec in enumerate(specs, start=1):
+        filters = {k: v for k, v in spec.items() if k != "name"}
+        subset = query_index.filter(**filters)
+
+        output_file = report_filename(spec, index, output_dir)
+        with profiler.stage(f"batch_report_{index}", rows=len(subset)):
+            generate_sales_report(
+                subset,
+                enrich_sales_data(subset, product_mapping),
+                output_file=output_file,
+                aggregates=aggregate_transactions(subset),
+                catalog_cache=catalog_cache,
+                filters=describe_filter(spec),
+                windows=windows,
+                sections=report_sections
+            )
+        results.append((spec, output_file, len(subset)))
+
+    return results
@@ -0,0 +1,179 @@
+import atexit
+import json
+import threading
+import time
+
+from utils.file_handler import write_json_atomic
+
+CACHE_FILE = "data/product_catalog_cache.json"
+
+# Fresh for a day; after that a cached copy is still served for up to a week
+# while it is revalidated in the background
+DEFAULT_TTL = 24 * 3600
+DEFAULT_STALE_TTL = 7 * 24 * 3600
+
+# Only one background revalidation at a time
+_revalidation_lock = threading.Lock()
+_revalidation_thread = None
+
+# How long exit waits for a background revalidation still running
+REVALIDATION_EXIT_TIMEOUT = 2.0
+
+
+def _read_cache(cache_file):
+    try:
+        with open(cache_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _empty_entry():
+    return {
+        "products": [],
+        "fetched_at": None,
+        "etag": None,
+        "last_modified": None,
+        "hits": 0,
+        "misses": 0
+    }
+
+
+def _revalidate(client, entry):
+    """
+    Conditional request for the first page; downloads the rest only if the
+    catalog changed
+    Returns: (entry, status) with status "revalidated" or "miss"
+    """
+    headers = {}
+    if entry["products"] and entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry["products"] and entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+
+    response = client.get(client.base_url, params={"limit": client.page_size, "skip": 0}, headers=headers)
+    entry = dict(entry)
+    entry["fetched_at"] = time.time()
+
+    if response.status_code == 304:
+        return entry, "revalidated"
+
+    entry["products"] = client.fetch_all_products(first_page=response.json())
+    entry["etag"] = response.headers.get("ETag")
+    entry["last_modified"] = response.headers.get("Last-Modified")
+    return entry, "miss"
+
+
+def _background_revalidate(client, entry, cache_file):
+    if not _revalidation_lock.acquire(blocking=False):
+        return
+
+    try:
+        entry, _ = _revalidate(client, entry)
+
+        # Keep hit/miss counters written by runs that finished meanwhile
+        current = _read_cache(cache_file) or entry
+        for key in ("products", "fetched_at", "etag", "last_modified"):
+            current[key] = entry[key]
+        write_json_atomic(current, cache_file)
+    except Exception as e:
+        print("Background catalog revalidation failed:", e)
+    finally:
+        _revalidation_lock.release()
+
+
+def wait_for_revalidation(timeout=REVALIDATION_EXIT_TIMEOUT):
+    """
+    Waits up to timeout seconds for the background revalidation, if any
+    Returns: True when none is running any more
+    """
+    thread = _revalidation_thread
+    if thread is None:
+        return True
+    thread.join(timeout)
+    return not thread.is_alive()
+
+
+# The thread is a daemon, so a slow or hanging catalog API never keeps the
+# process alive; exit gives it a short grace period to write the refreshed
+# copy (write_json_atomic never leaves a half-written cache behind)
+atexit.register(wait_for_revalidation)
+
+
+def load_cached_catalog(client, cache_file=CACHE_FILE, ttl=DEFAULT_TTL,
+                        stale_ttl=DEFAULT_STALE_TTL, offline=False):
+    """
+    Returns the product catalog from the on-disk cache when possible
+
+    - fresh (age <= ttl): served from disk, no network
+    - stale (age <= ttl + stale_ttl): served from disk immediately and
+      revalidated in a background thread
+    - expired or missing: revalidated synchronously with If-None-Match /
+      If-Modified-Since; a 304 only refreshes the timestamp
+    - offline: never touches the network
+
+    If the network fails, an expired cached copy is served instead of nothing.
+
+    Returns: (products, cache_info) where cache_info has status, age,
+    hits, misses and product count
+    """
+    entry = _read_cache(cache_file) or _empty_entry()
+    now = time.time()
+    age = now - entry["fetched_at"] if entry["fetched_at"] is not None else None
+    background = False
+
+    if offline:
+        status = "offline" if entry["products"] else "offline-miss"
+    elif age is not None and age <= ttl:
+        status = "hit"
+    elif age is not None and age <= ttl + stale_ttl and entry["products"]:
+        status = "stale"
+        background = True
+    else:
+        try:
+            entry, status = _revalidate(client, entry)
+            age = 0.0
+        except Exception as e:
+            print("API fetch failed:", e)
+            status = "stale-error" if entry["products"] else "error"
+
+    if status in ("hit", "stale", "revalidated", "offline", "stale-error"):
+        entry["hits"] += 1
+    else:
+        entry["misses"] += 1
+
+    write_json_atomic(entry, cache_file)
+
+    if background:
+        global _revalidation_thread
+        _revalidation_thread = threading.Thread(
+            target=_background_revalidate,
+            args=(client, entry, cache_file),
+            daemon=True
+        )
+        _revalidation_thread.start()
+
+    cache_info = {
+        "status": status,
+        "age": age,
+        "hits": entry["hits"],
+        "misses": entry["misses"],
+        "products": len(entry["products"])
+    }
+
+    return entry["products"], cache_info
+
+
+def format_age(seconds):
+    """
+    Human-readable cache age, e.g. 2h 05m
+    """
+    if seconds is None:
+        return "N/A"
+
+    minutes = int(seconds // 60)
+    if minutes < 1:
+        return f"{int(seconds)}s"
+    if minutes < 60:
+        return f"{minutes}m"
+    return f"{minutes // 60}h {minutes % 60:02d}m"
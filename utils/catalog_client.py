@@ -0,0 +1,106 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+BASE_URL = "https://dummyjson.com/products"
+
+PAGE_SIZE = 100
+MAX_WORKERS = 4
+TIMEOUT = 10
+RETRIES = 3
+BACKOFF = 0.5
+
+# Server-side statuses that are worth retrying
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class CatalogClient:
+    """
+    Product catalog client over a pooled keep-alive session
+
+    Pages through the full catalog with bounded concurrency, retrying
+    transient failures with exponential backoff. Point base_url at a local
+    stub (see utils/stub_catalog_server.py) to run without network access.
+    """
+
+    def __init__(self, base_url=BASE_URL, page_size=PAGE_SIZE, max_workers=MAX_WORKERS,
+                 timeout=TIMEOUT, retries=RETRIES, backoff=BACKOFF):
+        self.base_url = base_url.rstrip("/")
+        self.page_size = page_size
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.session.close()
+
+    def get(self, url, params=None, headers=None):
+        """
+        GET with per-request timeout and retries with exponential backoff
+        Returns: requests.Response (raises after the last failed attempt)
+        """
+        for attempt in range(self.retries + 1):
+            try:
+                response = self.session.get(url, params=params, headers=headers, timeout=self.timeout)
+                if response.status_code not in RETRY_STATUSES:
+                    response.raise_for_status()
+                    return response
+                error = requests.HTTPError(f"{response.status_code} for {response.url}", response=response)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+
+            if attempt < self.retries:
+                time.sleep(self.backoff * (2 ** attempt))
+
+        raise error
+
+    def fetch_page(self, skip, limit=None):
+        """
+        Fetches one page of products
+        Returns: decoded JSON page ({"products", "total", "skip", "limit"})
+        """
+        params = {"limit": limit or self.page_size, "skip": skip}
+        return self.get(self.base_url, params=params).json()
+
+    def fetch_all_products(self, first_page=None):
+        """
+        Fetches every product, requesting the remaining pages concurrently
+        Returns: list of product dictionaries in catalog order
+        """
+        if first_page is None:
+            first_page = self.fetch_page(0)
+
+        products = list(first_page.get("products", []))
+        total = first_page.get("total", len(products))
+        # The server may cap the page size below what was asked for
+        page_size = len(products) or self.page_size
+
+        skips = range(len(products), total, page_size)
+        if not skips:
+            return products
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            for page in pool.map(lambda skip: self.fetch_page(skip, page_size), skips):
+                products.extend(page.get("products", []))
+
+        return products
+
+    def fetch_product(self, product_id):
+        """
+        Fetches a single product by numeric id
+        """
+        return self.get(f"{self.base_url}/{product_id}").json()
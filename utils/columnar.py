@@ -0,0 +1,283 @@
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; only the columnar path needs it
+    np = None
+
+from utils.aggregator import SalesAggregates
+from utils.money import PAISE_PER_RUPEE, to_rupees
+from utils.records import as_transaction
+
+
+class Column:
+    """
+    Dictionary-encoded string column: integer codes plus the distinct values
+    Values are numbered in order of first appearance
+    """
+
+    def __init__(self, values, codes):
+        self.values = values
+        self.codes = codes
+
+    def __len__(self):
+        return len(self.codes)
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("numpy is required for the columnar transaction store")
+
+
+class TransactionTable:
+    """
+    Columnar store for validated transactions
+
+    Quantity, UnitPrice and amount are NumPy arrays (amount in int64 paise,
+    so group sums are exact); Region, ProductName, CustomerID, Date and
+    ProductID are dictionary-encoded Columns.
+    """
+
+    def __init__(self, transaction_ids, quantity, unit_price, region, product, customer, date, product_id):
+        _require_numpy()
+        self.transaction_ids = transaction_ids
+        self.quantity = quantity
+        self.unit_price = unit_price
+        with np.errstate(invalid="ignore"):  # non-finite prices never pass validation
+            self.amount = quantity * np.rint(unit_price * PAISE_PER_RUPEE).astype(np.int64)
+        self.region = region
+        self.product = product
+        self.customer = customer
+        self.date = date
+        self.product_id = product_id
+
+    def __len__(self):
+        return len(self.quantity)
+
+    @classmethod
+    def from_transactions(cls, transactions):
+        """
+        Builds a table from any iterable of Transaction records or dicts
+        A generator such as iter_transactions() is consumed without
+        keeping the intermediate records alive
+        """
+        _require_numpy()
+
+        transaction_ids = []
+        quantity = []
+        unit_price = []
+        keys = ("region", "product_name", "customer_id", "date", "product_id")
+        lookups = {key: ({}, [], []) for key in keys}
+        region, product, customer, date, product_id = (lookups[key] for key in keys)
+
+        for t in transactions:
+            t = as_transaction(t)
+            transaction_ids.append(t.transaction_id)
+            quantity.append(t.quantity)
+            unit_price.append(t.unit_price)
+
+            for value, (lookup, values, codes) in (
+                (t.region, region), (t.product_name, product), (t.customer_id, customer),
+                (t.date, date), (t.product_id, product_id)
+            ):
+                code = lookup.get(value)
+                if code is None:
+                    code = lookup[value] = len(values)
+                    values.append(value)
+                codes.append(code)
+
+        columns = [Column(values, np.array(codes, dtype=np.int32)) for _, values, codes in
+                   (region, product, customer, date, product_id)]
+
+        return cls(
+            transaction_ids,
+            np.array(quantity, dtype=np.int64),
+            np.array(unit_price, dtype=np.float64),
+            *columns
+        )
+
+    def to_aggregates(self):
+        """
+        Builds the SalesAggregates of the table with vectorized group-bys,
+        so the report (and anything else that takes aggregates) runs on it
+        Codes number values in first-seen row order, so keys are inserted
+        in the order a row-by-row pass would insert them
+        """
+        aggregates = SalesAggregates()
+        if not len(self):
+            return aggregates
+
+        aggregates.total_paise = int(self.amount.sum())
+        aggregates.transaction_count = len(self)
+        aggregates.first_date = min(self.date.values)
+        aggregates.last_date = max(self.date.values)
+
+        aggregates.regions = {
+            value: [total, count]
+            for value, total, count in zip(self.region.values, _group_sum(self.region, self.amount).tolist(),
+                                           _group_count(self.region).tolist())
+        }
+        aggregates.products = {
+            value: [quantity, revenue]
+            for value, quantity, revenue in zip(self.product.values,
+                                                _group_sum(self.product, self.quantity).tolist(),
+                                                _group_sum(self.product, self.amount).tolist())
+        }
+        aggregates.customers = {
+            value: [total, count, members]
+            for value, total, count, members in zip(self.customer.values,
+                                                    _group_sum(self.customer, self.amount).tolist(),
+                                                    _group_count(self.customer).tolist(),
+                                                    _member_sets(self.customer, self.product))
+        }
+        aggregates.daily = {
+            value: [revenue, count, members]
+            for value, revenue, count, members in zip(self.date.values,
+                                                      _group_sum(self.date, self.amount).tolist(),
+                                                      _group_count(self.date).tolist(),
+                                                      _member_sets(self.date, self.customer))
+        }
+        return aggregates
+
+    def to_dicts(self):
+        """
+        Adapter back to the list-of-dicts representation
+        """
+        region, product, customer = self.region, self.product, self.customer
+        date, product_id = self.date, self.product_id
+
+        return [
+            {
+                "TransactionID": self.transaction_ids[i],
+                "Date": date.values[date.codes[i]],
+                "ProductID": product_id.values[product_id.codes[i]],
+                "ProductName": product.values[product.codes[i]],
+                "Quantity": int(self.quantity[i]),
+                "UnitPrice": float(self.unit_price[i]),
+                "CustomerID": customer.values[customer.codes[i]],
+                "Region": region.values[region.codes[i]]
+            }
+            for i in range(len(self))
+        ]
+
+
+def _group_sum(column, weights):
+    # Integer accumulation (bincount would sum int64 weights as float64)
+    totals = np.zeros(len(column.values), dtype=np.int64)
+    np.add.at(totals, column.codes, weights)
+    return totals
+
+
+def _group_count(column):
+    return np.bincount(column.codes, minlength=len(column.values))
+
+
+def _distinct_per_group(group, member):
+    """
+    Returns (group_codes, member_codes) for every distinct pair, sorted by group
+    """
+    pairs = np.unique(group.codes.astype(np.int64) * len(member.values) + member.codes)
+    return pairs // len(member.values), pairs % len(member.values)
+
+
+def _member_sets(group, member):
+    """
+    Returns: the set of distinct member values of every group value, by group code
+    """
+    sets = [set() for _ in group.values]
+    values = member.values
+    for g, m in zip(*(codes.tolist() for codes in _distinct_per_group(group, member))):
+        sets[g].add(values[m])
+    return sets
+
+
+#calculate total revenue
+def calculate_total_revenue(table):
+    return to_rupees(int(table.amount.sum()))
+
+
+#region wise sales
+def region_wise_sales(table):
+    totals = _group_sum(table.region, table.amount)
+    counts = _group_count(table.region)
+    total_revenue = calculate_total_revenue(table)
+
+    order = np.argsort(-totals, kind="stable")
+
+    return {
+        table.region.values[i]: {
+            "total_sales": to_rupees(int(totals[i])),
+            "transaction_count": int(counts[i]),
+            "percentage": round((to_rupees(int(totals[i])) / total_revenue) * 100, 2)
+        }
+        for i in order
+    }
+
+
+#top selling products
+def top_selling_products(table, n=5):
+    quantities = _group_sum(table.product, table.quantity)
+    revenues = _group_sum(table.product, table.amount)
+
+    order = np.argsort(-quantities, kind="stable")[:n]
+
+    return [
+        (table.product.values[i], int(quantities[i]), to_rupees(int(revenues[i])))
+        for i in order
+    ]
+
+
+#customer purchase analysis
+def customer_analysis(table):
+    totals = _group_sum(table.customer, table.amount)
+    counts = _group_count(table.customer)
+
+    customer_codes, product_codes = _distinct_per_group(table.customer, table.product)
+    boundaries = np.searchsorted(customer_codes, np.arange(len(table.customer.values) + 1))
+
+    order = np.argsort(-totals, kind="stable")
+    result = {}
+
+    for i in order:
+        products = product_codes[boundaries[i]:boundaries[i + 1]]
+        total_spent = to_rupees(int(totals[i]))
+        result[table.customer.values[i]] = {
+            "total_spent": total_spent,
+            "purchase_count": int(counts[i]),
+            "avg_order_value": round(total_spent / int(counts[i]), 2),
+            "products_bought": [table.product.values[p] for p in products]
+        }
+
+    return result
+
+
+#daily sales trend
+def daily_sales_trend(table):
+    revenues = _group_sum(table.date, table.amount)
+    counts = _group_count(table.date)
+
+    date_codes, _ = _distinct_per_group(table.date, table.customer)
+    unique_customers = np.bincount(date_codes, minlength=len(table.date.values))
+
+    order = sorted(range(len(table.date.values)), key=lambda i: table.date.values[i])
+
+    return {
+        table.date.values[i]: {
+            "revenue": to_rupees(int(revenues[i])),
+            "transaction_count": int(counts[i]),
+            "unique_customers": int(unique_customers[i])
+        }
+        for i in order
+    }
+
+
+#low performing products
+def low_performing_products(table, threshold=10):
+    quantities = _group_sum(table.product, table.quantity)
+    revenues = _group_sum(table.product, table.amount)
+
+    low = np.flatnonzero(quantities < threshold)
+    order = low[np.argsort(quantities[low], kind="stable")]
+
+    return [
+        (table.product.values[i], int(quantities[i]), to_rupees(int(revenues[i])))
+        for i in order
+    ]
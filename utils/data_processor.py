@@ -1,61 +1,31 @@
-def clean_sales_data(raw_records):
-    valid_records = []
-    invalid_count = 0
-
-    for record in raw_records:
-        parts = record.split("|")
-
-        if len(parts) != 8:
-            invalid_count += 1
-            continue
-
-        tid, date, pid, pname, qty, price, cid, region = parts
-
-        if not tid.startswith("T"):
-            invalid_count += 1
-            continue
-
-        if not cid or not region:
-            invalid_count += 1
-            continue
-
-        try:
-            qty = int(qty.replace(",", ""))
-            price = float(price.replace(",", ""))
-        except:
-            invalid_count += 1
-            continue
-
-        if qty <= 0 or price < 0:
-            invalid_count += 1
-            continue
+from utils import columnar
+from utils.columnar import TransactionTable
+from utils.money import amount_paise, to_rupees
+from utils.records import Transaction, as_transaction
+from utils.validation import VALIDATION_RULES, CLEANING_RULES
 
-        pname = pname.replace(",", "")
 
-        valid_records.append({
-            "TransactionID": tid,
-            "Date": date,
-            "ProductID": pid,
-            "ProductName": pname,
-            "Quantity": qty,
-            "UnitPrice": price,
-            "CustomerID": cid,
-            "Region": region
-        })
+def clean_sales_data(raw_records):
+    """
+    Parses and cleans raw lines with CLEANING_RULES (utils/validation.py)
+    Returns: list of transaction dicts
+    """
+    valid, report = CLEANING_RULES.validate_lines(raw_records)
+    valid_records = [t.to_dict() for t in valid]
 
     print(f"Total records parsed: {len(raw_records)}")
-    print(f"Invalid records removed: {invalid_count}")
+    print(f"Invalid records removed: {report.rejected}")
     print(f"Valid records after cleaning: {len(valid_records)}")
 
     return valid_records
 
 
-def parse_transactions(raw_lines):
+def iter_transactions(raw_lines):
     """
-    Parses raw sales lines into clean list of dictionaries
+    Lazily parses raw sales lines into Transaction records (read-only
+    dict-compatible, see utils/records.py)
+    Accepts any iterable of lines, e.g. the iter_sales_data() stream
     """
-    transactions = []
-
     for line in raw_lines:
         parts = line.split("|")
 
@@ -72,49 +42,28 @@ def parse_transactions(raw_lines):
         except ValueError:
             continue
 
-        transactions.append({
-            "TransactionID": tid,
-            "Date": date,
-            "ProductID": pid,
-            "ProductName": pname,
-            "Quantity": qty,
-            "UnitPrice": price,
-            "CustomerID": cid,
-            "Region": region
-        })
-
-    return transactions
+        yield Transaction(tid, date, pid, pname, qty, price, cid, region)
 
 
-def validate_and_filter(transactions, region=None, min_amount=None, max_amount=None):
+def parse_transactions(raw_lines):
     """
-    Q2 Task 1.3
-    Validates and filters transactions
-    Returns (valid_transactions, invalid_count, summary)
+    Parses raw sales lines into a list of Transaction records
     """
-    valid_transactions = []
-    invalid_count = 0
-    valid_amounts = []
+    return list(iter_transactions(raw_lines))
+
 
-    # Collect valid transaction amounts and regions
+def show_filter_options(valid_transactions):
+    """
+    Prints the regions and amount range available for filtering
+    """
     valid_regions = set()
+    valid_amounts = []
 
-    for t in transactions:
-        if (
-            t["TransactionID"].startswith("T") and
-            t["ProductID"].startswith("P") and
-            t["CustomerID"].startswith("C") and
-            t["Quantity"] > 0 and
-            t["UnitPrice"] > 0 and
-            t["Region"]
-        ):
-            amount = t["Quantity"] * t["UnitPrice"]
-            valid_amounts.append(amount)
-            valid_regions.add(t["Region"])
-        else:
-            invalid_count += 1
+    for t in valid_transactions:
+        t = as_transaction(t)
+        valid_amounts.append(t.amount)
+        valid_regions.add(t.region)
 
-    # Display valid regions and amount range
     print("Available Regions:", valid_regions)
 
     if valid_amounts:
@@ -122,32 +71,55 @@ def validate_and_filter(transactions, region=None, min_amount=None, max_amount=N
     else:
         print("Transaction Amount Range: No valid data")
 
-    # Apply filters
-    for t in transactions:
-        if not (
-            t["TransactionID"].startswith("T") and
-            t["ProductID"].startswith("P") and
-            t["CustomerID"].startswith("C") and
-            t["Quantity"] > 0 and
-            t["UnitPrice"] > 0 and
-            t["Region"]
-        ):
-            continue
 
-        amount = t["Quantity"] * t["UnitPrice"]
+def filter_transactions(valid_transactions, region=None, min_amount=None, max_amount=None,
+                        start_date=None, end_date=None):
+    """
+    Applies the optional region, amount and date filters to validated transactions
+    Dates are inclusive YYYY-MM-DD strings
+    """
+    filtered = []
 
-        if region and t["Region"] != region:
+    for t in valid_transactions:
+        record = as_transaction(t)
+        amount = record.amount
+
+        if region and record.region != region:
             continue
         if min_amount and amount < min_amount:
             continue
         if max_amount and amount > max_amount:
             continue
+        if start_date and record.date < start_date:
+            continue
+        if end_date and record.date > end_date:
+            continue
 
-        valid_transactions.append(t)
+        filtered.append(t)
+
+    return filtered
+
+
+def validate_and_filter(transactions, region=None, min_amount=None, max_amount=None):
+    """
+    Q2 Task 1.3
+    Validates and filters transactions
+    Returns (valid_transactions, invalid_count, summary)
+    """
+    # Validity is checked once per row; filtering then runs on the survivors
+    valid, report = VALIDATION_RULES.validate(transactions)
+    invalid_count = report.rejected
+
+    # Display valid regions and amount range
+    show_filter_options(valid)
+
+    # Apply filters
+    valid_transactions = filter_transactions(valid, region, min_amount, max_amount)
 
     summary = {
         "total_input": len(transactions),
         "invalid": invalid_count,
+        "rejected_by_rule": dict(report.by_rule),
         "final_count": len(valid_transactions)
     }
 
@@ -167,26 +139,34 @@ transactions = [
   },
   ...
 ]
+# The analytics functions below also accept a columnar TransactionTable
+# (utils/columnar.py) and hand it to the vectorized version of the same function
+
 #calculate total revenue
 def calculate_total_revenue(transactions):
-    total = 0.0
+    if isinstance(transactions, TransactionTable):
+        return columnar.calculate_total_revenue(transactions)
+    # Summed in integer paise: exact and independent of row order
+    total = 0
     for t in transactions:
-        total += t["Quantity"] * t["UnitPrice"]
-    return total
+        total += amount_paise(t)
+    return to_rupees(total)
 
 #region wise sales 
 def region_wise_sales(transactions):
+    if isinstance(transactions, TransactionTable):
+        return columnar.region_wise_sales(transactions)
     region_data = {}
 
     total_revenue = calculate_total_revenue(transactions)
 
     for t in transactions:
         region = t["Region"]
-        amount = t["Quantity"] * t["UnitPrice"]
+        amount = amount_paise(t)
 
         if region not in region_data:
             region_data[region] = {
-                "total_sales": 0.0,
+                "total_sales": 0,
                 "transaction_count": 0
             }
 
@@ -195,6 +175,7 @@ def region_wise_sales(transactions):
 
     # Calculate percentage
     for region in region_data:
+        region_data[region]["total_sales"] = to_rupees(region_data[region]["total_sales"])
         region_data[region]["percentage"] = round(
             (region_data[region]["total_sales"] / total_revenue) * 100, 2
         )
@@ -213,24 +194,26 @@ def region_wise_sales(transactions):
 
 #top selling products
 def top_selling_products(transactions, n=5):
+    if isinstance(transactions, TransactionTable):
+        return columnar.top_selling_products(transactions, n)
     product_data = {}
 
     for t in transactions:
         name = t["ProductName"]
         qty = t["Quantity"]
-        revenue = qty * t["UnitPrice"]
+        revenue = amount_paise(t)
 
         if name not in product_data:
             product_data[name] = {
                 "quantity": 0,
-                "revenue": 0.0
+                "revenue": 0
             }
 
         product_data[name]["quantity"] += qty
         product_data[name]["revenue"] += revenue
 
     result = [
-        (name, data["quantity"], data["revenue"])
+        (name, data["quantity"], to_rupees(data["revenue"]))
         for name, data in product_data.items()
     ]
 
@@ -241,15 +224,17 @@ def top_selling_products(transactions, n=5):
 
 #customer purchase analysis
 def customer_analysis(transactions):
+    if isinstance(transactions, TransactionTable):
+        return columnar.customer_analysis(transactions)
     customers = {}
 
     for t in transactions:
         cid = t["CustomerID"]
-        amount = t["Quantity"] * t["UnitPrice"]
+        amount = amount_paise(t)
 
         if cid not in customers:
             customers[cid] = {
-                "total_spent": 0.0,
+                "total_spent": 0,
                 "purchase_count": 0,
                 "products_bought": set()
             }
@@ -261,11 +246,12 @@ def customer_analysis(transactions):
     result = {}
 
     for cid, data in customers.items():
+        total_spent = to_rupees(data["total_spent"])
         result[cid] = {
-            "total_spent": data["total_spent"],
+            "total_spent": total_spent,
             "purchase_count": data["purchase_count"],
             "avg_order_value": round(
-                data["total_spent"] / data["purchase_count"], 2
+                total_spent / data["purchase_count"], 2
             ),
             "products_bought": list(data["products_bought"])
         }
@@ -276,15 +262,17 @@ def customer_analysis(transactions):
 
 #daily sales trend
 def daily_sales_trend(transactions):
+    if isinstance(transactions, TransactionTable):
+        return columnar.daily_sales_trend(transactions)
     daily = {}
 
     for t in transactions:
         date = t["Date"]
-        amount = t["Quantity"] * t["UnitPrice"]
+        amount = amount_paise(t)
 
         if date not in daily:
             daily[date] = {
-                "revenue": 0.0,
+                "revenue": 0,
                 "transaction_count": 0,
                 "customers": set()
             }
@@ -297,7 +285,7 @@ def daily_sales_trend(transactions):
 
     for date in sorted(daily.keys()):
         result[date] = {
-            "revenue": daily[date]["revenue"],
+            "revenue": to_rupees(daily[date]["revenue"]),
             "transaction_count": daily[date]["transaction_count"],
             "unique_customers": len(daily[date]["customers"])
         }
@@ -321,24 +309,26 @@ def find_peak_sales_day(transactions):
     return peak_date, max_revenue, transaction_count
 #low performing products
 def low_performing_products(transactions, threshold=10):
+    if isinstance(transactions, TransactionTable):
+        return columnar.low_performing_products(transactions, threshold)
     product_data = {}
 
     for t in transactions:
         name = t["ProductName"]
         qty = t["Quantity"]
-        revenue = qty * t["UnitPrice"]
+        revenue = amount_paise(t)
 
         if name not in product_data:
             product_data[name] = {
                 "quantity": 0,
-                "revenue": 0.0
+                "revenue": 0
             }
 
         product_data[name]["quantity"] += qty
         product_data[name]["revenue"] += revenue
 
     result = [
-        (name, data["quantity"], data["revenue"])
+        (name, data["quantity"], to_rupees(data["revenue"]))
         for name, data in product_data.items()
         if data["quantity"] < threshold
     ]
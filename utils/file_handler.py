@@ -1,3 +1,42 @@
+import codecs
+import json
+import os
+
+ENCODINGS = ["utf-8", "latin-1", "cp1252"]
+
+# Decode error handler for the sales readers. The encoding is sniffed from
+# a prefix, so a stray byte further down (a latin-1 "é" in a file that
+# starts as plain UTF-8) is decoded as latin-1 rather than replaced with
+# U+FFFD, and counted so the reader can warn instead of corrupting silently
+DECODE_FALLBACK = "sales-latin-1-fallback"
+_fallback_bytes = [0]
+
+
+def _latin1_fallback(error):
+    bad = error.object[error.start:error.end]
+    _fallback_bytes[0] += len(bad)
+    return bad.decode("latin-1"), error.end
+
+
+codecs.register_error(DECODE_FALLBACK, _latin1_fallback)
+
+
+def fallback_bytes():
+    """
+    Returns: bytes decoded through DECODE_FALLBACK so far in this process
+    """
+    return _fallback_bytes[0]
+
+
+def warn_fallback(filename, count):
+    """
+    Prints a warning when count bytes of filename were decoded as latin-1
+    """
+    if count:
+        print(f"Warning: {count} byte(s) in {filename} did not decode with the detected encoding; "
+              f"read them as latin-1")
+
+
 def read_sales_file(file_path):
     records = []
     total_lines = 0
@@ -15,32 +54,85 @@ def read_sales_file(file_path):
     return records, total_lines
 
 
+def detect_encoding(filename, sample_size=64 * 1024):
+    """
+    Picks the first supported encoding that decodes a prefix of the file
+    Returns: encoding name (None if nothing matches)
+    """
+    with open(filename, "rb") as file:
+        sample = file.read(sample_size)
+        at_eof = not file.read(1)
+
+    for encoding in ENCODINGS:
+        # Incremental decoder so a multi-byte character cut at the end
+        # of the sample is not mistaken for bad data
+        decoder = codecs.getincrementaldecoder(encoding)()
+        try:
+            decoder.decode(sample, final=at_eof)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+
+    return None
+
+
+def iter_sales_data(filename):
+    """
+    Streams sales data lines from file without loading it into memory
+    Yields: raw transaction lines (header and empty lines skipped)
+    """
+    try:
+        encoding = detect_encoding(filename)
+    except FileNotFoundError:
+        print("Error: File not found")
+        return
+
+    if encoding is None:
+        print("Error: Unable to read file with supported encodings")
+        return
+
+    # The encoding is decided from the sniffed prefix, so a stray bad byte
+    # further down falls back to latin-1 instead of aborting a half-consumed stream
+    since = fallback_bytes()
+    with open(filename, "r", encoding=encoding, errors=DECODE_FALLBACK) as file:
+        next(file, None)  # skip header
+
+        for line in file:
+            line = line.strip()
+            if line:
+                yield line
+
+    warn_fallback(filename, fallback_bytes() - since)
+
+
 def read_sales_data(filename):
     """
     Reads sales data from file handling encoding issues
     Returns: list of raw transaction lines
     """
-    encodings = ["utf-8", "latin-1", "cp1252"]
+    return list(iter_sales_data(filename))
 
-    for encoding in encodings:
-        try:
-            with open(filename, "r", encoding=encoding) as file:
-                lines = file.readlines()
 
-                raw_lines = []
-                for line in lines[1:]:  # skip header
-                    line = line.strip()
-                    if line:
-                        raw_lines.append(line)
+def write_json_atomic(data, filename):
+    """
+    Writes JSON to a temp file and renames it over the target, so readers
+    never see a half-written file
+    """
+    tmp_file = filename + ".tmp"
 
-                return raw_lines
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(data, f)
 
-        except UnicodeDecodeError:
-            continue
+    os.replace(tmp_file, filename)
+
+
+def write_text_atomic(text, filename):
+    """
+    Text counterpart of write_json_atomic()
+    """
+    tmp_file = filename + ".tmp"
 
-        except FileNotFoundError:
-            print("Error: File not found")
-            return []
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        f.write(text)
 
-    print("Error: Unable to read file with supported encodings")
-    return []
+    os.replace(tmp_file, filename)
@@ -0,0 +1,200 @@
+import hashlib
+import json
+import os
+
+from utils.aggregator import SalesAggregates, ApproximateSalesAggregates, aggregates_from_dict
+from utils.file_handler import detect_encoding, write_json_atomic, DECODE_FALLBACK, fallback_bytes, warn_fallback
+from utils.validation import VALIDATION_RULES, ValidationReport
+
+STATE_FILE = "data/sales_state.json"
+STATE_VERSION = 3
+
+# Bytes hashed at the start of the file and just before the saved offset;
+# a mismatch means the already-processed part of the file was rewritten
+FINGERPRINT_BYTES = 4096
+
+
+def _fingerprint(file, start, end):
+    file.seek(start)
+    return hashlib.sha256(file.read(end - start)).hexdigest()
+
+
+def _file_fingerprint(filename, offset):
+    with open(filename, "rb") as file:
+        head = _fingerprint(file, 0, min(offset, FINGERPRINT_BYTES))
+        tail = _fingerprint(file, max(offset - FINGERPRINT_BYTES, 0), offset)
+    return head, tail
+
+
+def load_state(state_file=STATE_FILE):
+    """
+    Loads the saved incremental state
+    Returns: state dictionary, or None if missing or unreadable
+    """
+    try:
+        with open(state_file, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+    if state.get("version") != STATE_VERSION:
+        return None
+
+    return state
+
+
+def save_state(state, state_file=STATE_FILE):
+    """
+    Writes the state atomically so a crash never leaves a half-written file
+    """
+    write_json_atomic(state, state_file)
+
+
+def is_state_valid(state, filename, sketch_options=None):
+    """
+    Checks that the file still starts with the bytes the state was built from
+    and, for a state with aggregates, that they were built with the same
+    sketch_options (None: exact)
+    """
+    if state is None or state.get("source") != os.path.abspath(filename):
+        return False
+
+    if "aggregates" in state and state["aggregates"].get("sketch_options") != sketch_options:
+        return False
+
+    # None: not even the header line is complete yet
+    offset = state["offset"] or 0
+
+    if os.path.getsize(filename) < offset:
+        # Truncated
+        return False
+
+    head, tail = _file_fingerprint(filename, offset)
+    return head == state["head_hash"] and tail == state["tail_hash"]
+
+
+def _iter_new_lines(file, encoding, position):
+    """
+    Yields (decoded line, end offset) for every complete line after position
+    A trailing line without a newline is left for the next run
+    """
+    file.seek(position)
+
+    for raw in file:
+        if not raw.endswith(b"\n"):
+            break
+
+        position += len(raw)
+        yield raw.decode(encoding, errors=DECODE_FALLBACK).strip(), position
+
+
+def tail_state(filename, offset):
+    """
+    Identifies how far into which file processing has got: the offset and
+    fingerprints of the bytes around it (checked by is_state_valid())
+    """
+    head, tail = _file_fingerprint(filename, offset or 0)
+    return {"source": os.path.abspath(filename), "offset": offset, "head_hash": head, "tail_hash": tail}
+
+
+def read_appended(filename, encoding, offset, aggregates, limit=None, report=None, quarantine=None):
+    """
+    Validates the complete lines after offset (VALIDATION_RULES, raw
+    lines) and folds the valid ones into the aggregates
+    offset: None starts after the header line, and stays None (nothing is
+    read) until the header line is complete
+    limit: stop after this many non-empty lines (the rest is read next time)
+    report: ValidationReport the lines are counted into
+    quarantine: text file receiving every rejected line verbatim
+    Returns: (new offset, lines read, rejected lines among them)
+    """
+    report = report if report is not None else ValidationReport()
+    total, valid = report.total, report.valid
+
+    with open(filename, "rb") as file:
+        if offset is None:
+            header = file.readline()
+            if not header.endswith(b"\n"):
+                return None, 0, 0
+            offset = len(header)
+
+        lines = _iter_new_lines(file, encoding, offset)
+        consumed = [offset]
+
+        def non_empty_lines():
+            count = 0
+            for line, end in lines:
+                if not line:
+                    consumed[0] = end
+                    continue
+                if count == limit:
+                    return
+                count += 1
+                consumed[0] = end
+                yield line
+
+        for t in VALIDATION_RULES.iter_valid_lines(non_empty_lines(), report, quarantine):
+            aggregates.add(t)
+
+    read = report.total - total
+    return consumed[0], read, read - (report.valid - valid)
+
+
+def build_state(filename, encoding, offset, validation, aggregates):
+    """
+    validation: ValidationReport of every line up to offset
+    Returns: the state dictionary saved by save_state()
+    """
+    return {
+        "version": STATE_VERSION,
+        **tail_state(filename, offset),
+        "encoding": encoding,
+        "validation": validation.to_dict(),
+        "aggregates": aggregates.to_dict()
+    }
+
+
+def update_incremental(filename, state_file=STATE_FILE, sketch_options=None, quarantine_file=None):
+    """
+    Parses only the lines appended since the last run and merges them into
+    the persisted aggregates; rebuilds from scratch if the file was
+    truncated or rewritten, or the state was saved with other sketch_options
+    sketch_options: keep approximate aggregates (see ApproximateSalesAggregates)
+    quarantine_file: rejected lines of this run are appended to this file
+    (it is started afresh when the state is rebuilt)
+    Returns: (aggregates, state) where state["new_rows"] counts this run's
+    lines and state["report"] is the ValidationReport of every line so far
+    """
+    state = load_state(state_file)
+
+    if is_state_valid(state, filename, sketch_options):
+        aggregates = aggregates_from_dict(state["aggregates"])
+        encoding = state["encoding"]
+        offset = state["offset"]
+        report = ValidationReport.from_dict(state["validation"])
+        mode = "a"
+    else:
+        if sketch_options is not None:
+            aggregates = ApproximateSalesAggregates(**sketch_options)
+        else:
+            aggregates = SalesAggregates()
+        encoding = detect_encoding(filename) or "latin-1"
+        offset = None
+        report = ValidationReport()
+        mode = "w"
+
+    since = fallback_bytes()
+    if quarantine_file is None:
+        offset, new_rows, _ = read_appended(filename, encoding, offset, aggregates, report=report)
+    else:
+        with open(quarantine_file, mode, encoding="utf-8") as quarantine:
+            offset, new_rows, _ = read_appended(filename, encoding, offset, aggregates,
+                                                report=report, quarantine=quarantine)
+    warn_fallback(filename, fallback_bytes() - since)
+
+    state = build_state(filename, encoding, offset, report, aggregates)
+    save_state(state, state_file)
+
+    state["new_rows"] = new_rows
+    state["report"] = report
+    return aggregates, state
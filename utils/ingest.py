@@ -0,0 +1,103 @@
+from utils.file_handler import read_sales_data
+from utils.instrumentation import PipelineProfiler
+from utils.mmap_reader import iter_mmap_lines
+from utils.parallel_parser import parallel_validate
+from utils.snapshot import SNAPSHOT_DIR, snapshot_source, load_snapshot, save_snapshot
+from utils.validation import VALIDATION_RULES, FIELD_COUNT, NUMBER_FORMAT
+
+
+class Ingested:
+    """
+    Validated transactions of one sales file and where they came from
+
+    source is "snapshot", "parallel", "mmap" or "text". validation is the
+    ValidationReport, or None when the rows came from the snapshot (which
+    keeps only the invalid count). lines is the number of lines read on
+    the text path, parsed the number of records parsed.
+    """
+
+    def __init__(self, valid, invalid, validation, source, parsed, lines=None):
+        self.valid = valid
+        self.invalid = invalid
+        self.validation = validation
+        self.source = source
+        self.parsed = parsed
+        self.lines = lines
+
+
+def validate_records(records, quarantine_file=None, raw_lines=False):
+    """
+    Runs VALIDATION_RULES over parsed records, or over raw lines (any
+    iterable) when raw_lines is true, which also counts malformed lines and
+    quarantines every rejected line verbatim
+    Returns: (list of valid records, ValidationReport)
+    """
+    validate = VALIDATION_RULES.validate_lines if raw_lines else VALIDATION_RULES.validate
+
+    if quarantine_file is None:
+        return validate(records)
+    with open(quarantine_file, "w", encoding="utf-8") as quarantine:
+        return validate(records, quarantine)
+
+
+def ingest_sales(filename, use_snapshot=True, quarantine_file=None, workers=None, use_mmap=False,
+                 profiler=None, snapshot_dir=SNAPSHOT_DIR):
+    """
+    Read, parse and validate: the part of every full pipeline run before
+    filters and analytics
+
+    use_snapshot: load the rows saved by the last run while the file is
+    unchanged, and save a new snapshot after parsing when it has changed
+    quarantine_file: write every rejected line verbatim, with the rules it
+    failed, to this file (always parses: a snapshot holds no rejected rows)
+    workers / use_mmap: parse with worker processes / memory-mapped; every
+    path validates raw lines, so lines that fail to parse are counted too
+    profiler: records each step as a stage (PipelineProfiler)
+    Returns: Ingested
+    """
+    profiler = profiler or PipelineProfiler()
+
+    source = None
+    if use_snapshot:
+        with profiler.stage("load_snapshot") as stage:
+            source = snapshot_source(filename)
+            snapshot = load_snapshot(filename, source, snapshot_dir) if quarantine_file is None else None
+            stage["rows"] = len(snapshot[0]) if snapshot else 0
+        if snapshot is not None:
+            valid, invalid = snapshot
+            return Ingested(valid, invalid, None, "snapshot", len(valid))
+
+    # Lines are validated as they are parsed, so lines with the wrong field
+    # count or bad numbers are counted and quarantined on every path
+    lines = None
+    if workers:
+        kind = "parallel"
+        with profiler.stage("parallel_validate") as stage:
+            if quarantine_file is None:
+                valid, validation = parallel_validate(filename, workers)
+            else:
+                with open(quarantine_file, "w", encoding="utf-8") as quarantine:
+                    valid, validation = parallel_validate(filename, workers, quarantine)
+            stage["rows"] = validation.total
+    elif use_mmap:
+        kind = "mmap"
+        with profiler.stage("mmap_validate") as stage:
+            valid, validation = validate_records(iter_mmap_lines(filename), quarantine_file, raw_lines=True)
+            stage["rows"] = validation.total
+    else:
+        kind = "text"
+        with profiler.stage("read_sales_data") as stage:
+            raw_lines = read_sales_data(filename)
+            stage["rows"] = lines = len(raw_lines)
+
+        with profiler.stage("parse_transactions", rows=lines):
+            valid, validation = validate_records(raw_lines, quarantine_file, raw_lines=True)
+        del raw_lines
+
+    parsed = validation.total - validation.by_rule[FIELD_COUNT] - validation.by_rule[NUMBER_FORMAT]
+
+    if source is not None:
+        with profiler.stage("save_snapshot", rows=len(valid)):
+            save_snapshot(filename, valid, validation.rejected, source, snapshot_dir)
+
+    return Ingested(valid, validation.rejected, validation, kind, parsed, lines)
@@ -0,0 +1,254 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+PROFILE_DIR = "output/profiles"
+
+
+def current_rss():
+    """
+    Resident set size in bytes (None where /proc is not available)
+    """
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def peak_rss():
+    """
+    Peak resident set size of the process in bytes
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class SamplingProfiler:
+    """
+    Low-overhead sampler: records the calling thread's stack every interval
+    Returns the hottest frames instead of exact call counts like cProfile
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.samples = Counter()
+        self.total = 0
+        self._thread_id = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            seen = set()
+            while frame is not None:
+                code = frame.f_code
+                key = f"{code.co_filename}:{code.co_firstlineno}({code.co_name})"
+                # Count each function once per sample (inclusive time)
+                if key not in seen:
+                    self.samples[key] += 1
+                    seen.add(key)
+                frame = frame.f_back
+            self.total += 1
+
+    def start(self):
+        self._thread_id = threading.get_ident()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def report(self, limit=25):
+        lines = [f"{self.total} samples every {self.interval * 1000:.1f} ms (inclusive)"]
+        for key, count in self.samples.most_common(limit):
+            share = count / self.total * 100 if self.total else 0
+            lines.append(f"{share:6.1f}%  {count:>7}  {key}")
+        return "\n".join(lines) + "\n"
+
+
+class PipelineProfiler:
+    """
+    Records per-stage metrics for a pipeline run
+
+    For every stage: wall time, CPU time, rows processed and rows/s, RSS
+    before/after, process peak RSS and, with trace_memory, the tracemalloc
+    peak. Stages listed in profile_stages (or "all") are also captured
+    with cProfile or the sampling profiler into profile_dir.
+    """
+
+    def __init__(self, trace_memory=False, profile_stages=(), profile_mode="cprofile",
+                 profile_dir=PROFILE_DIR):
+        self.trace_memory = trace_memory
+        self.profile_stages = set(profile_stages)
+        self.profile_mode = profile_mode
+        self.profile_dir = profile_dir
+        self.records = []
+        self.started = time.time()
+
+    def _should_profile(self, name):
+        return "all" in self.profile_stages or name in self.profile_stages
+
+    @contextmanager
+    def stage(self, name, rows=None):
+        """
+        Measures the enclosed block; set info["rows"] inside the block when
+        the row count is only known afterwards
+        """
+        info = {"rows": rows}
+        record = {"stage": name, "status": "ok"}
+
+        profiler = None
+        if self._should_profile(name):
+            profiler = cProfile.Profile() if self.profile_mode == "cprofile" else SamplingProfiler()
+
+        tracing_here = self.trace_memory and not tracemalloc.is_tracing()
+        if tracing_here:
+            tracemalloc.start()
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            traced_before, _ = tracemalloc.get_traced_memory()
+
+        rss_before = current_rss()
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        if profiler is not None:
+            if isinstance(profiler, cProfile.Profile):
+                profiler.enable()
+            else:
+                profiler.start()
+
+        try:
+            yield info
+        except BaseException as e:
+            record["status"] = "error"
+            record["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            if profiler is not None:
+                if isinstance(profiler, cProfile.Profile):
+                    profiler.disable()
+                else:
+                    profiler.stop()
+
+            wall = time.perf_counter() - wall_start
+            cpu = time.process_time() - cpu_start
+            rows = info.get("rows")
+
+            record.update({
+                "wall_seconds": round(wall, 6),
+                "cpu_seconds": round(cpu, 6),
+                "rows": rows,
+                "rows_per_sec": round(rows / wall, 1) if rows is not None and wall > 0 else None,
+                "rss_before_bytes": rss_before,
+                "rss_after_bytes": current_rss(),
+                "peak_rss_bytes": peak_rss(),
+            })
+
+            if self.trace_memory:
+                traced_after, traced_peak = tracemalloc.get_traced_memory()
+                record["tracemalloc_delta_bytes"] = traced_after - traced_before
+                record["tracemalloc_peak_bytes"] = traced_peak - traced_before
+                if tracing_here:
+                    tracemalloc.stop()
+
+            if profiler is not None:
+                record["profile"] = self._save_profile(name, profiler)
+
+            self.records.append(record)
+
+    def _save_profile(self, name, profiler):
+        os.makedirs(self.profile_dir, exist_ok=True)
+        base = os.path.join(self.profile_dir, name)
+
+        if isinstance(profiler, cProfile.Profile):
+            profiler.dump_stats(base + ".prof")
+            text = io.StringIO()
+            pstats.Stats(profiler, stream=text).sort_stats("cumulative").print_stats(25)
+            with open(base + ".txt", "w", encoding="utf-8") as f:
+                f.write(text.getvalue())
+            return base + ".prof"
+
+        with open(base + ".samples.txt", "w", encoding="utf-8") as f:
+            f.write(profiler.report())
+        return base + ".samples.txt"
+
+    def to_dict(self):
+        return {
+            "started": self.started,
+            "total_wall_seconds": round(sum(r["wall_seconds"] for r in self.records), 6),
+            "stages": self.records
+        }
+
+    def to_prometheus(self, prefix="sales_pipeline"):
+        """
+        Renders the stage metrics in the Prometheus text exposition format
+        """
+        metrics = [
+            ("wall_seconds", "gauge", "Wall-clock time spent in the stage"),
+            ("cpu_seconds", "gauge", "CPU time spent in the stage"),
+            ("rows", "gauge", "Rows processed by the stage"),
+            ("rows_per_sec", "gauge", "Stage throughput"),
+            ("peak_rss_bytes", "gauge", "Process peak RSS after the stage"),
+            ("tracemalloc_peak_bytes", "gauge", "Peak Python allocations during the stage"),
+        ]
+        lines = []
+
+        for key, kind, help_text in metrics:
+            samples = [r for r in self.records if r.get(key) is not None]
+            if not samples:
+                continue
+            lines.append(f"# HELP {prefix}_stage_{key} {help_text}")
+            lines.append(f"# TYPE {prefix}_stage_{key} {kind}")
+            for r in samples:
+                lines.append(
+                    f'{prefix}_stage_{key}{{stage="{r["stage"]}",status="{r["status"]}"}} {r[key]}'
+                )
+
+        return "\n".join(lines) + "\n"
+
+    def write(self, filename):
+        """
+        Writes metrics as Prometheus text (.prom) or JSON (anything else)
+        """
+        directory = os.path.dirname(filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with open(filename, "w", encoding="utf-8") as f:
+            if filename.endswith(".prom"):
+                f.write(self.to_prometheus())
+            else:
+                json.dump(self.to_dict(), f, indent=2)
+
+    def summary(self):
+        """
+        Human-readable per-stage table
+        """
+        lines = [f"{'Stage':<26}{'Wall':>10}{'CPU':>10}{'Rows':>12}{'Rows/s':>14}"]
+        for r in self.records:
+            rows = f"{r['rows']:,}" if r["rows"] is not None else "-"
+            rate = f"{r['rows_per_sec']:,.0f}" if r["rows_per_sec"] is not None else "-"
+            lines.append(
+                f"{r['stage']:<26}{r['wall_seconds']:>9.3f}s{r['cpu_seconds']:>9.3f}s{rows:>12}{rate:>14}"
+                + ("  FAILED" if r["status"] != "ok" else "")
+            )
+        return "\n".join(lines)
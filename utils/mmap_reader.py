@@ -0,0 +1,151 @@
+import mmap
+import os
+import re
+
+from utils.file_handler import detect_encoding, iter_sales_data, DECODE_FALLBACK, fallback_bytes, warn_fallback
+from utils.data_processor import iter_transactions
+from utils.records import Transaction
+
+# Lines are decoded and split a block at a time; blocks always end on "\n"
+BLOCK_SIZE = 4 * 1024 * 1024
+
+# Text mode also ends lines at a bare "\r"; such files take the text path
+LONE_CR = re.compile(rb"\r(?!\n)")
+
+
+def _lone_cr(mm):
+    return mm.find(b"\r") >= 0 and LONE_CR.search(mm) is not None
+
+
+def has_lone_cr(filename):
+    """
+    Returns: whether any line of the file ends with a bare "\r", which text
+    mode treats as a line break but "\n"-based splitting does not
+    """
+    with open(filename, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return False
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return _lone_cr(mm)
+
+
+def iter_line_blocks(mm, start, block_size=BLOCK_SIZE):
+    """
+    Yields byte blocks of the mapped file from start, each ending on a line boundary
+    """
+    size = len(mm)
+
+    while start < size:
+        end = mm.find(b"\n", min(start + block_size, size))
+        end = size if end < 0 else end + 1
+        yield mm[start:end]
+        start = end
+
+
+def _open_mapped(filename):
+    """
+    Returns: (file, mmap, encoding), or None when the file cannot be mapped
+    or needs the text-mode reader
+    """
+    try:
+        encoding = detect_encoding(filename)
+    except FileNotFoundError:
+        print("Error: File not found")
+        return None
+
+    if encoding is None:
+        print("Error: Unable to read file with supported encodings")
+        return None
+
+    file = open(filename, "rb")
+    if os.fstat(file.fileno()).st_size == 0:
+        file.close()
+        return None
+
+    mm = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    if hasattr(mm, "madvise"):
+        mm.madvise(mmap.MADV_SEQUENTIAL)
+
+    if _lone_cr(mm):
+        mm.close()
+        file.close()
+        return "text"
+
+    return file, mm, encoding
+
+
+def iter_mmap_lines(filename, block_size=BLOCK_SIZE):
+    """
+    Memory-mapped equivalent of iter_sales_data()
+    Yields: raw transaction lines (header and empty lines skipped)
+    """
+    opened = _open_mapped(filename)
+    if opened == "text":
+        yield from iter_sales_data(filename)
+        return
+    if opened is None:
+        return
+
+    file, mm, encoding = opened
+    since = fallback_bytes()
+    with file, mm:
+        body = mm.find(b"\n") + 1  # skip header
+        if not body:
+            return
+
+        for block in iter_line_blocks(mm, body, block_size):
+            for line in block.decode(encoding, errors=DECODE_FALLBACK).split("\n"):
+                line = line.strip()
+                if line:
+                    yield line
+
+    warn_fallback(filename, fallback_bytes() - since)
+
+
+def iter_mmap_transactions(filename, block_size=BLOCK_SIZE):
+    """
+    Memory-mapped equivalent of iter_transactions(iter_sales_data(filename))
+
+    Line boundaries are found on the raw bytes and every block is decoded in
+    one call. Splitting and number parsing run in a single loop instead of
+    through two chained generators.
+    """
+    opened = _open_mapped(filename)
+    if opened == "text":
+        yield from iter_transactions(iter_sales_data(filename))
+        return
+    if opened is None:
+        return
+
+    file, mm, encoding = opened
+    since = fallback_bytes()
+    with file, mm:
+        body = mm.find(b"\n") + 1  # skip header
+        if not body:
+            return
+
+        for block in iter_line_blocks(mm, body, block_size):
+            for line in block.decode(encoding, errors=DECODE_FALLBACK).split("\n"):
+                parts = line.strip().split("|")
+
+                if len(parts) != 8:
+                    continue
+
+                tid, date, pid, pname, qty, price, cid, region = parts
+
+                try:
+                    qty = int(qty.replace(",", ""))
+                    price = float(price.replace(",", ""))
+                except ValueError:
+                    continue
+
+                yield Transaction(tid, date, pid, pname.replace(",", ""), qty, price, cid, region)
+
+    warn_fallback(filename, fallback_bytes() - since)
+
+
+def read_mmap_transactions(filename, block_size=BLOCK_SIZE):
+    """
+    Returns: list of parsed transactions, same as parse_transactions(read_sales_data(filename))
+    """
+    return list(iter_mmap_transactions(filename, block_size))
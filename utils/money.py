@@ -0,0 +1,28 @@
+import math
+
+PAISE_PER_RUPEE = 100
+
+
+def to_paise(rupees):
+    """
+    Rupee price -> integer paise, rounded to the nearest paisa
+    Exact for any price written with at most two decimals (up to ~10^13 rupees)
+    Returns: None for nan / infinite prices
+    """
+    if not math.isfinite(rupees):
+        return None
+    return round(rupees * PAISE_PER_RUPEE)
+
+
+def to_rupees(paise):
+    """
+    Integer paise -> rupees as a float (correctly rounded, no accumulated error)
+    """
+    return paise / PAISE_PER_RUPEE
+
+
+def amount_paise(t):
+    """
+    Quantity * UnitPrice of a transaction dict in integer paise
+    """
+    return t["Quantity"] * to_paise(t["UnitPrice"])
@@ -0,0 +1,329 @@
+import gzip
+import io
+import json
+import math
+import os
+import struct
+import sys
+import time
+from array import array
+from itertools import islice
+from operator import itemgetter
+
+try:
+    import zstandard
+except ImportError:  # zstd output is optional
+    zstandard = None
+
+ENRICHED_HEADERS = [
+    "TransactionID", "Date", "ProductID", "ProductName",
+    "Quantity", "UnitPrice", "CustomerID", "Region",
+    "API_Category", "API_Brand", "API_Rating", "API_Match"
+]
+
+# Column types used by the binary columnar format
+ENRICHED_SCHEMA = {
+    "TransactionID": "str", "Date": "str", "ProductID": "str", "ProductName": "str",
+    "Quantity": "int", "UnitPrice": "float", "CustomerID": "str", "Region": "str",
+    "API_Category": "str", "API_Brand": "str", "API_Rating": "float", "API_Match": "bool"
+}
+
+BUFFER_SIZE = 1024 * 1024
+BATCH_SIZE = 10000
+
+FORMATS = ("txt", "gz", "zst", "col")
+
+COLUMNAR_MAGIC = b"SALESCOL1\n"
+# Dictionary code used for missing (None) strings
+NULL_CODE = 0xFFFFFFFF
+
+
+def detect_format(filename):
+    """
+    Picks the output format from the file extension (default: txt)
+    """
+    for fmt in FORMATS[1:]:
+        if filename.endswith("." + fmt):
+            return fmt
+    return "txt"
+
+
+def open_text_output(filename, fmt="txt"):
+    """
+    Opens a large-buffered text stream, compressed according to fmt
+    """
+    if fmt == "gz":
+        return io.TextIOWrapper(
+            io.BufferedWriter(gzip.open(filename, "wb", compresslevel=6), BUFFER_SIZE),
+            encoding="utf-8"
+        )
+
+    if fmt == "zst":
+        if zstandard is None:
+            raise ImportError("zstandard is required for .zst output (pip install zstandard)")
+        raw = open(filename, "wb")
+        return io.TextIOWrapper(
+            io.BufferedWriter(zstandard.ZstdCompressor().stream_writer(raw), BUFFER_SIZE),
+            encoding="utf-8"
+        )
+
+    return open(filename, "w", encoding="utf-8", buffering=BUFFER_SIZE)
+
+
+def open_text_input(filename, fmt="txt"):
+    if fmt == "gz":
+        return gzip.open(filename, "rt", encoding="utf-8")
+
+    if fmt == "zst":
+        if zstandard is None:
+            raise ImportError("zstandard is required for .zst input (pip install zstandard)")
+        raw = open(filename, "rb")
+        return io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(raw), encoding="utf-8")
+
+    return open(filename, "r", encoding="utf-8")
+
+
+def iter_value_batches(rows, headers, batch_size=BATCH_SIZE):
+    """
+    Yields lists of value tuples (one per row, in header order)
+    Missing keys read as None
+    """
+    headers = tuple(headers)
+    getter = itemgetter(*headers)
+    rows = iter(rows)
+
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return
+
+        try:
+            cls = batch[0].__class__
+            if getattr(cls, "COLUMNS", None) == headers:
+                # Records that know their column order skip the per-key lookups
+                values = [t.to_tuple() if t.__class__ is cls else getter(t) for t in batch]
+            else:
+                values = [getter(t) for t in batch]
+        except KeyError:
+            values = [tuple(t.get(h) for h in headers) for t in batch]
+
+        if len(headers) == 1:
+            values = [(v,) for v in values]
+
+        yield values
+
+
+def iter_row_batches(rows, headers, batch_size=BATCH_SIZE):
+    """
+    Serializes rows into pipe-delimited text, batch_size lines per string
+    None values become empty fields
+    """
+    for values in iter_value_batches(rows, headers, batch_size):
+        yield "".join([
+            "|".join(["" if v is None else str(v) for v in row]) + "\n"
+            for row in values
+        ])
+
+
+def write_delimited(rows, filename, headers=ENRICHED_HEADERS, fmt="txt"):
+    """
+    Writes pipe-delimited text (optionally gzip/zstd compressed) in batches
+    Returns: number of rows written
+    """
+    count = 0
+
+    with open_text_output(filename, fmt) as f:
+        f.write("|".join(headers) + "\n")
+
+        for chunk in iter_row_batches(rows, headers):
+            f.write(chunk)
+            count += chunk.count("\n")
+
+    return count
+
+
+def _write_block(f, data):
+    f.write(struct.pack("<Q", len(data)))
+    f.write(data)
+
+
+def _read_block(f):
+    (length,) = struct.unpack("<Q", f.read(8))
+    return f.read(length)
+
+
+def write_columnar(rows, filename, schema=ENRICHED_SCHEMA, metadata=None):
+    """
+    Writes rows as a compact binary columnar file
+
+    Layout: magic, JSON header block, then per column a data block (and a
+    dictionary block for strings). Strings are dictionary-encoded as uint32
+    codes, ints as int64, floats as float64 (NaN for None), bools as int8.
+    metadata: optional JSON-serializable value stored in the header
+    Returns: number of rows written
+    """
+    names = list(schema)
+    lookups = {name: {None: NULL_CODE} for name in names if schema[name] == "str"}
+    columns = {
+        name: array({"str": "I", "int": "q", "float": "d", "bool": "b"}[kind])
+        for name, kind in schema.items()
+    }
+
+    for values in iter_value_batches(rows, names):
+        # Transpose the batch so each column is encoded in one tight loop
+        for name, column in zip(names, zip(*values)):
+            kind = schema[name]
+
+            if kind == "str":
+                lookup = lookups[name]
+                codes = []
+                for value in column:
+                    code = lookup.get(value)
+                    if code is None:
+                        code = lookup[value] = len(lookup) - 1
+                    codes.append(code)
+                columns[name].extend(codes)
+            elif kind == "float":
+                columns[name].extend([math.nan if v is None else v for v in column])
+            else:
+                # int/bool columns have no null marker; missing values load as 0/False
+                columns[name].extend([0 if v is None else int(v) for v in column])
+
+    header = {
+        "rows": len(columns[names[0]]) if names else 0,
+        "byteorder": sys.byteorder,
+        "columns": [[name, schema[name]] for name in names]
+    }
+    if metadata is not None:
+        header["metadata"] = metadata
+
+    with open(filename, "wb", buffering=BUFFER_SIZE) as f:
+        f.write(COLUMNAR_MAGIC)
+        _write_block(f, json.dumps(header).encode("utf-8"))
+
+        for name in names:
+            _write_block(f, columns[name].tobytes())
+            if schema[name] == "str":
+                _write_block(f, json.dumps(list(lookups[name])[1:]).encode("utf-8"))
+
+    return header["rows"]
+
+
+def _read_columnar_header(f, filename):
+    if f.read(len(COLUMNAR_MAGIC)) != COLUMNAR_MAGIC:
+        raise ValueError(f"{filename} is not a columnar sales file")
+    return json.loads(_read_block(f))
+
+
+def read_columnar_header(filename):
+    """
+    Reads only the header of a file written by write_columnar()
+    Returns: dict with rows, byteorder, columns and (if written) metadata
+    """
+    with open(filename, "rb") as f:
+        return _read_columnar_header(f, filename)
+
+
+def load_columnar(filename):
+    """
+    Loads a file written by write_columnar()
+    Returns: (row count, {column name: list of values})
+    """
+    with open(filename, "rb") as f:
+        header = _read_columnar_header(f, filename)
+        columns = {}
+
+        for name, kind in header["columns"]:
+            data = array({"str": "I", "int": "q", "float": "d", "bool": "b"}[kind])
+            data.frombytes(_read_block(f))
+            if header["byteorder"] != sys.byteorder and data.itemsize > 1:
+                data.byteswap()
+
+            if kind == "str":
+                values = json.loads(_read_block(f))
+                columns[name] = [None if code == NULL_CODE else values[code] for code in data]
+            elif kind == "float":
+                columns[name] = [None if math.isnan(v) else v for v in data]
+            elif kind == "bool":
+                columns[name] = [bool(v) for v in data]
+            else:
+                columns[name] = data.tolist()
+
+    return header["rows"], columns
+
+
+def _parse_enriched_line(line, headers):
+    row = dict(zip(headers, line.rstrip("\n").split("|")))
+
+    for key, value in row.items():
+        kind = ENRICHED_SCHEMA.get(key, "str")
+        if value == "":
+            row[key] = None
+        elif kind == "int":
+            row[key] = int(value)
+        elif kind == "float":
+            row[key] = float(value)
+        elif kind == "bool":
+            row[key] = value == "True"
+
+    return row
+
+
+def load_enriched_data(filename, fmt=None):
+    """
+    Reloads enriched data written in any supported format
+    Returns: list of dictionaries
+    """
+    fmt = fmt or detect_format(filename)
+
+    if fmt == "col":
+        rows, columns = load_columnar(filename)
+        names = list(columns)
+        return [dict(zip(names, values)) for values in zip(*columns.values())] if rows else []
+
+    with open_text_input(filename, fmt) as f:
+        headers = f.readline().rstrip("\n").split("|")
+        return [_parse_enriched_line(line, headers) for line in f if line.strip()]
+
+
+def write_enriched_data(enriched_transactions, filename, fmt=None):
+    """
+    Writes enriched transactions in the format implied by the file extension
+    (.txt, .gz, .zst or .col) and measures the write
+    Returns: stats dict with rows, bytes, seconds and throughput
+    """
+    fmt = fmt or detect_format(filename)
+
+    start = time.perf_counter()
+    if fmt == "col":
+        rows = write_columnar(enriched_transactions, filename)
+    else:
+        rows = write_delimited(enriched_transactions, filename, fmt=fmt)
+    seconds = time.perf_counter() - start
+
+    size = os.path.getsize(filename)
+
+    return {
+        "format": fmt,
+        "rows": rows,
+        "bytes": size,
+        "seconds": seconds,
+        "rows_per_sec": rows / seconds if seconds else 0.0,
+        "mb_per_sec": size / seconds / 1e6 if seconds else 0.0
+    }
+
+
+def measure_write_throughput(enriched_transactions, base_path, formats=FORMATS):
+    """
+    Writes the same rows in every available format
+    Returns: {format: stats dict}
+    """
+    results = {}
+
+    for fmt in formats:
+        if fmt == "zst" and zstandard is None:
+            continue
+        filename = base_path if fmt == "txt" else f"{base_path}.{fmt}"
+        results[fmt] = write_enriched_data(enriched_transactions, filename, fmt=fmt)
+
+    return results
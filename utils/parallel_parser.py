@@ -0,0 +1,199 @@
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial as bind
+
+from utils.file_handler import detect_encoding, DECODE_FALLBACK, fallback_bytes, warn_fallback
+from utils.mmap_reader import has_lone_cr
+from utils.data_processor import (
+    iter_transactions,
+    show_filter_options,
+    filter_transactions
+)
+from utils.records import Transaction
+from utils.validation import VALIDATION_RULES, ValidationReport
+
+# Several chunks per worker keeps the pool busy when chunks parse unevenly
+CHUNKS_PER_WORKER = 4
+
+
+def split_byte_ranges(filename, chunks):
+    """
+    Splits the file body (after the header) into byte ranges that start
+    and end on line boundaries
+    Returns: list of (start, end) offsets
+    """
+    size = os.path.getsize(filename)
+
+    with open(filename, "rb") as file:
+        file.readline()  # skip header
+        body_start = file.tell()
+
+        boundaries = [body_start]
+        step = max((size - body_start) // max(chunks, 1), 1)
+
+        for i in range(1, chunks):
+            target = body_start + i * step
+            if target <= boundaries[-1]:
+                continue
+            if target >= size:
+                break
+
+            # Move to the first line that starts at or after target
+            file.seek(target - 1)
+            file.readline()
+            boundary = file.tell()
+
+            if boundary >= size:
+                break
+            if boundary > boundaries[-1]:
+                boundaries.append(boundary)
+
+        boundaries.append(size)
+
+    return [
+        (start, end)
+        for start, end in zip(boundaries, boundaries[1:])
+        if end > start
+    ]
+
+
+def _iter_range_lines(filename, start, end, encoding):
+    if start is None:
+        # Whole file in text mode (see _run_chunks); the caller warns about fallbacks
+        with open(filename, "r", encoding=encoding, errors=DECODE_FALLBACK) as file:
+            next(file, None)  # skip header
+            for line in file:
+                line = line.strip()
+                if line:
+                    yield line
+        return
+
+    with open(filename, "rb") as file:
+        file.seek(start)
+        data = file.read(end - start)
+
+    for line in data.decode(encoding, errors=DECODE_FALLBACK).split("\n"):
+        line = line.strip()
+        if line:
+            yield line
+
+
+def _parse_range(filename, start, end, encoding):
+    """
+    Worker: parses one byte range into compact row tuples
+    """
+    # Plain tuples pickle far smaller than records
+    return [
+        t.to_tuple()
+        for t in iter_transactions(_iter_range_lines(filename, start, end, encoding))
+    ]
+
+
+def _validate_range(filename, start, end, encoding, quarantine=False):
+    """
+    Worker: parses and validates the raw lines of one byte range
+    quarantine: also return the quarantine text of the rejected lines
+    Returns: (valid row tuples, ValidationReport dictionary, quarantine text
+    or None, bytes decoded as latin-1)
+    """
+    since = fallback_bytes()
+    report = ValidationReport()
+    rejected = io.StringIO() if quarantine else None
+    lines = _iter_range_lines(filename, start, end, encoding)
+
+    valid_rows = [t.to_tuple() for t in VALIDATION_RULES.iter_valid_lines(lines, report, rejected)]
+
+    return valid_rows, report.to_dict(), rejected.getvalue() if quarantine else None, fallback_bytes() - since
+
+
+def _run_chunks(worker, filename, workers):
+    workers = workers or os.cpu_count() or 1
+
+    try:
+        encoding = detect_encoding(filename)
+    except FileNotFoundError:
+        print("Error: File not found")
+        return []
+
+    if encoding is None:
+        print("Error: Unable to read file with supported encodings")
+        return []
+
+    if has_lone_cr(filename):
+        # Ranges are cut at "\n"; a file ending lines with a bare "\r" is
+        # parsed whole in text mode, as read_mmap_transactions() does
+        return [worker(filename, None, None, encoding)]
+
+    ranges = split_byte_ranges(filename, workers * CHUNKS_PER_WORKER)
+
+    if workers == 1:
+        return [worker(filename, start, end, encoding) for start, end in ranges]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(worker, filename, start, end, encoding)
+            for start, end in ranges
+        ]
+        # Results are collected in submission order so rows keep file order
+        return [future.result() for future in futures]
+
+
+def parallel_parse_transactions(filename, workers=None):
+    """
+    Parses the sales file across a process pool
+    Returns: the same list of Transaction records as parse_transactions(read_sales_data(filename))
+    """
+    transactions = []
+
+    for rows in _run_chunks(_parse_range, filename, workers):
+        transactions.extend(Transaction(*row) for row in rows)
+
+    return transactions
+
+
+def parallel_validate(filename, workers=None, quarantine=None):
+    """
+    Parses and validates the raw lines of the sales file across a process
+    pool, as VALIDATION_RULES.validate_lines(iter_sales_data(filename)) does
+    quarantine: text file receiving the rejected lines, in file order
+    Returns: (list of valid Transaction records, ValidationReport)
+    """
+    worker = bind(_validate_range, quarantine=quarantine is not None)
+    valid = []
+    report = ValidationReport()
+    fallback = 0
+
+    for rows, chunk_report, rejected, chunk_fallback in _run_chunks(worker, filename, workers):
+        valid.extend(Transaction(*row) for row in rows)
+        report.merge(ValidationReport.from_dict(chunk_report))
+        if rejected:
+            quarantine.write(rejected)
+        fallback += chunk_fallback
+
+    # Workers count in their own processes; report the total here
+    warn_fallback(filename, fallback)
+    return valid, report
+
+
+def parallel_validate_and_filter(filename, region=None, min_amount=None, max_amount=None, workers=None):
+    """
+    Parses and validates the sales file across a process pool
+    Returns: the same (valid_transactions, invalid_count, summary) as the
+    serial validate_and_filter path, counting lines that fail to parse as invalid
+    """
+    valid, report = parallel_validate(filename, workers)
+    total_input = report.total
+    invalid_count = report.rejected
+
+    show_filter_options(valid)
+
+    valid_transactions = filter_transactions(valid, region, min_amount, max_amount)
+
+    summary = {
+        "total_input": total_input,
+        "invalid": invalid_count,
+        "final_count": len(valid_transactions)
+    }
+
+    return valid_transactions, invalid_count, summary
@@ -0,0 +1,150 @@
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial as bind
+
+from utils.aggregator import SalesAggregates, ApproximateSalesAggregates, aggregates_from_dict
+from utils.file_handler import iter_sales_data, write_json_atomic
+from utils.validation import VALIDATION_RULES, ValidationReport
+
+PARTIAL_VERSION = 2
+PARTIAL_SUFFIX = ".json"
+
+
+class Partial:
+    """
+    Mergeable result of processing one or more sales files
+
+    aggregates holds every analytics metric in combinable form (see
+    SalesAggregates.merge); the ValidationReport and sources travel with it
+    so a merged partial still reports which rows were rejected, per rule,
+    and what it covers.
+    """
+
+    def __init__(self, aggregates=None, validation=None, sources=None):
+        self.aggregates = aggregates if aggregates is not None else SalesAggregates()
+        self.validation = validation if validation is not None else ValidationReport()
+        self.sources = sources or []
+
+    @property
+    def invalid(self):
+        return self.validation.rejected
+
+    def merge(self, other):
+        self.aggregates.merge(other.aggregates)
+        self.validation.merge(other.validation)
+        self.sources.extend(other.sources)
+        return self
+
+    def to_dict(self):
+        return {
+            "version": PARTIAL_VERSION,
+            "sources": self.sources,
+            "validation": self.validation.to_dict(),
+            "aggregates": self.aggregates.to_dict()
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(aggregates_from_dict(data["aggregates"]), ValidationReport.from_dict(data["validation"]),
+                   list(data["sources"]))
+
+
+def _new_aggregates(sketch_options):
+    if sketch_options is not None:
+        return ApproximateSalesAggregates(**sketch_options)
+    return SalesAggregates()
+
+
+def aggregate_file(filename, sketch_options=None, quarantine_file=None):
+    """
+    Streams one sales file through VALIDATION_RULES into a Partial
+    sketch_options: approximate aggregates (see ApproximateSalesAggregates)
+    quarantine_file: write every rejected line, with the rules it failed, here
+    """
+    partial = Partial(_new_aggregates(sketch_options), sources=[os.path.abspath(filename)])
+    add = partial.aggregates.add
+    lines = iter_sales_data(filename)
+
+    if quarantine_file is None:
+        for t in VALIDATION_RULES.iter_valid_lines(lines, partial.validation):
+            add(t)
+    else:
+        with open(quarantine_file, "w", encoding="utf-8") as quarantine:
+            for t in VALIDATION_RULES.iter_valid_lines(lines, partial.validation, quarantine):
+                add(t)
+
+    return partial
+
+
+def save_partial(partial, filename):
+    write_json_atomic(partial.to_dict(), filename)
+
+
+def load_partial(filename):
+    """
+    Returns: the Partial saved with save_partial()
+    Raises: ValueError if the file is not a partial of this version
+    """
+    with open(filename, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    if not isinstance(data, dict) or data.get("version") != PARTIAL_VERSION:
+        raise ValueError(f"{filename} is not a version {PARTIAL_VERSION} partial aggregate file")
+
+    return Partial.from_dict(data)
+
+
+def _load_or_aggregate(filename, quarantine_file=None, sketch_options=None):
+    if filename.endswith(PARTIAL_SUFFIX):
+        return load_partial(filename)
+    return aggregate_file(filename, sketch_options, quarantine_file)
+
+
+def _quarantine_parts(quarantine_file, count):
+    if quarantine_file is None:
+        return [None] * count
+    return [f"{quarantine_file}.part{i}" for i in range(count)]
+
+
+def _join_parts(quarantine_file, parts):
+    """
+    Concatenates the per-file quarantine parts in input order
+    """
+    with open(quarantine_file, "w", encoding="utf-8") as out:
+        for part in parts:
+            if os.path.exists(part):
+                with open(part, "r", encoding="utf-8") as f:
+                    out.write(f.read())
+                os.remove(part)
+
+
+def aggregate_files(filenames, workers=None, sketch_options=None, quarantine_file=None):
+    """
+    Processes sales files (and saved partials, *.json) independently and
+    reduces them in the order given
+    workers: process pool size; files are aggregated on separate cores
+    sketch_options: approximate aggregates; saved partials must have been
+    built with the same options
+    quarantine_file: rejected lines of every sales file, in input order
+    (saved partials only carry their counts)
+    Returns: the merged Partial, equal to processing the concatenated input
+    (within the sketch bounds when approximate)
+    Raises: ValueError when a saved partial was built in the other mode or
+    with other sketch options
+    """
+    load = bind(_load_or_aggregate, sketch_options=sketch_options)
+    parts = _quarantine_parts(quarantine_file, len(filenames))
+    if workers and workers > 1 and len(filenames) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(filenames))) as pool:
+            partials = list(pool.map(load, filenames, parts))
+    else:
+        partials = list(map(load, filenames, parts))
+
+    if quarantine_file is not None:
+        _join_parts(quarantine_file, parts)
+
+    merged = Partial(_new_aggregates(sketch_options))
+    for partial in partials:
+        merged.merge(partial)
+    return merged
@@ -0,0 +1,132 @@
+from bisect import bisect_left, bisect_right
+
+from utils.records import as_transaction
+
+
+class TransactionIndex:
+    """
+    Query layer built once over validated transactions
+
+    Hash indexes map Region, CustomerID, ProductID and Date to row
+    positions; amounts and dates are also kept sorted for range queries
+    via bisection. filter() returns exactly what filter_transactions()
+    returns for the same arguments, in the original order.
+    """
+
+    def __init__(self, valid_transactions):
+        self.transactions = list(valid_transactions)
+
+        self.by_region = {}
+        self.by_customer = {}
+        self.by_product = {}
+        self.by_date = {}
+        amounts = []
+
+        # Records for attribute access; the same objects when the input already is records
+        self.records = [as_transaction(t) for t in self.transactions]
+
+        for i, t in enumerate(self.records):
+            self.by_region.setdefault(t.region, []).append(i)
+            self.by_customer.setdefault(t.customer_id, []).append(i)
+            self.by_product.setdefault(t.product_id, []).append(i)
+            self.by_date.setdefault(t.date, []).append(i)
+            amounts.append(t.amount)
+
+        self.amounts = amounts
+
+        # Positions sorted by amount, with the matching sorted amounts for bisect
+        self.amount_order = sorted(range(len(amounts)), key=amounts.__getitem__)
+        self.sorted_amounts = [amounts[i] for i in self.amount_order]
+
+        self.sorted_dates = sorted(self.by_date)
+
+        # Composite region -> amount index for the common region + amount query
+        self.region_amounts = {}
+        for region, positions in self.by_region.items():
+            order = sorted(positions, key=amounts.__getitem__)
+            self.region_amounts[region] = ([amounts[i] for i in order], order)
+
+    def __len__(self):
+        return len(self.transactions)
+
+    def regions(self):
+        return set(self.by_region)
+
+    def amount_range(self):
+        """
+        Returns: (min amount, max amount), or None without transactions
+        """
+        if not self.sorted_amounts:
+            return None
+        return self.sorted_amounts[0], self.sorted_amounts[-1]
+
+    def _amount_positions(self, min_amount, max_amount, region=None):
+        if region is None:
+            sorted_amounts, order = self.sorted_amounts, self.amount_order
+        else:
+            sorted_amounts, order = self.region_amounts.get(region, ([], []))
+
+        lo = bisect_left(sorted_amounts, min_amount) if min_amount else 0
+        hi = bisect_right(sorted_amounts, max_amount) if max_amount else len(sorted_amounts)
+        return order[lo:hi]
+
+    def _date_positions(self, start_date, end_date):
+        lo = bisect_left(self.sorted_dates, start_date) if start_date else 0
+        hi = bisect_right(self.sorted_dates, end_date) if end_date else len(self.sorted_dates)
+
+        positions = []
+        for date in self.sorted_dates[lo:hi]:
+            positions.extend(self.by_date[date])
+        return positions
+
+    def filter(self, region=None, min_amount=None, max_amount=None, start_date=None, end_date=None,
+               customer_id=None, product_id=None):
+        """
+        Answers a filter from the indexes
+        Arguments follow filter_transactions(): falsy values mean "no filter"
+        Returns: list of matching transactions in original order
+        """
+        # (candidate positions, per-row check) for every active filter
+        amounts = self.amounts
+        records = self.records
+        conditions = []
+
+        if region and (min_amount or max_amount):
+            # Bisect the region's own amount index: both filters in one lookup
+            conditions.append((self._amount_positions(min_amount, max_amount, region),
+                               lambda i: records[i].region == region and
+                                         (not min_amount or amounts[i] >= min_amount) and
+                                         (not max_amount or amounts[i] <= max_amount)))
+        elif region:
+            conditions.append((self.by_region.get(region, []),
+                               lambda i: records[i].region == region))
+        if customer_id:
+            conditions.append((self.by_customer.get(customer_id, []),
+                               lambda i: records[i].customer_id == customer_id))
+        if product_id:
+            conditions.append((self.by_product.get(product_id, []),
+                               lambda i: records[i].product_id == product_id))
+        if (min_amount or max_amount) and not region:
+            conditions.append((self._amount_positions(min_amount, max_amount),
+                               lambda i: (not min_amount or amounts[i] >= min_amount) and
+                                         (not max_amount or amounts[i] <= max_amount)))
+        if start_date or end_date:
+            conditions.append((self._date_positions(start_date, end_date),
+                               lambda i: (not start_date or records[i].date >= start_date) and
+                                         (not end_date or records[i].date <= end_date)))
+
+        transactions = self.transactions
+        if not conditions:
+            return list(transactions)
+
+        # Start from the most selective index; check the others per candidate
+        conditions.sort(key=lambda c: len(c[0]))
+        positions, _ = conditions[0]
+        checks = [check for _, check in conditions[1:]]
+
+        matched = list(positions)
+        for check in checks:
+            matched = [i for i in matched if check(i)]
+        matched.sort()
+
+        return [transactions[i] for i in matched]
@@ -0,0 +1,103 @@
+import sys
+from collections.abc import Mapping
+
+from utils.money import PAISE_PER_RUPEE
+
+# Transaction dict key -> record attribute, in file column order
+FIELDS = {
+    "TransactionID": "transaction_id",
+    "Date": "date",
+    "ProductID": "product_id",
+    "ProductName": "product_name",
+    "Quantity": "quantity",
+    "UnitPrice": "unit_price",
+    "CustomerID": "customer_id",
+    "Region": "region",
+}
+
+
+class Transaction(Mapping):
+    """
+    Compact parsed transaction
+
+    Fields live in __slots__ and the repeated strings (date, product,
+    customer, region) are interned, so a row costs a fraction of the
+    equivalent dict. amount = Quantity * UnitPrice is computed once, both as
+    a float and as exact integer paise (amount_paise) for aggregation.
+
+    Hot loops read attributes (t.region, t.amount). Everything else can keep
+    treating the record as the old read-only dict: t["Region"], t.get(...),
+    dict(t) and == against a plain dict all work.
+    """
+
+    __slots__ = tuple(FIELDS.values()) + ("amount", "amount_paise")
+
+    # Keys in to_tuple() order (lets writers skip per-key lookups)
+    COLUMNS = tuple(FIELDS)
+
+    def __init__(self, transaction_id, date, product_id, product_name, quantity, unit_price,
+                 customer_id, region):
+        intern = sys.intern
+        self.transaction_id = transaction_id
+        self.date = intern(date)
+        self.product_id = intern(product_id)
+        self.product_name = intern(product_name)
+        self.quantity = quantity
+        self.unit_price = unit_price
+        self.customer_id = intern(customer_id)
+        self.region = intern(region)
+        self.amount = quantity * unit_price
+        try:
+            # Same as quantity * to_paise(unit_price), inlined for the parse loop
+            self.amount_paise = quantity * round(unit_price * PAISE_PER_RUPEE)
+        except (ValueError, OverflowError):
+            self.amount_paise = None  # nan / infinite price, rejected by validation
+
+    @classmethod
+    def from_mapping(cls, t):
+        """
+        Builds a record from a transaction dict (or any mapping with the same keys)
+        """
+        return cls(*[t[key] for key in FIELDS])
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, FIELDS[key])
+        except KeyError:
+            raise KeyError(key) from None
+
+    def __iter__(self):
+        return iter(FIELDS)
+
+    def __len__(self):
+        return len(FIELDS)
+
+    def __repr__(self):
+        return f"Transaction({self.to_dict()!r})"
+
+    def __reduce__(self):
+        return Transaction, self.to_tuple()
+
+    def to_tuple(self):
+        """
+        Field values in file column order
+        """
+        return (
+            self.transaction_id, self.date, self.product_id, self.product_name,
+            self.quantity, self.unit_price, self.customer_id, self.region
+        )
+
+    def to_dict(self):
+        """
+        Materializes the plain dict the parser used to produce
+        """
+        return dict(zip(FIELDS, self.to_tuple()))
+
+
+def as_transaction(t):
+    """
+    Returns: t itself if it is already a Transaction, otherwise a record built from the dict
+    """
+    if t.__class__ is Transaction:
+        return t
+    return Transaction.from_mapping(t)
@@ -0,0 +1,360 @@
+import copy
+import hashlib
+from collections import deque
+from datetime import date as Date, timedelta
+
+from utils.money import to_rupees
+from utils.records import as_transaction
+from utils.sketches import HyperLogLog
+
+DEFAULT_WINDOWS = (7, 30)
+
+# Dimensions DailyGroups splits the daily series by
+GROUP_KEYS = ("region", "product")
+
+
+def _parse_dates(dates):
+    parsed = {}
+    for date in dates:
+        try:
+            parsed[Date.fromisoformat(date)] = date
+        except ValueError:
+            continue
+    return parsed
+
+
+def calendar_bounds(dates):
+    """
+    Returns: (first, last) of the dates that parse as YYYY-MM-DD, or (None, None)
+    """
+    parsed = _parse_dates(dates)
+    if not parsed:
+        return None, None
+    return parsed[min(parsed)], parsed[max(parsed)]
+
+
+def calendar_days(daily, first=None, last=None, span=None):
+    """
+    Lays a {YYYY-MM-DD: entry} series out on consecutive calendar days, so
+    a window of N days always spans N dates; days without sales are None
+    first / last: calendar bounds (default: the series' own first and last day)
+    span: leave out the days more than span days after the last day with
+    an entry (and before the first), whose windows of up to span days are
+    all empty; the last day is always kept. Without it a stray date years
+    away from the rest (0001-01-01) lays out hundreds of thousands of days
+    Dates that do not parse have no place on the calendar and are left out
+    Returns: list of runs of consecutive days, each (list of dates, list of entries)
+    """
+    parsed = _parse_dates(daily)
+    if first is None or last is None:
+        first, last = calendar_bounds(daily)
+    if first is None:
+        return []
+
+    start, end = Date.fromisoformat(first), Date.fromisoformat(last)
+    if span is None:
+        stretches = [(start, end)]
+    else:
+        # Each day with an entry keeps itself and the span days after it
+        stretches = []
+        for day in sorted(d for d in parsed if start <= d <= end):
+            stop = min(day + timedelta(days=span), end)
+            if stretches and day <= stretches[-1][1] + timedelta(days=1):
+                stretches[-1] = (stretches[-1][0], max(stretches[-1][1], stop))
+            else:
+                stretches.append((day, stop))
+        if not stretches or stretches[-1][1] < end:
+            stretches.append((end, end))
+
+    runs = []
+    for run_start, run_end in stretches:
+        dates, entries = [], []
+        for offset in range((run_end - run_start).days + 1):
+            day = run_start + timedelta(days=offset)
+            date = parsed.get(day, day.isoformat())
+            dates.append(date)
+            entries.append(daily.get(date))
+        runs.append((dates, entries))
+    return runs
+
+
+class RollingWindows:
+    """
+    Sliding windows of several sizes over one daily series, advanced
+    together one day at a time
+
+    Each push() costs O(1) per window: revenue and transaction sums are
+    differences of prefix sums, the peak day comes off the front of a
+    monotonic deque, and distinct customers are kept as per-customer day
+    counts that only the day entering and the day leaving touch. Only the
+    last max(windows) days are retained.
+
+    Days whose customers are HyperLogLog sketches (approximate aggregates)
+    get their window's sketches merged instead, which costs O(window).
+    """
+
+    def __init__(self, windows=DEFAULT_WINDOWS):
+        windows = sorted(set(windows))
+        if not windows or any(not isinstance(w, int) or w < 1 for w in windows):
+            raise ValueError(f"Window sizes must be positive day counts, got {windows}")
+        self.windows = windows
+        span = windows[-1]
+
+        # Prefix sums of the last `span` days, starting from 0 before day one
+        self.revenue_sums = deque([0], maxlen=span + 1)
+        self.count_sums = deque([0], maxlen=span + 1)
+        self.customers = deque(maxlen=span)
+        self.days = 0
+        self.previous_revenue = None
+        # Whether customers arrive as HyperLogLog sketches (set by the first day with sales)
+        self.sketched = False
+
+        # window -> (day number, date, revenue) candidates, revenue decreasing
+        self.peaks = {w: deque() for w in windows}
+        # window -> {customer id: days in the window they bought on}
+        self.seen = {w: {} for w in windows}
+
+    def _window_sum(self, sums, window):
+        if len(sums) > window:
+            return sums[-1] - sums[-1 - window]
+        return sums[-1] - sums[0]
+
+    def _peak(self, window, date, revenue):
+        peaks = self.peaks[window]
+        # Strictly smaller days can never be a peak again; equal ones keep
+        # the earlier day first, like find_peak_sales_day()
+        while peaks and peaks[-1][2] < revenue:
+            peaks.pop()
+        peaks.append((self.days, date, revenue))
+        if peaks[0][0] <= self.days - window:
+            peaks.popleft()
+        return peaks[0]
+
+    def _distinct(self, window, customers):
+        seen = self.seen[window]
+        for cid in customers:
+            seen[cid] = seen.get(cid, 0) + 1
+
+        leaving = self.customers[-window] if len(self.customers) >= window else None
+        if leaving:
+            for cid in leaving:
+                remaining = seen[cid] - 1
+                if remaining:
+                    seen[cid] = remaining
+                else:
+                    del seen[cid]
+        return len(seen)
+
+    def _distinct_sketches(self, window, customers):
+        sketches = [s for s in list(self.customers)[-(window - 1):] if s is not None] if window > 1 else []
+        if customers is not None:
+            sketches.append(customers)
+        if not sketches:
+            return 0
+        merged = copy.deepcopy(sketches[0])
+        for sketch in sketches[1:]:
+            merged.merge(sketch)
+        return merged.count()
+
+    def push(self, date, revenue=0, count=0, customers=()):
+        """
+        Adds the next calendar day (revenue in paise)
+        Returns: the day's metrics and, per window, the metrics of the
+        window ending on it (shorter at the start of the series)
+        """
+        self.revenue_sums.append(self.revenue_sums[-1] + revenue)
+        self.count_sums.append(self.count_sums[-1] + count)
+
+        if customers is not None:
+            self.sketched = isinstance(customers, HyperLogLog)
+
+        windows = {}
+        for w in self.windows:
+            _, peak_date, peak_revenue = self._peak(w, date, revenue)
+            if self.sketched:
+                unique = self._distinct_sketches(w, customers)
+            else:
+                unique = self._distinct(w, customers or ())
+            windows[w] = {
+                "revenue": to_rupees(self._window_sum(self.revenue_sums, w)),
+                "transaction_count": self._window_sum(self.count_sums, w),
+                "unique_customers": unique,
+                # (None, 0) for a window without sales, as find_peak_sales_day()
+                "peak_day": (peak_date, to_rupees(peak_revenue)) if peak_revenue > 0 else (None, 0)
+            }
+
+        previous = self.previous_revenue
+        growth = (revenue - previous) / previous if previous else None
+
+        self.customers.append(customers)
+        self.previous_revenue = revenue
+        self.days += 1
+
+        if customers is None:
+            unique = 0
+        elif self.sketched:
+            unique = customers.count()
+        else:
+            unique = len(customers)
+
+        return {
+            "revenue": to_rupees(revenue),
+            "transaction_count": count,
+            "unique_customers": unique,
+            "growth": growth,
+            "windows": windows
+        }
+
+
+def rolling_metrics(daily, windows=DEFAULT_WINDOWS, first=None, last=None):
+    """
+    Rolling revenue, transactions, unique customers and peak day for
+    every window size in one pass over a daily series
+    daily: {YYYY-MM-DD: [revenue paise, transaction count, customers]}, the
+    layout of SalesAggregates.daily and of every DailyGroups series
+    first / last: calendar bounds, e.g. to line several series up
+    Returns: {date: metrics} for every calendar day but those no window
+    reaches (see calendar_days and RollingWindows.push); growth is the
+    day-over-day revenue change (None after a day without sales)
+    """
+    span = RollingWindows(windows).windows[-1]
+
+    result = {}
+    for dates, entries in calendar_days(daily, first, last, span):
+        # Every window is empty where a run starts, as with no days before it
+        rolling = RollingWindows(windows)
+        for date, entry in zip(dates, entries):
+            if entry is None:
+                result[date] = rolling.push(date, 0, 0, None)
+            else:
+                result[date] = rolling.push(date, *entry)
+    return result
+
+
+class DailyGroups:
+    """
+    Daily totals per region and per product, in the SalesAggregates.daily
+    layout ([revenue paise, transaction count, set of customer ids]), so
+    rolling_metrics() runs on any single group
+
+    Every group key is filled in the same pass over the rows.
+    """
+
+    def __init__(self):
+        # group key -> group value -> date -> [revenue paise, transaction_count, set of customer ids]
+        self.groups = {key: {} for key in GROUP_KEYS}
+        self.regions = self.groups["region"]
+        self.products = self.groups["product"]
+        self.rows = 0
+        # Whether customers are HyperLogLog sketches (from_cube) rather than sets
+        self.sketched = False
+
+        # (rows, digest) memo for fingerprint()
+        self._fingerprint = None
+
+    def _add(self, date, region, product, customer, revenue, count):
+        for groups, value in ((self.regions, region), (self.products, product)):
+            series = groups.get(value)
+            if series is None:
+                series = groups[value] = {}
+            day = series.get(date)
+            if day is None:
+                day = series[date] = [0, 0, set()]
+            day[0] += revenue
+            day[1] += count
+            day[2].add(customer)
+
+        self.rows += count
+
+    def add(self, t):
+        t = as_transaction(t)
+        self._add(t.date, t.region, t.product_name, t.customer_id, t.amount_paise, 1)
+
+    def update(self, transactions):
+        add = self._add
+        for t in transactions:
+            t = as_transaction(t)
+            add(t.date, t.region, t.product_name, t.customer_id, t.amount_paise, 1)
+        return self
+
+    @classmethod
+    def from_cube(cls, cube, start_date=None, end_date=None):
+        """
+        Builds the groups from a SalesCube's cells, without the raw rows
+        The cube keeps customers as per-cell HyperLogLog sketches, so each
+        day's customers are the merged sketches of its cells
+        """
+        groups = cls()
+        for date in cube.dates(start_date, end_date):
+            for (region, product), (_, revenue, count, _, customers) in cube.cells[date].items():
+                for by_value, value in ((groups.regions, region), (groups.products, product)):
+                    series = by_value.setdefault(value, {})
+                    day = series.get(date)
+                    if day is None:
+                        series[date] = [revenue, count, copy.deepcopy(customers)]
+                    else:
+                        day[0] += revenue
+                        day[1] += count
+                        day[2].merge(customers)
+                groups.rows += count
+        groups.sketched = True
+        return groups
+
+    def fingerprint(self):
+        """
+        Digest of the grouped series, memoized until more rows are added
+        Customer sets are hashed by their sorted members: windows take their
+        unions, so equal sizes do not mean equal unique-customer counts
+        Returns: None for sketched groups, which always re-render
+        """
+        if self.sketched:
+            return None
+        if self._fingerprint is not None and self._fingerprint[0] == self.rows:
+            return self._fingerprint[1]
+
+        digest = hashlib.sha256()
+        for key in GROUP_KEYS:
+            for value, series in self.groups[key].items():
+                part = [(date, revenue, count, sorted(customers))
+                        for date, (revenue, count, customers) in series.items()]
+                digest.update(repr((key, value, part)).encode("utf-8"))
+
+        self._fingerprint = (self.rows, digest.hexdigest())
+        return self._fingerprint[1]
+
+    def rolling(self, key, windows=DEFAULT_WINDOWS, since=None):
+        """
+        rolling_metrics() of every group value, on one shared calendar
+        since: first date of the calendar (default: the first date with data)
+        Returns: {group value: {date: metrics}}
+        """
+        if key not in self.groups:
+            raise ValueError(f"Unknown group key '{key}' (expected one of {', '.join(GROUP_KEYS)})")
+
+        # Every row has a region, so the region series cover every date
+        first, last = calendar_bounds({date for series in self.groups["region"].values() for date in series})
+        if since is not None and first is not None:
+            first = max(first, since)
+        return {
+            value: rolling_metrics(series, windows, first, last)
+            for value, series in self.groups[key].items()
+        }
+
+    def latest(self, key, windows=DEFAULT_WINDOWS):
+        """
+        Returns: (last date with data, {group value: metrics as of that date}),
+        or (None, {}) without data
+        """
+        # The last day's windows and growth only reach max(windows) days back
+        _, last = calendar_bounds({date for series in self.groups["region"].values() for date in series})
+        if last is None:
+            return None, {}
+        since = (Date.fromisoformat(last) - timedelta(days=max(windows))).isoformat()
+
+        latest = {}
+        as_of = None
+        for value, metrics in self.rolling(key, windows, since).items():
+            if metrics:
+                as_of = next(reversed(metrics))
+                latest[value] = metrics[as_of]
+        return as_of, latest
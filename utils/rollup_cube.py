@@ -0,0 +1,369 @@
+import hashlib
+import json
+import os
+from bisect import bisect_left, bisect_right
+from datetime import date as Date
+
+from utils.aggregator import ApproximateSalesAggregates
+from utils.file_handler import write_json_atomic
+from utils.money import to_rupees
+from utils.records import as_transaction
+from utils.sketches import HyperLogLog, hash64
+from utils.validation import ValidationReport
+
+CUBE_FILE = "data/sales_cube.json"
+CUBE_VERSION = 4
+
+# Relative standard error of the per-cell distinct customer sketches; cells
+# hold a handful of customers, so their sketches stay sparse and small
+CUBE_HLL_ERROR = 0.025
+
+GRAINS = ("day", "week", "month", "quarter")
+
+
+def period_key(date, grain):
+    """
+    Maps a YYYY-MM-DD date to its period: 2024-12-05 -> 2024-W49 / 2024-12 / 2024-Q4
+    Dates that do not parse are their own period
+    """
+    if grain == "day":
+        return date
+
+    try:
+        day = Date.fromisoformat(date)
+    except ValueError:
+        return date
+
+    if grain == "week":
+        year, week, _ = day.isocalendar()
+        return f"{year}-W{week:02d}"
+    if grain == "month":
+        return f"{day.year}-{day.month:02d}"
+    if grain == "quarter":
+        return f"{day.year}-Q{(day.month - 1) // 3 + 1}"
+
+    raise ValueError(f"Unknown grain '{grain}' (expected one of {', '.join(GRAINS)})")
+
+
+class CubeAggregates(ApproximateSalesAggregates):
+    """
+    SalesAggregates of a date range read from a SalesCube
+
+    Totals, regions, products and daily revenue are exact. The cube keeps
+    no per-customer figures: unique customers come from the cells'
+    HyperLogLog sketches and there is no customer ranking.
+    """
+
+    def __init__(self, hll_error=CUBE_HLL_ERROR):
+        super().__init__(hll_error=hll_error)
+
+    def customer_analysis(self):
+        return {}
+
+    def top_customers(self, n=5):
+        return []
+
+    def approximations(self):
+        hll_error = HyperLogLog(self.hll_error).error
+        return [
+            f"Unique customers: HyperLogLog per cube cell (±{hll_error:.2%} std error)",
+            "Top customers: not kept in the rollup cube",
+        ]
+
+
+class SalesCube:
+    """
+    Pre-aggregated (date, region, product) cells with
+    day/week/month/quarter rollups by region
+
+    Date-range questions (revenue by region for a month, the peak day of a
+    quarter, a full report for a date range) are answered from the cells
+    and rollups without touching the raw transactions again. Revenue is
+    kept in integer paise, so every rollup is an exact sum of its cells.
+    Customers are not part of the key: each cell counts its distinct
+    customers in a HyperLogLog, which keeps the cube a few cells per day
+    instead of one per customer.
+    """
+
+    def __init__(self, hll_error=CUBE_HLL_ERROR):
+        self.hll_error = hll_error
+        # date -> {(region, product name): [quantity, revenue paise, count, first row, customers HyperLogLog]}
+        self.cells = {}
+        # grain -> period -> region -> [quantity, revenue paise, count]
+        self.rollups = {grain: {} for grain in GRAINS}
+        self.rows = 0
+        self.source = None
+        # ValidationReport of the scan the cube was built from, if known
+        self.validation = None
+        self._periods = {}
+        self._sorted_dates = None
+
+    def _period_keys(self, date):
+        keys = self._periods.get(date)
+        if keys is None:
+            keys = self._periods[date] = [(grain, period_key(date, grain)) for grain in GRAINS]
+        return keys
+
+    def _roll_up(self, date, region, quantity, revenue, count):
+        for grain, period in self._period_keys(date):
+            regions = self.rollups[grain].get(period)
+            if regions is None:
+                regions = self.rollups[grain][period] = {}
+            totals = regions.get(region)
+            if totals is None:
+                totals = regions[region] = [0, 0, 0]
+            totals[0] += quantity
+            totals[1] += revenue
+            totals[2] += count
+
+    def add(self, t):
+        """
+        Folds one validated transaction into its cell and rollups
+        """
+        t = as_transaction(t)
+
+        day = self.cells.get(t.date)
+        if day is None:
+            day = self.cells[t.date] = {}
+            self._sorted_dates = None
+
+        key = (t.region, t.product_name)
+        cell = day.get(key)
+        if cell is None:
+            cell = day[key] = [0, 0, 0, self.rows, HyperLogLog(self.hll_error)]
+        cell[0] += t.quantity
+        cell[1] += t.amount_paise
+        cell[2] += 1
+        cell[4].add_hash(hash64(t.customer_id))
+
+        self._roll_up(t.date, t.region, t.quantity, t.amount_paise, 1)
+        self.rows += 1
+
+    def update(self, transactions):
+        for t in transactions:
+            self.add(t)
+        return self
+
+    def fingerprint(self):
+        """
+        Digest of the day rollup (what the period sections read)
+        """
+        digest = hashlib.sha256(repr((self.rows, list(self.rollups["day"].items()))).encode("utf-8"))
+        return digest.hexdigest()
+
+    def dates(self, start_date=None, end_date=None):
+        """
+        Returns: sorted dates with data, limited to the inclusive range
+        """
+        if self._sorted_dates is None:
+            self._sorted_dates = sorted(self.cells)
+        dates = self._sorted_dates
+
+        lo = bisect_left(dates, start_date) if start_date else 0
+        hi = bisect_right(dates, end_date) if end_date else len(dates)
+        return dates[lo:hi]
+
+    def rollup(self, grain="month", start_date=None, end_date=None):
+        """
+        Per-period, per-region totals
+        Without a date range the stored rollup is returned as is; with one,
+        the day rollup of the dates in range is regrouped, so partial
+        periods at either end are exact
+        Returns: {period: {region: [quantity, revenue paise, count]}}
+        """
+        if not start_date and not end_date:
+            return self.rollups[grain]
+
+        days = self.rollups["day"]
+        result = {}
+
+        for date in self.dates(start_date, end_date):
+            period = period_key(date, grain)
+            regions = result.setdefault(period, {})
+            for region, (quantity, revenue, count) in days[date].items():
+                totals = regions.setdefault(region, [0, 0, 0])
+                totals[0] += quantity
+                totals[1] += revenue
+                totals[2] += count
+
+        return result
+
+    def revenue_by_region(self, grain="month", start_date=None, end_date=None):
+        """
+        Returns: {period: {region: revenue}} in period order
+        """
+        rollup = self.rollup(grain, start_date, end_date)
+        return {
+            period: {region: to_rupees(totals[1]) for region, totals in rollup[period].items()}
+            for period in sorted(rollup)
+        }
+
+    def period_totals(self, grain="month", start_date=None, end_date=None):
+        """
+        Returns: {period: (revenue, transaction count)} in period order
+        """
+        rollup = self.rollup(grain, start_date, end_date)
+        return {
+            period: (
+                to_rupees(sum(totals[1] for totals in rollup[period].values())),
+                sum(totals[2] for totals in rollup[period].values())
+            )
+            for period in sorted(rollup)
+        }
+
+    def peak_period(self, grain="day", start_date=None, end_date=None):
+        """
+        Same rule as find_peak_sales_day(): the first period with the highest revenue
+        Returns: (period, revenue, transaction count)
+        """
+        peak, max_revenue, transaction_count = None, 0, 0
+
+        for period, (revenue, count) in self.period_totals(grain, start_date, end_date).items():
+            if revenue > max_revenue:
+                peak, max_revenue, transaction_count = period, revenue, count
+
+        return peak, max_revenue, transaction_count
+
+    def to_aggregates(self, start_date=None, end_date=None):
+        """
+        Builds the CubeAggregates of the transactions in the date range from
+        the cells alone
+        Regions and products are inserted in first-seen row order, so ties
+        rank the same way as when aggregating the raw rows
+        """
+        aggregates = CubeAggregates(self.hll_error)
+        dates = self.dates(start_date, end_date)
+
+        regions, products = {}, {}
+
+        for date in dates:
+            day_revenue, day_count, day_customers = 0, 0, HyperLogLog(self.hll_error)
+
+            for (region, product), (quantity, revenue, count, first, customers) in self.cells[date].items():
+                aggregates.total_paise += revenue
+                aggregates.transaction_count += count
+                day_revenue += revenue
+                day_count += count
+                day_customers.merge(customers)
+
+                entry = regions.get(region)
+                if entry is None:
+                    entry = regions[region] = [first, 0, 0]
+                entry[0] = min(entry[0], first)
+                entry[1] += revenue
+                entry[2] += count
+
+                entry = products.get(product)
+                if entry is None:
+                    entry = products[product] = [first, 0, 0]
+                entry[0] = min(entry[0], first)
+                entry[1] += quantity
+                entry[2] += revenue
+
+            aggregates.daily[date] = [day_revenue, day_count, day_customers]
+
+        by_first = lambda item: item[1][0]
+        aggregates.regions = {k: v[1:] for k, v in sorted(regions.items(), key=by_first)}
+        aggregates.products = {k: v[1:] for k, v in sorted(products.items(), key=by_first)}
+
+        if dates:
+            aggregates.first_date, aggregates.last_date = dates[0], dates[-1]
+
+        return aggregates
+
+    def to_dict(self):
+        """
+        JSON-serializable cells; rollups are rebuilt on load
+        """
+        return {
+            "version": CUBE_VERSION,
+            "source": self.source,
+            "rows": self.rows,
+            "hll_error": self.hll_error,
+            "validation": self.validation.to_dict() if self.validation is not None else None,
+            "cells": [
+                [date, region, product, quantity, revenue, count, first, customers.to_dict()]
+                for date, day in self.cells.items()
+                for (region, product), (quantity, revenue, count, first, customers) in day.items()
+            ]
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        cube = cls(data["hll_error"])
+        cube.source = data["source"]
+        cube.rows = data["rows"]
+        if data["validation"] is not None:
+            cube.validation = ValidationReport.from_dict(data["validation"])
+
+        for date, region, product, quantity, revenue, count, first, customers in data["cells"]:
+            day = cube.cells.get(date)
+            if day is None:
+                day = cube.cells[date] = {}
+            day[(region, product)] = [quantity, revenue, count, first, HyperLogLog.from_dict(customers)]
+            cube._roll_up(date, region, quantity, revenue, count)
+
+        return cube
+
+
+def source_signature(filename):
+    """
+    Identifies the input file version the cube was built from
+    """
+    stat = os.stat(filename)
+    return {"path": os.path.abspath(filename), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def build_cube(transactions, filename=None, validation=None):
+    """
+    Scans validated transactions once into a SalesCube
+    validation: the ValidationReport of the pass producing transactions,
+    kept with the cube (complete once transactions is exhausted)
+    """
+    cube = SalesCube().update(transactions)
+    cube.validation = validation
+    if filename is not None:
+        cube.source = source_signature(filename)
+    return cube
+
+
+def save_cube(cube, cube_file=CUBE_FILE):
+    write_json_atomic(cube.to_dict(), cube_file)
+
+
+def _read_cube(cube_file, filename=None):
+    try:
+        with open(cube_file, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+    if data.get("version") != CUBE_VERSION:
+        return None
+
+    if filename is not None:
+        try:
+            if data.get("source") != source_signature(filename):
+                return None
+        except FileNotFoundError:
+            return None
+
+    return data
+
+
+def load_cube(cube_file=CUBE_FILE, filename=None):
+    """
+    Loads a persisted cube
+    Returns: SalesCube, or None if missing, unreadable, from another
+    version or (with filename) built from a different version of the file
+    """
+    data = _read_cube(cube_file, filename)
+    return SalesCube.from_dict(data) if data is not None else None
+
+
+def cube_is_current(filename, cube_file=CUBE_FILE):
+    """
+    Returns: whether the persisted cube was built from this version of the
+    file (without rebuilding its sketches)
+    """
+    return _read_cube(cube_file, filename) is not None
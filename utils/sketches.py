@@ -0,0 +1,337 @@
+import base64
+import hashlib
+import heapq
+import math
+
+DEFAULT_HLL_ERROR = 0.01            # relative standard error of distinct counts
+DEFAULT_HEAVY_HITTER_ERROR = 0.001  # max overestimate as a share of the stream total
+DEFAULT_CONFIDENCE = 0.99           # probability Count-Min stays within its bound
+
+
+def hash64(value):
+    """
+    Stable 64-bit hash of a string (unlike hash(), identical across runs)
+    """
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+# Register count -> int with 0x80 in every byte, for _register_max()
+_HIGH_BITS = {}
+
+
+def _register_max(a, b):
+    """
+    Byte-wise max of two equal-length register arrays, computed on them as
+    one big integer each: ranks stay below 0x80, so (a | 0x80) - b never
+    borrows across bytes and its high bit is set exactly where a >= b
+    """
+    n = len(a)
+    high = _HIGH_BITS.get(n)
+    if high is None:
+        high = _HIGH_BITS[n] = int.from_bytes(b"\x80" * n, "little")
+
+    x, y = int.from_bytes(a, "little"), int.from_bytes(b, "little")
+    mask = ((((x | high) - y) & high) >> 7) * 0xFF
+    return bytearray(((x & mask) | (y & ~mask)).to_bytes(n, "little"))
+
+
+class HyperLogLog:
+    """
+    Distinct counter with relative standard error 1.04 / sqrt(2 ** precision)
+
+    Registers start out sparse (a dict of the registers touched) so small
+    sets such as one customer's products stay tiny, and switch to a dense
+    bytearray once the dict would outgrow it.
+    """
+
+    def __init__(self, error=DEFAULT_HLL_ERROR):
+        self.precision = min(max(math.ceil(2 * math.log2(1.04 / error)), 4), 18)
+        self.m = 1 << self.precision
+        self.sparse = {}
+        self.dense = None
+
+    @property
+    def error(self):
+        return 1.04 / math.sqrt(self.m)
+
+    def add_hash(self, x):
+        index = x >> (64 - self.precision)
+        rest = x & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - rest.bit_length() + 1
+
+        if self.dense is not None:
+            if rank > self.dense[index]:
+                self.dense[index] = rank
+            return
+
+        if rank > self.sparse.get(index, 0):
+            self.sparse[index] = rank
+            if len(self.sparse) > self.m // 64:
+                self._densify()
+
+    def add(self, value):
+        self.add_hash(hash64(value))
+
+    def _densify(self):
+        self.dense = bytearray(self.m)
+        for index, rank in self.sparse.items():
+            self.dense[index] = rank
+        self.sparse = None
+
+    def _registers(self):
+        if self.dense is not None:
+            return self.dense
+        return self.sparse.values()
+
+    def merge(self, other):
+        """
+        Folds another sketch of the same precision into this one
+        """
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLog sketches of different precision")
+
+        if other.dense is not None:
+            if self.dense is None:
+                self._densify()
+            self.dense = _register_max(self.dense, other.dense)
+            return self
+
+        for index, rank in other.sparse.items():
+            if not rank:
+                continue
+            if self.dense is not None:
+                self.dense[index] = max(self.dense[index], rank)
+            elif rank > self.sparse.get(index, 0):
+                self.sparse[index] = rank
+        if self.sparse is not None and len(self.sparse) > self.m // 64:
+            self._densify()
+        return self
+
+    def count(self):
+        """
+        Returns: estimated number of distinct values added
+        """
+        m = self.m
+        registers = self._registers()
+        nonzero = [r for r in registers if r]
+        zeros = m - len(nonzero)
+
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / (zeros + sum(2.0 ** -r for r in nonzero))
+
+        # Linear counting is far more accurate while registers are still empty
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)
+
+        return int(round(estimate))
+
+    def __len__(self):
+        return self.count()
+
+    def to_dict(self):
+        """
+        JSON-serializable registers (dense ones base64-encoded)
+        """
+        if self.dense is not None:
+            return {"precision": self.precision, "dense": base64.b64encode(self.dense).decode("ascii")}
+        return {"precision": self.precision, "sparse": list(self.sparse.items())}
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Rebuilds a sketch saved with to_dict()
+        """
+        sketch = cls.__new__(cls)
+        sketch.precision = data["precision"]
+        sketch.m = 1 << sketch.precision
+        if "dense" in data:
+            sketch.sparse = None
+            sketch.dense = bytearray(base64.b64decode(data["dense"]))
+        else:
+            sketch.sparse = {index: rank for index, rank in data["sparse"]}
+            sketch.dense = None
+        return sketch
+
+
+class CountMinSketch:
+    """
+    Frequency estimates that never undercount and overcount by at most
+    error * total with probability confidence
+    """
+
+    def __init__(self, error=DEFAULT_HEAVY_HITTER_ERROR, confidence=DEFAULT_CONFIDENCE):
+        self.width = math.ceil(math.e / error)
+        self.depth = math.ceil(math.log(1 / (1 - confidence)))
+        self.table = [[0] * self.width for _ in range(self.depth)]
+        self.total = 0
+
+    def _columns(self, x):
+        # Double hashing: row i uses h1 + i * h2
+        h1, h2 = x >> 32, (x & 0xFFFFFFFF) | 1
+        return [(h1 + i * h2) % self.width for i in range(self.depth)]
+
+    def add_hash(self, x, count=1):
+        self.total += count
+        for row, col in zip(self.table, self._columns(x)):
+            row[col] += count
+
+    def add(self, value, count=1):
+        self.add_hash(hash64(value), count)
+
+    def merge(self, other):
+        """
+        Folds another sketch of the same dimensions into this one; the bound
+        then holds for the combined total
+        """
+        if (other.width, other.depth) != (self.width, self.depth):
+            raise ValueError("Cannot merge Count-Min sketches of different dimensions")
+
+        for row, other_row in zip(self.table, other.table):
+            for col, count in enumerate(other_row):
+                if count:
+                    row[col] += count
+        self.total += other.total
+        return self
+
+    def estimate_hash(self, x):
+        return min(row[col] for row, col in zip(self.table, self._columns(x)))
+
+    def estimate(self, value):
+        return self.estimate_hash(hash64(value))
+
+    @property
+    def error_bound(self):
+        return math.e / self.width * self.total
+
+    def to_dict(self):
+        return {"width": self.width, "depth": self.depth, "total": self.total, "table": self.table}
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Rebuilds a sketch saved with to_dict()
+        """
+        sketch = cls.__new__(cls)
+        sketch.width = data["width"]
+        sketch.depth = data["depth"]
+        sketch.total = data["total"]
+        sketch.table = [list(row) for row in data["table"]]
+        return sketch
+
+
+class SpaceSaving:
+    """
+    Weighted heavy hitters in at most `capacity` counters
+
+    Any item whose true weight exceeds total / capacity is guaranteed to be
+    tracked; each tracked weight overestimates by at most its `error`.
+    """
+
+    def __init__(self, error=DEFAULT_HEAVY_HITTER_ERROR):
+        self.capacity = math.ceil(1 / error)
+        # item -> [weight, error]
+        self.counters = {}
+        self.total = 0
+        # Lazy min-heap of (weight, item); stale entries are skipped on pop
+        self._heap = []
+
+    def add(self, item, weight=1):
+        """
+        Returns: the item evicted to make room, or None
+        """
+        self.total += weight
+        evicted = None
+
+        counter = self.counters.get(item)
+        if counter is None:
+            if len(self.counters) < self.capacity:
+                counter = self.counters[item] = [0, 0]
+            else:
+                evicted, floor = self._pop_min()
+                del self.counters[evicted]
+                # The newcomer inherits the evicted weight as its error
+                counter = self.counters[item] = [floor, floor]
+
+        counter[0] += weight
+        heapq.heappush(self._heap, (counter[0], item))
+        if len(self._heap) > 4 * self.capacity:
+            self._heap = [(c[0], i) for i, c in self.counters.items()]
+            heapq.heapify(self._heap)
+
+        return evicted
+
+    def _pop_min(self):
+        while True:
+            weight, item = heapq.heappop(self._heap)
+            counter = self.counters.get(item)
+            if counter is not None and counter[0] == weight:
+                return item, weight
+
+    def _floor(self):
+        # Most an untracked item can have had: the smallest weight once full
+        if len(self.counters) < self.capacity:
+            return 0
+        return min(c[0] for c in self.counters.values())
+
+    def merge(self, other):
+        """
+        Folds another summary of the same capacity into this one, keeping
+        the guarantees over the combined stream
+        An item one side does not track may have been evicted there, so it
+        is charged that side's floor, as both weight and error; the largest
+        `capacity` counters are kept
+        Returns: the items no longer tracked
+        """
+        if other.capacity != self.capacity:
+            raise ValueError("Cannot merge Space-Saving summaries of different capacity")
+
+        floor, other_floor = self._floor(), other._floor()
+        merged = {}
+        for item, (weight, error) in self.counters.items():
+            other_weight, other_error = other.counters.get(item, (other_floor, other_floor))
+            merged[item] = [weight + other_weight, error + other_error]
+        for item, (weight, error) in other.counters.items():
+            if item not in merged:
+                merged[item] = [weight + floor, error + floor]
+
+        kept = {item for item, _ in heapq.nlargest(self.capacity, merged.items(), key=lambda x: x[1][0])}
+        self.counters = {item: c for item, c in merged.items() if item in kept}
+        self.total += other.total
+        self._heap = [(c[0], i) for i, c in self.counters.items()]
+        heapq.heapify(self._heap)
+
+        return [item for item in merged if item not in kept]
+
+    def top(self, n=None):
+        """
+        Returns: [(item, weight, error)] by descending weight
+        """
+        items = ((item, c[0], c[1]) for item, c in self.counters.items())
+        key = lambda x: x[1]
+        if n is None:
+            return sorted(items, key=key, reverse=True)
+        return heapq.nlargest(n, items, key=key)
+
+    @property
+    def error_bound(self):
+        return self.total / self.capacity
+
+    def to_dict(self):
+        return {
+            "capacity": self.capacity,
+            "total": self.total,
+            "counters": [[item, weight, error] for item, (weight, error) in self.counters.items()]
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Rebuilds a summary saved with to_dict()
+        """
+        summary = cls.__new__(cls)
+        summary.capacity = data["capacity"]
+        summary.total = data["total"]
+        summary.counters = {item: [weight, error] for item, weight, error in data["counters"]}
+        summary._heap = [(c[0], i) for i, c in summary.counters.items()]
+        heapq.heapify(summary._heap)
+        return summary
@@ -0,0 +1,108 @@
+import gc
+import hashlib
+import os
+from contextlib import contextmanager
+
+from utils.output_writer import write_columnar, load_columnar, read_columnar_header
+from utils.records import Transaction, FIELDS
+
+SNAPSHOT_DIR = "data/snapshots"
+SNAPSHOT_VERSION = 1
+
+# Bytes hashed per read when fingerprinting the source file
+HASH_CHUNK_SIZE = 1 << 20
+
+# Column types of a parsed transaction in the columnar format
+SALES_SCHEMA = {
+    "TransactionID": "str", "Date": "str", "ProductID": "str", "ProductName": "str",
+    "Quantity": "int", "UnitPrice": "float", "CustomerID": "str", "Region": "str"
+}
+
+
+@contextmanager
+def gc_paused():
+    """
+    Suspends cyclic garbage collection while hundreds of thousands of records
+    are allocated at once; the collector would otherwise rescan them repeatedly
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def snapshot_path(filename, snapshot_dir=SNAPSHOT_DIR):
+    """
+    One snapshot per source file, named after its base name and full path
+    """
+    path_hash = hashlib.sha256(os.path.abspath(filename).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(snapshot_dir, f"{os.path.basename(filename)}.{path_hash}.col")
+
+
+def snapshot_source(filename):
+    """
+    Identifies the exact contents of the sales file: size, mtime and SHA-256
+    Returns: dict, or None if the file does not exist
+    """
+    try:
+        stat = os.stat(filename)
+        digest = hashlib.sha256()
+        with open(filename, "rb") as f:
+            # Chunk by chunk, so large files are never read whole (and
+            # without hashlib.file_digest, which needs Python 3.11)
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                digest.update(chunk)
+    except FileNotFoundError:
+        return None
+
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest.hexdigest()}
+
+
+def save_snapshot(filename, transactions, invalid, source, snapshot_dir=SNAPSHOT_DIR):
+    """
+    Stores validated transactions and the invalid row count of the sales
+    file whose contents match source (take it from snapshot_source()
+    before parsing, so a file changed mid-parse is never marked current)
+    Returns: snapshot file path
+    """
+    path = snapshot_path(filename, snapshot_dir)
+    os.makedirs(snapshot_dir, exist_ok=True)
+
+    metadata = {"version": SNAPSHOT_VERSION, "source": source, "invalid": invalid}
+    tmp_path = path + ".tmp"
+    with gc_paused():
+        write_columnar(transactions, tmp_path, SALES_SCHEMA, metadata=metadata)
+    os.replace(tmp_path, path)
+
+    return path
+
+
+def load_snapshot(filename, source=None, snapshot_dir=SNAPSHOT_DIR):
+    """
+    Loads the snapshot of the sales file if it was taken from the current contents
+    source: snapshot_source(filename), if already computed
+    Returns: (list of validated Transaction records, invalid count), or None
+    if there is no snapshot or the file has changed since it was taken
+    """
+    source = source or snapshot_source(filename)
+    if source is None:
+        return None
+
+    path = snapshot_path(filename, snapshot_dir)
+    try:
+        header = read_columnar_header(path)
+    except (FileNotFoundError, ValueError):
+        return None
+
+    metadata = header.get("metadata") or {}
+    if metadata.get("version") != SNAPSHOT_VERSION or metadata.get("source") != source:
+        return None
+
+    with gc_paused():
+        _, columns = load_columnar(path)
+        transactions = [Transaction(*row) for row in zip(*(columns[key] for key in FIELDS))]
+
+    return transactions, metadata["invalid"]
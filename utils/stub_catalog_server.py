@@ -0,0 +1,139 @@
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+MAX_PAGE_SIZE = 100
+
+
+def make_products(count=250):
+    """
+    Generates a deterministic DummyJSON-style product list
+    """
+    categories = ["laptops", "smartphones", "tablets", "mobile-accessories", "mens-watches"]
+    return [
+        {
+            "id": i,
+            "title": f"Product {i}",
+            "category": categories[i % len(categories)],
+            "brand": f"Brand {i % 7}",
+            "rating": round(3 + (i % 20) / 10, 2),
+            "price": 10.0 * i
+        }
+        for i in range(1, count + 1)
+    ]
+
+
+def catalog_etag(products):
+    """
+    Strong ETag for the whole catalog, so any page revalidates all of it
+    """
+    digest = hashlib.sha1(json.dumps(products, sort_keys=True).encode("utf-8")).hexdigest()
+    return f'"{digest}"'
+
+
+def _make_handler(server_state):
+    class CatalogHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status, payload, etag=None):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            if etag:
+                self.send_header("ETag", etag)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _send_not_modified(self, etag):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def do_GET(self):
+            with server_state["lock"]:
+                server_state["requests"] += 1
+                fail = server_state["fail_next"] > 0
+                if fail:
+                    server_state["fail_next"] -= 1
+
+            if server_state["latency"]:
+                time.sleep(server_state["latency"])
+
+            if fail:
+                self._send_json(503, {"message": "temporarily unavailable"})
+                return
+
+            url = urlparse(self.path)
+            parts = [p for p in url.path.split("/") if p]
+            products = server_state["products"]
+
+            if parts == ["products"]:
+                etag = catalog_etag(products)
+                if self.headers.get("If-None-Match") == etag:
+                    self._send_not_modified(etag)
+                    return
+
+                query = parse_qs(url.query)
+                limit = int(query.get("limit", ["30"])[0])
+                skip = int(query.get("skip", ["0"])[0])
+                limit = min(limit or len(products), MAX_PAGE_SIZE)
+                page = products[skip:skip + limit]
+                self._send_json(200, {
+                    "products": page,
+                    "total": len(products),
+                    "skip": skip,
+                    "limit": len(page)
+                }, etag=etag)
+            elif len(parts) == 2 and parts[0] == "products" and parts[1].isdigit():
+                product_id = int(parts[1])
+                if 1 <= product_id <= len(products):
+                    self._send_json(200, products[product_id - 1])
+                else:
+                    self._send_json(404, {"message": f"Product with id '{product_id}' not found"})
+            else:
+                self._send_json(404, {"message": "not found"})
+
+    return CatalogHandler
+
+
+def start_stub_server(products=None, latency=0.0, fail_next=0, port=0):
+    """
+    Starts a local stand-in for the DummyJSON products API in a daemon thread
+    latency: seconds of delay added to every request
+    fail_next: number of upcoming requests answered with 503
+    Returns: (server, base_url); call server.shutdown() when done
+    """
+    server_state = {
+        "products": products if products is not None else make_products(),
+        "latency": latency,
+        "fail_next": fail_next,
+        "requests": 0,
+        "lock": threading.Lock()
+    }
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), _make_handler(server_state))
+    server.daemon_threads = True
+    server.state = server_state
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    host, bound_port = server.server_address
+    return server, f"http://{host}:{bound_port}/products"
+
+
+if __name__ == "__main__":
+    server, base_url = start_stub_server(port=8000)
+    print(f"Stub catalog serving at {base_url} (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
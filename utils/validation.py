@@ -0,0 +1,247 @@
+import math
+from collections import Counter
+from operator import attrgetter
+
+from utils.records import Transaction, as_transaction
+
+# Line-level rejections, counted before any field rule runs
+FIELD_COUNT = "field_count"
+NUMBER_FORMAT = "number_format"
+
+
+def _make_check(field, op, arg):
+    get = attrgetter(field)
+
+    if op == "startswith":
+        return lambda t: get(t).startswith(arg)
+    if op == "gt":
+        return lambda t: get(t) > arg
+    if op == "ge":
+        return lambda t: get(t) >= arg
+    if op == "non_empty":
+        return lambda t: bool(get(t))
+    return lambda t: math.isfinite(get(t))
+
+
+class Rule:
+    """
+    One declarative validation rule: <field> <op> [<arg>]
+
+    field is a Transaction attribute; op is one of OPS. check(t) applies
+    the rule to a Transaction record.
+    """
+
+    OPS = ("startswith", "gt", "ge", "non_empty", "finite")
+
+    def __init__(self, name, field, op, arg=None):
+        if op not in self.OPS:
+            raise ValueError(f"Unknown rule op '{op}' (expected one of {', '.join(self.OPS)})")
+        self.name = name
+        self.field = field
+        self.op = op
+        self.arg = arg
+
+        self.check = _make_check(field, op, arg)
+
+    def __repr__(self):
+        return f"Rule({self.name!r}, {self.field!r}, {self.op!r}, {self.arg!r})"
+
+
+class ValidationReport:
+    """
+    Row counts of a validation pass, with rejections per rule
+    A rejected row counts once under every rule it fails
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.valid = 0
+        self.by_rule = Counter()
+
+    @property
+    def rejected(self):
+        return self.total - self.valid
+
+    def to_dict(self):
+        return {
+            "total": self.total,
+            "valid": self.valid,
+            "rejected": self.rejected,
+            "by_rule": dict(self.by_rule.most_common())
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Rebuilds a report saved with to_dict()
+        """
+        report = cls()
+        report.total = data["total"]
+        report.valid = data["valid"]
+        report.by_rule = Counter(data["by_rule"])
+        return report
+
+    def merge(self, other):
+        """
+        Adds the counts of another pass (e.g. over another part of the input)
+        """
+        self.total += other.total
+        self.valid += other.valid
+        self.by_rule.update(other.by_rule)
+        return self
+
+    def summary(self):
+        if not self.by_rule:
+            return "No rows rejected"
+        return "Rejected by rule: " + ", ".join(f"{rule}={count}" for rule, count in self.by_rule.most_common())
+
+
+class RuleSet:
+    """
+    Ordered rules checked as one predicate
+
+    accepts() stops at the first failing rule; only rejected rows are
+    re-checked against every rule to attribute the rejection.
+    """
+
+    def __init__(self, rules):
+        self.rules = list(rules)
+        checks = tuple(rule.check for rule in self.rules)
+
+        def accepts(t):
+            # Records are checked directly; mappings (e.g. plain dicts) are converted first
+            t = as_transaction(t)
+            for check in checks:
+                if not check(t):
+                    return False
+            return True
+
+        self.accepts = accepts
+
+    def failed_rules(self, t):
+        """
+        Returns: names of every rule the record (or transaction dict) fails
+        """
+        t = as_transaction(t)
+        return [rule.name for rule in self.rules if not rule.check(t)]
+
+    def _reject(self, report, quarantine, failed, line):
+        report.by_rule.update(failed)
+        if quarantine is not None:
+            quarantine.write(f"{','.join(failed)}\t{line}\n")
+
+    def iter_valid(self, transactions, report=None, quarantine=None):
+        """
+        Yields the records that pass every rule
+        report: ValidationReport, complete once the generator is exhausted
+        quarantine: text file receiving "rule,rule<TAB>record line" for rejects;
+        the line is re-rendered from the parsed record (numbers normalized,
+        product-name commas already stripped), so prefer iter_valid_lines()
+        wherever the raw lines are still available
+        """
+        report = report if report is not None else ValidationReport()
+        accepts = self.accepts
+        total = valid = 0
+
+        try:
+            for t in transactions:
+                total += 1
+                if accepts(t):
+                    valid += 1
+                    yield t
+                else:
+                    line = "|".join(str(t[key]) for key in Transaction.COLUMNS) if quarantine is not None else None
+                    self._reject(report, quarantine, self.failed_rules(t), line)
+        finally:
+            report.total += total
+            report.valid += valid
+
+    def validate(self, transactions, quarantine=None):
+        """
+        List form of iter_valid() (a plain loop, without the generator overhead)
+        Quarantined lines are re-rendered records, as in iter_valid()
+        Returns: (list of valid records, ValidationReport)
+        """
+        report = ValidationReport()
+        accepts = self.accepts
+        valid = []
+        append = valid.append
+
+        for t in transactions:
+            if accepts(t):
+                append(t)
+            else:
+                line = "|".join(str(t[key]) for key in Transaction.COLUMNS) if quarantine is not None else None
+                self._reject(report, quarantine, self.failed_rules(t), line)
+
+        report.total = len(transactions)
+        report.valid = len(valid)
+        return valid, report
+
+    def iter_valid_lines(self, raw_lines, report=None, quarantine=None):
+        """
+        Parses and validates raw sales lines in one pass
+        Lines with the wrong number of fields or unparseable numbers count
+        under FIELD_COUNT / NUMBER_FORMAT and are quarantined verbatim
+        Yields: valid Transaction records
+        """
+        report = report if report is not None else ValidationReport()
+        accepts = self.accepts
+        total = valid = 0
+
+        try:
+            for line in raw_lines:
+                total += 1
+                parts = line.split("|")
+
+                if len(parts) != 8:
+                    self._reject(report, quarantine, [FIELD_COUNT], line)
+                    continue
+
+                tid, date, pid, pname, qty, price, cid, region = parts
+
+                try:
+                    qty = int(qty.replace(",", ""))
+                    price = float(price.replace(",", ""))
+                except ValueError:
+                    self._reject(report, quarantine, [NUMBER_FORMAT], line)
+                    continue
+
+                t = Transaction(tid, date, pid, pname.replace(",", ""), qty, price, cid, region)
+
+                if accepts(t):
+                    valid += 1
+                    yield t
+                else:
+                    self._reject(report, quarantine, self.failed_rules(t), line)
+        finally:
+            report.total += total
+            report.valid += valid
+
+    def validate_lines(self, raw_lines, quarantine=None):
+        """
+        Returns: (list of valid Transaction records, ValidationReport)
+        """
+        report = ValidationReport()
+        return list(self.iter_valid_lines(raw_lines, report, quarantine)), report
+
+
+# Q2 Task 1.3 rules (validate_and_filter and every read path)
+VALIDATION_RULES = RuleSet([
+    Rule("transaction_id_prefix", "transaction_id", "startswith", "T"),
+    Rule("product_id_prefix", "product_id", "startswith", "P"),
+    Rule("customer_id_prefix", "customer_id", "startswith", "C"),
+    Rule("quantity_positive", "quantity", "gt", 0),
+    Rule("unit_price_positive", "unit_price", "gt", 0),
+    Rule("unit_price_finite", "unit_price", "finite"),
+    Rule("region_present", "region", "non_empty"),
+])
+
+# clean_sales_data() rules: looser ID checks, zero prices allowed
+CLEANING_RULES = RuleSet([
+    Rule("transaction_id_prefix", "transaction_id", "startswith", "T"),
+    Rule("customer_id_present", "customer_id", "non_empty"),
+    Rule("region_present", "region", "non_empty"),
+    Rule("quantity_positive", "quantity", "gt", 0),
+    Rule("unit_price_non_negative", "unit_price", "ge", 0),
+])
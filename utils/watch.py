@@ -0,0 +1,343 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import sys
+import time
+from datetime import datetime
+
+from utils.aggregator import SalesAggregates, ApproximateSalesAggregates, aggregates_from_dict
+from utils.file_handler import detect_encoding, fallback_bytes
+from utils.incremental import (
+    STATE_FILE,
+    load_state,
+    save_state,
+    is_state_valid,
+    tail_state,
+    read_appended,
+    build_state
+)
+from utils.instrumentation import current_rss
+from utils.report_generator import generate_sales_report
+from utils.rolling import DEFAULT_WINDOWS
+from utils.validation import ValidationReport
+
+# Seconds without new rows before the report is rewritten
+DEBOUNCE_SECONDS = 2.0
+# Longest a change waits for its report while rows keep arriving
+MAX_REPORT_DELAY = 30.0
+# Polling fallback: seconds between stat() calls
+POLL_INTERVAL = 1.0
+# Seconds between throughput log lines
+LOG_INTERVAL = 60.0
+# Lines folded in per read, so a large append never holds up reports or signals
+BATCH_LINES = 100_000
+
+# inotify(7) events on the sales file's directory
+IN_MODIFY = 0x002
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+WATCH_EVENTS = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+
+class InotifyWaiter:
+    """
+    Blocks until something in the sales file's directory changes (Linux
+    inotify through libc; no extra dependency)
+
+    The directory is watched rather than the file, so a file that is
+    replaced or recreated is still noticed. Events are only a wake-up
+    call: the watcher re-checks the file itself.
+    """
+
+    name = "inotify"
+
+    def __init__(self, filename):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        directory = os.path.dirname(os.path.abspath(filename))
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_EVENTS) < 0:
+            error = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(error, f"inotify_add_watch failed for {directory}")
+
+    def wait(self, timeout):
+        """
+        Returns: True if anything changed within timeout seconds
+        """
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return False
+
+        try:
+            while os.read(self.fd, 64 * 1024):
+                pass
+        except BlockingIOError:
+            pass
+        return True
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWaiter:
+    """
+    Fallback for platforms without inotify: compares the file's inode, size
+    and mtime every interval
+    """
+
+    name = "polling"
+
+    def __init__(self, filename, interval=POLL_INTERVAL):
+        self.filename = filename
+        self.interval = interval
+        self.last = self._stat()
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.filename)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+    def wait(self, timeout):
+        deadline = time.monotonic() + timeout
+
+        while True:
+            current = self._stat()
+            if current != self.last:
+                self.last = current
+                return True
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(self.interval, remaining))
+
+    def close(self):
+        pass
+
+
+def make_waiter(filename, use_inotify=True, poll_interval=POLL_INTERVAL):
+    """
+    Returns: an InotifyWaiter where inotify is available, else a PollingWaiter
+    """
+    if use_inotify and sys.platform.startswith("linux"):
+        try:
+            return InotifyWaiter(filename)
+        except (OSError, AttributeError):  # AttributeError: libc without inotify
+            pass
+    return PollingWaiter(filename, poll_interval)
+
+
+class SalesWatcher:
+    """
+    Keeps the aggregates of a growing sales file current and its report fresh
+
+    Only appended complete lines are parsed, streamed straight into the
+    aggregates; no rows are kept, so memory grows with the number of
+    distinct regions, products, customers and days, not with the file
+    (sketch_options bounds the per-customer part as well). A file that is
+    truncated or rewritten is re-read from the start.
+
+    The report is rewritten once appends have been quiet for `debounce`
+    seconds, or at the latest `max_delay` seconds after the first
+    unreported row.
+
+    Lines are validated with VALIDATION_RULES; validation counts every line
+    read so far, per rule, and rejected lines are appended to
+    quarantine_file when one is given (truncated whenever the file is
+    re-read from the start).
+    """
+
+    def __init__(self, filename="data/sales_data.txt", output_file="output/sales_report.txt",
+                 state_file=STATE_FILE, debounce=DEBOUNCE_SECONDS, max_delay=MAX_REPORT_DELAY,
+                 log_interval=LOG_INTERVAL, sketch_options=None, windows=DEFAULT_WINDOWS,
+                 batch_lines=BATCH_LINES, quarantine_file=None, report_sections=None):
+        self.filename = filename
+        self.output_file = output_file
+        # Incremental state to resume from and checkpoint to
+        self.state_file = state_file
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.log_interval = log_interval
+        self.sketch_options = sketch_options
+        self.windows = windows
+        self.report_sections = report_sections
+        self.batch_lines = batch_lines
+        self.quarantine_file = quarantine_file
+
+        self.aggregates = None
+        self.encoding = None
+        self.offset = None
+        self.validation = ValidationReport()
+        # tail_state() of what has been read, to detect rewrites
+        self.tail = None
+
+        # Unreported changes: time of the first and of the latest
+        self.pending_since = None
+        self.changed_at = None
+
+        # Throughput since the last log line
+        self.window_start = time.monotonic()
+        self.window_rows = 0
+        self.reports = 0
+        self.report_seconds = 0.0
+
+    def _reset(self):
+        if self.sketch_options is not None:
+            self.aggregates = ApproximateSalesAggregates(**self.sketch_options)
+        else:
+            self.aggregates = SalesAggregates()
+        # Detected on the first read, once the file exists
+        self.encoding = None
+        self.offset = None
+        self.validation = ValidationReport()
+        self.tail = None
+        if self.quarantine_file:
+            open(self.quarantine_file, "w", encoding="utf-8").close()
+
+    @property
+    def invalid(self):
+        return self.validation.rejected
+
+    def resume(self):
+        """
+        Starts from the saved incremental state while it still matches the
+        file and the sketch options
+        Returns: whether the state was used
+        """
+        state = load_state(self.state_file) if self.state_file else None
+
+        if os.path.exists(self.filename) and is_state_valid(state, self.filename, self.sketch_options):
+            self.aggregates = aggregates_from_dict(state["aggregates"])
+            self.encoding = state["encoding"]
+            self.offset = state["offset"]
+            self.validation = ValidationReport.from_dict(state["validation"])
+            self.tail = tail_state(self.filename, self.offset)
+            return True
+
+        self._reset()
+        return False
+
+    def checkpoint(self):
+        """
+        Saves the incremental state, so a restart (or --incremental) resumes here
+        """
+        if self.state_file and self.offset is not None and os.path.exists(self.filename):
+            save_state(build_state(self.filename, self.encoding, self.offset, self.validation,
+                                   self.aggregates), self.state_file)
+
+    def poll(self):
+        """
+        Folds newly appended lines into the aggregates (at most batch_lines)
+        Returns: lines read
+        """
+        if not os.path.exists(self.filename):
+            return 0
+
+        if self.tail is not None and not is_state_valid(self.tail, self.filename):
+            self.log("sales file truncated or rewritten, re-reading from the start")
+            self._reset()
+
+        if self.encoding is None:
+            self.encoding = detect_encoding(self.filename) or "latin-1"
+
+        since = fallback_bytes()
+        if self.quarantine_file:
+            with open(self.quarantine_file, "a", encoding="utf-8") as quarantine:
+                self.offset, parsed, _ = read_appended(self.filename, self.encoding, self.offset,
+                                                       self.aggregates, self.batch_lines,
+                                                       self.validation, quarantine)
+        else:
+            self.offset, parsed, _ = read_appended(self.filename, self.encoding, self.offset,
+                                                   self.aggregates, self.batch_lines, self.validation)
+        self.tail = tail_state(self.filename, self.offset)
+        if fallback_bytes() > since:
+            self.log(f"{fallback_bytes() - since} byte(s) did not decode as {self.encoding}; read them as latin-1")
+
+        if parsed:
+            self.window_rows += parsed
+
+            now = time.monotonic()
+            self.changed_at = now
+            if self.pending_since is None:
+                self.pending_since = now
+
+        return parsed
+
+    def report_due(self, now):
+        if self.pending_since is None:
+            return False
+        return now - self.changed_at >= self.debounce or now - self.pending_since >= self.max_delay
+
+    def write_report(self):
+        started = time.perf_counter()
+        generate_sales_report(None, None, output_file=self.output_file,
+                              aggregates=self.aggregates, windows=self.windows,
+                              sections=self.report_sections)
+        self.report_seconds = time.perf_counter() - started
+        self.reports += 1
+        self.pending_since = None
+        self.changed_at = None
+
+    def log(self, message):
+        print(f"[watch {datetime.now().strftime('%H:%M:%S')}] {message}", flush=True)
+
+    def log_throughput(self, now):
+        elapsed = now - self.window_start
+        rate = self.window_rows / elapsed if elapsed > 0 else 0.0
+        self.log(
+            f"+{self.window_rows:,} rows ({rate:,.0f} rows/s)"
+            f" | valid {self.aggregates.transaction_count:,} | invalid {self.invalid:,}"
+            f" | offset {self.offset or 0:,} B"
+            f" | reports {self.reports} (last {self.report_seconds:.2f}s)"
+            f" | RSS {(current_rss() or 0) / 1e6:.1f} MB"
+        )
+        self.window_start = now
+        self.window_rows = 0
+
+    def _next_timeout(self, now):
+        deadlines = [self.window_start + self.log_interval]
+        if self.pending_since is not None:
+            deadlines.append(min(self.changed_at + self.debounce, self.pending_since + self.max_delay))
+        return min(max(min(deadlines) - now, 0.0), POLL_INTERVAL)
+
+    def run(self, waiter, should_stop=lambda: False, duration=None):
+        """
+        Catches up with the file, writes the report, then follows appends
+        until should_stop() returns true (or duration seconds have passed)
+        The report and state are brought up to date before returning
+        """
+        stop_at = time.monotonic() + duration if duration is not None else None
+
+        try:
+            while self.poll() == self.batch_lines:
+                pass
+            self.write_report()
+            self.log_throughput(time.monotonic())
+
+            # A full batch means more lines may already be waiting: read on
+            # without waiting for another event, reporting in between
+            backlog = False
+
+            while not should_stop() and (stop_at is None or time.monotonic() < stop_at):
+                timeout = 0.0 if backlog else self._next_timeout(time.monotonic())
+                if waiter.wait(timeout) or backlog:
+                    backlog = self.poll() == self.batch_lines
+
+                now = time.monotonic()
+                if self.report_due(now):
+                    self.write_report()
+                if now - self.window_start >= self.log_interval:
+                    self.log_throughput(now)
+        finally:
+            waiter.close()
+            if self.pending_since is not None:
+                self.write_report()
+            self.checkpoint()